@@ -19,11 +19,15 @@ Usage:
 import os
 import sys
 import json
-import requests
 import argparse
 from typing import List, Dict
 import re
 
+import requests
+
+from okta_client import OktaSession
+from okta_api_manager import write_label_assignments
+
 
 class AdminLabelApplier:
     """Applies Privileged label to admin entitlements"""
@@ -32,13 +36,7 @@ class AdminLabelApplier:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
         self.dry_run = dry_run
         self.admin_pattern = re.compile(r"admin", re.IGNORECASE)
 
@@ -88,22 +86,17 @@ class AdminLabelApplier:
             url = f"{self.governance_base}/entitlement-bundles"
             params = {"limit": 200}
 
-            response = self.session.get(url, params=params)
-            print(f"Status Code: {response.status_code}")
+            bundles = list(self.session.paginate(url, params))
+            print(f"✅ Found {len(bundles)} entitlement bundles")
+            return bundles
 
-            if response.status_code == 200:
-                data = response.json()
-                bundles = data.get("data", [])
-                print(f"✅ Found {len(bundles)} entitlement bundles")
-                return bundles
-            elif response.status_code == 404:
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
                 print("⚠️  Entitlement bundles endpoint not found")
                 print("   OIG may not be fully configured")
-                return []
             else:
-                response.raise_for_status()
-                return []
-
+                print(f"❌ Error querying entitlements: {e}")
+            return []
         except Exception as e:
             print(f"❌ Error querying entitlements: {e}")
             return []
@@ -167,38 +160,14 @@ class AdminLabelApplier:
             return {"applied": 0, "failed": 0, "skipped": len(resource_orns), "dry_run": True}
 
         try:
-            # Apply labels in batches of 10 (API limit)
-            url = f"{self.governance_base}/resource-labels/assign"
-            batch_size = 10
-            total_applied = 0
-            total_failed = 0
-
-            for i in range(0, len(resource_orns), batch_size):
-                batch = resource_orns[i:i + batch_size]
-                batch_num = (i // batch_size) + 1
-                total_batches = (len(resource_orns) + batch_size - 1) // batch_size
-
-                print(f"Batch {batch_num}/{total_batches}: {len(batch)} resources")
-
-                payload = {
-                    "resourceOrns": batch,
-                    "labelValueIds": [label_value_id]
-                }
-
-                response = self.session.post(url, json=payload)
-                print(f"  Status Code: {response.status_code}")
-
-                if response.status_code in [200, 201, 204]:
-                    print(f"  ✅ Success")
-                    total_applied += len(batch)
-                    if response.text:
-                        print(f"  Response: {response.text[:300]}")
-                else:
-                    print(f"  ❌ Failed")
-                    print(f"  Response: {response.text[:300]}")
-                    total_failed += len(batch)
-
-                print()
+            # Chunked to the API limit and sent concurrently
+            result = write_label_assignments(
+                self.session,
+                self.governance_base,
+                [(label_value_id, orn) for orn in resource_orns]
+            )
+            total_applied = result["applied"]
+            total_failed = result["failed"]
 
             if total_applied > 0:
                 print(f"✅ Successfully applied Privileged label to {total_applied} entitlements")
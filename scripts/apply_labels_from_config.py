@@ -12,7 +12,9 @@ Features:
 - Creates labels with multiple values if they don't exist
 - Supports both single-value and multi-value labels
 - Applies specific label values to resources (apps, groups, entitlement bundles)
-- Supports dry-run mode
+- Plans against current Okta state and only sends missing assignments
+- Optionally removes assignments not in the config (--prune)
+- Supports dry-run mode (prints the plan only)
 - GitOps workflow: label_mappings.json is source of truth
 
 Hierarchical Label Structure:
@@ -29,13 +31,14 @@ Okta Label Constraints:
 Usage:
     python3 scripts/apply_labels_from_config.py --config environments/lowerdecklabs/config/label_mappings.json
     python3 scripts/apply_labels_from_config.py --config config/label_mappings.json --dry-run
+    python3 scripts/apply_labels_from_config.py --config config/label_mappings.json --prune
 """
 
 import os
 import sys
 import json
 import argparse
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 from collections import defaultdict
 
 # Add parent directory to path for imports
@@ -47,14 +50,16 @@ from scripts.okta_api_manager import OktaAPIManager
 class LabelApplier:
     """Applies labels from config file to Okta resources"""
 
-    def __init__(self, manager: OktaAPIManager, dry_run: bool = False):
+    def __init__(self, manager: OktaAPIManager, dry_run: bool = False, prune: bool = False):
         self.manager = manager
         self.dry_run = dry_run
+        self.prune = prune
         self.stats = {
             "labels_created": 0,
             "labels_skipped": 0,
             "label_values_created": 0,
             "assignments_applied": 0,
+            "assignments_removed": 0,
             "assignments_skipped": 0,
             "errors": []
         }
@@ -173,20 +178,15 @@ class LabelApplier:
             self.stats["errors"].append(f"Failed to create label '{label_name}': {e}")
             return False
 
-    def apply_assignments(self, assignment_key: str, resource_orns: List[str]) -> int:
+    def resolve_assignment_key(self, assignment_key: str) -> Tuple[Optional[str], str]:
         """
-        Apply a label value to a list of resources.
+        Resolve an assignment key to its labelValueId.
 
         Args:
             assignment_key: Either "LabelName" or "LabelName:ValueName"
-            resource_orns: List of resource ORNs
 
-        Returns: Number of resources successfully labeled
+        Returns: (labelValueId or None, display name)
         """
-        if not resource_orns:
-            return 0
-
-        # Parse assignment key
         if ":" in assignment_key:
             # Multi-value format: "Compliance:SOX"
             label_name, value_name = assignment_key.split(":", 1)
@@ -199,54 +199,122 @@ class LabelApplier:
 
         # Get labelValueId from cache
         cache_key = f"{label_name}:{value_name}"
-        label_value_id = self.label_value_cache.get(cache_key)
+        return self.label_value_cache.get(cache_key), display_name
 
-        if not label_value_id:
-            print(f"  ⚠️  Label value ID not found for '{assignment_key}'")
-            self.stats["errors"].append(f"Label value ID not found for '{assignment_key}'")
-            return 0
+    def fetch_current_assignments(self, label_value_ids: Set[str]) -> Dict[str, Set[str]]:
+        """Stream all resource-label assignments from Okta: {labelValueId: {ORN, ...}} for the given values"""
+        print("\nReading current label assignments from Okta...")
+        current = defaultdict(set)
+        count = 0
 
-        if self.dry_run:
-            print(f"  🔍 DRY RUN: Would assign '{display_name}' to {len(resource_orns)} resources")
-            for orn in resource_orns[:5]:  # Show first 5
-                print(f"     - {orn}")
-            if len(resource_orns) > 5:
-                print(f"     ... and {len(resource_orns) - 5} more")
-            self.stats["assignments_applied"] += len(resource_orns)
-            return len(resource_orns)
+        for assignment in self.manager.iter_resource_labels():
+            resource_orn = assignment.get("resource", {}).get("orn", "")
+            if not resource_orn:
+                continue
+            count += 1
+            for label_value in assignment.get("labels", []):
+                label_value_id = label_value.get("labelValueId")
+                if label_value_id in label_value_ids:
+                    current[label_value_id].add(resource_orn)
+
+        print(f"  ✅ Read {count} labeled resources")
+        return current
+
+    def plan_assignments(self, assignments_config: Dict) -> Optional[Dict[str, Dict]]:
+        """
+        Diff the configured assignments against Okta, per labelValueId.
+
+        Returns: {labelValueId: {"display_name", "add": [ORN], "remove": [ORN], "unchanged": int}},
+                 or None if the current state could not be read
+        """
+        desired = defaultdict(set)
+        display_names = {}
+
+        for resource_type in ["apps", "groups", "entitlement_bundles", "other"]:
+            for assignment_key, orns in assignments_config.get(resource_type, {}).items():
+                label_value_id, display_name = self.resolve_assignment_key(assignment_key)
+                if not label_value_id:
+                    print(f"  ⚠️  Label value ID not found for '{assignment_key}'")
+                    self.stats["errors"].append(f"Label value ID not found for '{assignment_key}'")
+                    continue
+                display_names[label_value_id] = display_name
+                desired[label_value_id].update(orns or [])
+
+        # Every value of a configured label is managed, so it can be pruned
+        for cache_key, label_value_id in self.label_value_cache.items():
+            label_name, value_name = cache_key.split(":", 1)
+            display_names.setdefault(label_value_id, label_name if label_name == value_name else cache_key)
 
         try:
-            print(f"  📦 Assigning '{display_name}' to {len(resource_orns)} resources...")
-            print(f"     Label value ID: {label_value_id}")
-            print(f"     Resource ORNs:")
-            for orn in resource_orns:
-                print(f"       - {orn}")
-
-            self.manager.assign_label_values_to_resources(
-                label_value_ids=[label_value_id],
-                resource_orns=resource_orns
-            )
-            self.stats["assignments_applied"] += len(resource_orns)
-            return len(resource_orns)
+            current = self.fetch_current_assignments(set(display_names))
         except Exception as e:
-            print(f"  ❌ Error assigning '{display_name}': {e}")
-            print(f"     Label value ID used: {label_value_id}")
-            print(f"     Number of resource ORNs: {len(resource_orns)}")
-            print(f"     Resource ORNs:")
-            for orn in resource_orns:
-                print(f"       - {orn}")
-
-            # Print response details if available
-            if hasattr(e, 'response') and e.response is not None:
-                print(f"     HTTP Status: {e.response.status_code}")
-                try:
-                    error_body = e.response.json()
-                    print(f"     Error body: {json.dumps(error_body, indent=6)}")
-                except:
-                    print(f"     Response text: {e.response.text}")
-
-            self.stats["errors"].append(f"Failed to assign '{display_name}': {e}")
-            return 0
+            print(f"  ❌ Could not read current assignments: {e}")
+            self.stats["errors"].append(f"Failed to read current assignments: {e}")
+            return None
+
+        plan = {}
+        for label_value_id, display_name in display_names.items():
+            wanted = desired.get(label_value_id, set())
+            existing = current.get(label_value_id, set())
+            plan[label_value_id] = {
+                "display_name": display_name,
+                "add": sorted(wanted - existing),
+                "remove": sorted(existing - wanted) if self.prune else [],
+                "unchanged": len(wanted & existing)
+            }
+        return plan
+
+    def print_plan(self, plan: Dict[str, Dict]):
+        """Print a terraform-style plan of assignment changes"""
+        to_add = sum(len(entry["add"]) for entry in plan.values())
+        to_remove = sum(len(entry["remove"]) for entry in plan.values())
+        unchanged = sum(entry["unchanged"] for entry in plan.values())
+
+        for label_value_id, entry in sorted(plan.items(), key=lambda item: item[1]["display_name"]):
+            if not entry["add"] and not entry["remove"]:
+                continue
+            print(f"\n  # {entry['display_name']} ({label_value_id})")
+            for orn in entry["add"]:
+                print(f"  + {orn}")
+            for orn in entry["remove"]:
+                print(f"  - {orn}")
+
+        if not to_add and not to_remove:
+            print("\n  No changes. Label assignments match the configuration.")
+        print(f"\nPlan: {to_add} to assign, {to_remove} to unassign, {unchanged} unchanged.")
+
+    def apply_plan(self, plan: Dict[str, Dict]) -> int:
+        """
+        Send only the assignments (and removals, with --prune) in the plan.
+
+        Returns: Number of resource assignments changed
+        """
+        additions = [(label_value_id, orn) for label_value_id, entry in plan.items() for orn in entry["add"]]
+        removals = [(label_value_id, orn) for label_value_id, entry in plan.items() for orn in entry["remove"]]
+        self.stats["assignments_skipped"] += sum(entry["unchanged"] for entry in plan.values())
+
+        if self.dry_run:
+            self.stats["assignments_applied"] += len(additions)
+            self.stats["assignments_removed"] += len(removals)
+            return len(additions) + len(removals)
+
+        changed = 0
+        for action, pairs, stat in (("assign", additions, "assignments_applied"),
+                                    ("unassign", removals, "assignments_removed")):
+            if not pairs:
+                continue
+            print(f"\n📦 {action.capitalize()}ing {len(pairs)} label value assignment(s)...")
+            result = self.manager.write_label_assignments(pairs, unassign=(action == "unassign"))
+            self.stats[stat] += result["applied"]
+            changed += result["applied"]
+
+            for error in result["errors"]:
+                names = ", ".join(plan[label_value_id]["display_name"] for label_value_id in error["labelValueIds"])
+                self.stats["errors"].append(
+                    f"Failed to {action} '{names}' on {len(error['resourceOrns'])} resources: {error['error']}"
+                )
+
+        return changed
 
     def apply_all_labels(self, config: Dict) -> bool:
         """Process all labels and their assignments from config"""
@@ -270,29 +338,27 @@ class LabelApplier:
             if not success:
                 print(f"  ⚠️  Skipping assignments for '{label_name}' due to creation error")
 
-        # Step 2: Apply assignments
+        # Step 2: Plan assignments against current Okta state
         print("\n" + "="*80)
-        print("STEP 2: APPLY ASSIGNMENTS")
+        print("STEP 2: PLAN ASSIGNMENTS")
         print("="*80)
 
-        total_assignments = 0
-        for resource_type in ["apps", "groups", "entitlement_bundles", "other"]:
-            type_assignments = assignments_config.get(resource_type, {})
-
-            if not type_assignments:
-                continue
+        plan = self.plan_assignments(assignments_config)
+        if plan is None:
+            return False
+        self.print_plan(plan)
 
-            print(f"\n📂 Processing {resource_type}:")
+        # Step 3: Apply only the differences
+        print("\n" + "="*80)
+        print("STEP 3: APPLY CHANGES")
+        print("="*80)
 
-            for assignment_key, orns in type_assignments.items():
-                if orns:
-                    count = self.apply_assignments(assignment_key, orns)
-                    total_assignments += count
-                else:
-                    print(f"  ℹ️  No resources configured for '{assignment_key}'")
+        total_changes = self.apply_plan(plan)
 
-        if total_assignments == 0:
-            print(f"\n  ℹ️  No assignments were configured")
+        if total_changes == 0:
+            print(f"\n  ℹ️  Nothing to apply")
+        elif self.dry_run:
+            print(f"\n  🔍 DRY RUN: Would apply {total_changes} assignment changes")
 
         return True
 
@@ -314,6 +380,8 @@ class LabelApplier:
 
         print(f"\nAssignments:")
         print(f"  Applied: {self.stats['assignments_applied']}")
+        print(f"  Removed: {self.stats['assignments_removed']}")
+        print(f"  Already in place: {self.stats['assignments_skipped']}")
 
         if self.stats['errors']:
             print(f"\nErrors ({len(self.stats['errors'])}):")
@@ -337,6 +405,11 @@ def main():
         action="store_true",
         help="Show what would be done without making changes"
     )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Also remove assignments of configured labels that are not in the config"
+    )
     parser.add_argument(
         "--org-name",
         default=os.environ.get("OKTA_ORG_NAME"),
@@ -373,7 +446,7 @@ def main():
     )
 
     # Run label application
-    applier = LabelApplier(manager, dry_run=args.dry_run)
+    applier = LabelApplier(manager, dry_run=args.dry_run, prune=args.prune)
 
     try:
         config = applier.load_config(args.config)
@@ -383,6 +456,7 @@ def main():
         # Save results to JSON for workflow consumption
         results = {
             "dry_run": args.dry_run,
+            "prune": args.prune,
             "config_file": args.config,
             **applier.stats
         }
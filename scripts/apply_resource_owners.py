@@ -6,7 +6,8 @@ Applies resource owner assignments from config/owner_mappings.json to Okta.
 
 This script:
 1. Reads owner mappings from config/owner_mappings.json
-2. For each resource, assigns the specified owners
+2. Groups resources that share the same owners and assigns each owner set
+   with one request per chunk of resources
 3. Supports dry-run mode to preview changes
 4. Reports results
 
@@ -21,7 +22,19 @@ import sys
 import json
 import requests
 import argparse
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+from okta_client import OktaSession, fan_out
+
+
+# Max resourceOrns per PUT /resource-owners request
+OWNER_ASSIGNMENT_CHUNK_SIZE = 10
+
+RESOURCE_TYPES = [
+    ("apps", "Applications"),
+    ("groups", "Groups"),
+    ("entitlement_bundles", "Entitlement Bundles")
+]
 
 
 class ResourceOwnerApplier:
@@ -31,13 +44,7 @@ class ResourceOwnerApplier:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
         self.dry_run = dry_run
 
     def load_owner_mappings(self, config_file: str) -> Dict:
@@ -69,17 +76,17 @@ class ResourceOwnerApplier:
             print(f"❌ Error loading config: {e}")
             return None
 
-    def assign_owners(self, resource_orn: str, principal_orns: List[str]) -> Dict:
-        """Assign owners to a resource"""
+    def assign_owners(self, resource_orns: List[str], principal_orns: List[str]) -> Dict:
+        """Assign the same owners to one or more resources in a single PUT"""
         url = f"{self.governance_base}/resource-owners"
         payload = {
             "principalOrns": principal_orns,
-            "resourceOrns": [resource_orn]
+            "resourceOrns": resource_orns
         }
 
         try:
             if self.dry_run:
-                print(f"  [DRY RUN] Would assign {len(principal_orns)} owner(s) to {resource_orn}")
+                print(f"  [DRY RUN] Would assign {len(principal_orns)} owner(s) to {len(resource_orns)} resource(s)")
                 return {"status": "dry_run", "assigned": len(principal_orns)}
 
             response = self.session.put(url, json=payload)
@@ -87,8 +94,7 @@ class ResourceOwnerApplier:
 
             return {
                 "status": "success",
-                "assigned": len(principal_orns),
-                "response": response.json()
+                "assigned": len(principal_orns)
             }
 
         except requests.exceptions.HTTPError as e:
@@ -109,8 +115,48 @@ class ResourceOwnerApplier:
                 "error": str(e)
             }
 
+    def group_by_owner_set(self, assignments: Dict) -> List[Tuple[List[str], List[Dict]]]:
+        """
+        Group resources that share the exact same owners.
+
+        Returns: [(sorted principal ORNs, [{"resource_type", "resource_orn", "resource_name"}, ...])]
+                 with each resource list chunked to OWNER_ASSIGNMENT_CHUNK_SIZE
+        """
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+
+        for resource_type, title in RESOURCE_TYPES:
+            print(f"\n--- {title} ---")
+            for assignment in assignments.get(resource_type, []):
+                resource_orn = assignment.get("resource_orn")
+                resource_name = assignment.get("resource_name", "Unknown")
+                owners = assignment.get("owners", [])
+
+                principal_orns = [owner.get("principal_orn") for owner in owners if owner.get("principal_orn")]
+
+                if not principal_orns:
+                    print(f"⚠️  {resource_name}: No owners to assign")
+                    continue
+
+                print(f"\n{resource_name} ({resource_orn}):")
+                for owner in owners:
+                    print(f"  • {owner.get('principal_name', 'Unknown')} ({owner.get('principal_type', 'user')})")
+
+                # Canonical owner set: order and duplicates don't matter
+                owner_set = tuple(sorted(set(principal_orns)))
+                groups.setdefault(owner_set, []).append({
+                    "resource_type": resource_type,
+                    "resource_orn": resource_orn,
+                    "resource_name": resource_name
+                })
+
+        chunks = []
+        for owner_set, resources in groups.items():
+            for i in range(0, len(resources), OWNER_ASSIGNMENT_CHUNK_SIZE):
+                chunks.append((list(owner_set), resources[i:i + OWNER_ASSIGNMENT_CHUNK_SIZE]))
+        return chunks
+
     def apply_all_owners(self, assignments: Dict) -> Dict:
-        """Apply all owner assignments from config"""
+        """Apply all owner assignments from config, one PUT per owner set and chunk"""
         print("\n" + "="*80)
         if self.dry_run:
             print("APPLYING OWNER ASSIGNMENTS (DRY RUN)")
@@ -126,105 +172,46 @@ class ResourceOwnerApplier:
                 "total": 0,
                 "success": 0,
                 "errors": 0,
+                "requests": 0,
                 "dry_run": self.dry_run
             }
         }
 
-        # Process apps
-        print("\n--- Applications ---")
-        for app_assignment in assignments.get("apps", []):
-            resource_orn = app_assignment.get("resource_orn")
-            resource_name = app_assignment.get("resource_name", "Unknown")
-            owners = app_assignment.get("owners", [])
-
-            principal_orns = [owner.get("principal_orn") for owner in owners if owner.get("principal_orn")]
+        chunks = self.group_by_owner_set(assignments)
+        resource_count = sum(len(resources) for _, resources in chunks)
+        print(f"\n--- Assigning owners to {resource_count} resource(s) in {len(chunks)} request(s) ---")
 
-            if not principal_orns:
-                print(f"⚠️  {resource_name}: No owners to assign")
-                continue
-
-            print(f"\n{resource_name} ({resource_orn}):")
-            for owner in owners:
-                print(f"  • {owner.get('principal_name', 'Unknown')} ({owner.get('principal_type', 'user')})")
-
-            result = self.assign_owners(resource_orn, principal_orns)
-            result["resource_name"] = resource_name
-            result["resource_orn"] = resource_orn
-            results["apps"].append(result)
-            results["summary"]["total"] += 1
-
-            if result["status"] == "success":
-                print(f"✅ Assigned {len(principal_orns)} owner(s)")
-                results["summary"]["success"] += 1
-            elif result["status"] == "dry_run":
-                results["summary"]["success"] += 1
-            else:
-                print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                results["summary"]["errors"] += 1
-
-        # Process groups
-        print("\n--- Groups ---")
-        for group_assignment in assignments.get("groups", []):
-            resource_orn = group_assignment.get("resource_orn")
-            resource_name = group_assignment.get("resource_name", "Unknown")
-            owners = group_assignment.get("owners", [])
-
-            principal_orns = [owner.get("principal_orn") for owner in owners if owner.get("principal_orn")]
-
-            if not principal_orns:
-                print(f"⚠️  {resource_name}: No owners to assign")
-                continue
-
-            print(f"\n{resource_name} ({resource_orn}):")
-            for owner in owners:
-                print(f"  • {owner.get('principal_name', 'Unknown')} ({owner.get('principal_type', 'user')})")
-
-            result = self.assign_owners(resource_orn, principal_orns)
-            result["resource_name"] = resource_name
-            result["resource_orn"] = resource_orn
-            results["groups"].append(result)
-            results["summary"]["total"] += 1
+        # Owner sets are independent, so their PUTs run concurrently
+        url = f"{self.governance_base}/resource-owners"
+        outcomes = fan_out(
+            lambda chunk: self.assign_owners([r["resource_orn"] for r in chunk[1]], chunk[0]),
+            chunks, session=self.session, url=url
+        )
 
-            if result["status"] == "success":
-                print(f"✅ Assigned {len(principal_orns)} owner(s)")
-                results["summary"]["success"] += 1
-            elif result["status"] == "dry_run":
-                results["summary"]["success"] += 1
-            else:
-                print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                results["summary"]["errors"] += 1
-
-        # Process entitlement bundles
-        print("\n--- Entitlement Bundles ---")
-        for bundle_assignment in assignments.get("entitlement_bundles", []):
-            resource_orn = bundle_assignment.get("resource_orn")
-            resource_name = bundle_assignment.get("resource_name", "Unknown")
-            owners = bundle_assignment.get("owners", [])
-
-            principal_orns = [owner.get("principal_orn") for owner in owners if owner.get("principal_orn")]
-
-            if not principal_orns:
-                print(f"⚠️  {resource_name}: No owners to assign")
-                continue
-
-            print(f"\n{resource_name} ({resource_orn}):")
-            for owner in owners:
-                print(f"  • {owner.get('principal_name', 'Unknown')} ({owner.get('principal_type', 'user')})")
-
-            result = self.assign_owners(resource_orn, principal_orns)
-            result["resource_name"] = resource_name
-            result["resource_orn"] = resource_orn
-            results["entitlement_bundles"].append(result)
-            results["summary"]["total"] += 1
+        for outcome in outcomes:
+            principal_orns, resources = outcome.item
+            result = outcome.result if outcome.ok else {"status": "error", "error": str(outcome.error)}
+            results["summary"]["requests"] += 1
 
             if result["status"] == "success":
-                print(f"✅ Assigned {len(principal_orns)} owner(s)")
-                results["summary"]["success"] += 1
-            elif result["status"] == "dry_run":
-                results["summary"]["success"] += 1
-            else:
-                print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                results["summary"]["errors"] += 1
+                print(f"✅ Assigned {len(principal_orns)} owner(s) to {len(resources)} resource(s)")
+            elif result["status"] == "error":
+                print(f"❌ Error assigning {len(principal_orns)} owner(s) to {len(resources)} resource(s): "
+                      f"{result.get('error', 'Unknown error')}")
+                for resource in resources:
+                    print(f"   - {resource['resource_name']} ({resource['resource_orn']})")
+
+            for resource in resources:
+                resource_result = dict(result)
+                resource_result["resource_name"] = resource["resource_name"]
+                resource_result["resource_orn"] = resource["resource_orn"]
+                results[resource["resource_type"]].append(resource_result)
+                results["summary"]["total"] += 1
+
+                if result["status"] in ("success", "dry_run"):
+                    results["summary"]["success"] += 1
+                else:
+                    results["summary"]["errors"] += 1
 
         return results
 
@@ -250,6 +237,7 @@ class ResourceOwnerApplier:
         print("SUMMARY")
         print("="*80)
         print(f"Total resources: {results['summary']['total']}")
+        print(f"API requests: {results['summary']['requests']}")
         print(f"Successful: {results['summary']['success']}")
         print(f"Errors: {results['summary']['errors']}")
         if self.dry_run:
@@ -6,8 +6,8 @@ Applies risk rule (SOD policy) configuration from config/risk_rules.json to Okta
 
 This script:
 1. Reads risk rules from config/risk_rules.json
-2. Compares with existing risk rules in Okta
-3. Creates new rules, updates existing rules, optionally deletes removed rules
+2. Compares normalized content hashes with existing risk rules in Okta
+3. Creates new rules, updates changed rules, optionally deletes removed rules
 4. Supports dry-run mode to preview changes
 5. Reports results
 
@@ -16,14 +16,59 @@ Usage:
     python3 scripts/apply_risk_rules.py --dry-run
     python3 scripts/apply_risk_rules.py --config config/risk_rules.json
     python3 scripts/apply_risk_rules.py --delete-removed  # Delete rules not in config
+    python3 scripts/apply_risk_rules.py --resume          # Continue a failed run
 """
 
 import os
 import sys
 import json
+import hashlib
 import requests
 import argparse
-from typing import List, Dict, Tuple
+from datetime import datetime
+from typing import Any, List, Dict, Optional, Tuple
+
+from okta_client import OktaSession, fan_out
+
+
+# Fields of a risk rule that can be set through create/update; everything
+# else in an API response (id, status, timestamps, _links) is read-only
+RISK_RULE_FIELDS = ["name", "description", "notes", "type", "resources", "conflictCriteria"]
+
+
+def _canonical(value: Any) -> Any:
+    """Recursively sort lists so that element order does not affect comparison"""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    if isinstance(value, list):
+        items = [_canonical(v) for v in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True))
+    return value
+
+
+def normalize_risk_rule(rule: Dict) -> Dict:
+    """
+    Reduce a risk rule (config entry or API response) to its comparable content.
+
+    Keeps only writable fields, drops empty values (None, "", [] and {}) and
+    _metadata, and sorts resources and conflict criteria (both are unordered
+    sets in Okta).
+    """
+    normalized = {}
+    for field in RISK_RULE_FIELDS:
+        value = rule.get(field)
+        if value is None or value == "" or value == [] or value == {}:
+            continue
+        if field in ("resources", "conflictCriteria"):
+            value = _canonical(value)
+        normalized[field] = value
+    return normalized
+
+
+def risk_rule_hash(rule: Dict) -> str:
+    """Stable content hash of a risk rule, independent of key and list order"""
+    canonical = json.dumps(normalize_risk_rule(rule), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
 class RiskRuleApplier:
@@ -33,13 +78,7 @@ class RiskRuleApplier:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
         self.dry_run = dry_run
 
     def load_config(self, config_file: str) -> Dict:
@@ -64,8 +103,15 @@ class RiskRuleApplier:
             print(f"❌ Error loading config: {e}")
             return None
 
-    def get_existing_rules(self) -> Dict[str, Dict]:
-        """Fetch existing risk rules from Okta, indexed by name"""
+    def get_existing_rules(self) -> Optional[Dict[str, Dict]]:
+        """
+        Fetch existing risk rules from Okta, indexed by ID.
+
+        Rule names are not unique in Okta, so indexing by name could hide a rule.
+
+        Returns {} if the risk rules API is not available, and None if the
+        rules could not be read (planning without them would duplicate rules).
+        """
         print("\n" + "="*80)
         print("FETCHING EXISTING RISK RULES FROM OKTA")
         print("="*80)
@@ -74,32 +120,11 @@ class RiskRuleApplier:
         params = {"limit": 200}
 
         all_rules = {}
-        after = None
 
         try:
-            while True:
-                if after:
-                    params["after"] = after
-
-                response = self.session.get(url, params=params)
-                response.raise_for_status()
-
-                data = response.json()
-                rules = data.get("data", [])
-
-                for rule in rules:
-                    rule_name = rule.get("name")
-                    all_rules[rule_name] = rule
-
-                # Check for pagination
-                next_link = data.get("_links", {}).get("next", {}).get("href")
-                if not next_link or not rules:
-                    break
-
-                if "after=" in next_link:
-                    after = next_link.split("after=")[1].split("&")[0]
-                else:
-                    break
+            for rule in self.session.paginate(url, params):
+                if rule.get("id"):
+                    all_rules[rule["id"]] = rule
 
             print(f"✅ Found {len(all_rules)} existing risk rules in Okta")
             return all_rules
@@ -110,13 +135,13 @@ class RiskRuleApplier:
                 return {}
             elif e.response.status_code == 403:
                 print("  ❌ Access denied. Ensure API token has 'okta.governance.riskRule.read' scope")
-                return {}
+                return None
             else:
                 print(f"  ⚠️  Error fetching existing rules: {e}")
-                return {}
+                return None
         except Exception as e:
             print(f"  ⚠️  Unexpected error: {e}")
-            return {}
+            return None
 
     def create_risk_rule(self, rule_config: Dict) -> Dict:
         """Create a new risk rule in Okta"""
@@ -233,10 +258,21 @@ class RiskRuleApplier:
 
     def plan_changes(self, config_rules: List[Dict], existing_rules: Dict[str, Dict], delete_removed: bool) -> Dict:
         """
-        Determine what changes need to be made
+        Determine what changes need to be made.
+
+        Config rules are matched to Okta rules by _metadata.id first, then by
+        name. A matched rule is only updated if its normalized content hash
+        differs, so an unchanged config plans no writes. A name shared by
+        several unmatched Okta rules is a conflict: rules with that name are
+        neither matched, created nor deleted until it is resolved (e.g. by
+        setting _metadata.id in the config).
+
+        Args:
+            existing_rules: Okta rules indexed by ID, from get_existing_rules()
 
         Returns:
-            Dictionary with 'create', 'update', 'delete' lists
+            Dictionary with 'create', 'update', 'delete' and 'conflicts' lists
+            and an 'unchanged' count
         """
         print("\n" + "="*80)
         print("PLANNING CHANGES")
@@ -245,77 +281,143 @@ class RiskRuleApplier:
         changes = {
             "create": [],
             "update": [],
-            "delete": []
+            "delete": [],
+            "conflicts": [],
+            "unchanged": 0
         }
 
-        # Track which existing rules are matched
-        matched_existing = set()
+        # Prefer _metadata.id (from import) so renamed rules update in place
+        matches = {}
+        for index, config_rule in enumerate(config_rules):
+            metadata_id = (config_rule.get("_metadata") or {}).get("id")
+            if metadata_id in existing_rules:
+                matches[index] = existing_rules[metadata_id]
+
+        # Track which existing rules are matched, by ID
+        matched_ids = {rule["id"] for rule in matches.values()}
+
+        # Name index over the rules not claimed by ID
+        existing_by_name: Dict[str, List[Dict]] = {}
+        for rule_id, rule in existing_rules.items():
+            if rule_id not in matched_ids:
+                existing_by_name.setdefault(rule.get("name"), []).append(rule)
+        conflicting_ids = set()
+        for rule_name, rules in existing_by_name.items():
+            if len(rules) > 1:
+                ids = [rule["id"] for rule in rules]
+                changes["conflicts"].append({"name": rule_name, "ids": ids})
+                conflicting_ids.update(ids)
+                print(f"  ⚠️  CONFLICT: {len(rules)} Okta rules are named '{rule_name}' ({', '.join(ids)})")
 
         # Check each config rule
-        for config_rule in config_rules:
+        for index, config_rule in enumerate(config_rules):
             rule_name = config_rule.get("name")
 
-            # Check if rule has _metadata.id (from import)
-            metadata_id = config_rule.get("_metadata", {}).get("id") if config_rule.get("_metadata") else None
-
-            # Try to find existing rule by name
-            if rule_name in existing_rules:
-                # Rule exists, plan update
-                existing_rule = existing_rules[rule_name]
-                existing_id = existing_rule.get("id")
-                matched_existing.add(rule_name)
+            existing_rule = matches.get(index)
+            if existing_rule is None:
+                candidates = existing_by_name.get(rule_name, [])
+                if len(candidates) > 1:
+                    # Reported above; matching either rule would be a guess
+                    continue
+                existing_rule = candidates[0] if candidates else None
 
-                changes["update"].append({
-                    "config": config_rule,
-                    "existing_id": existing_id,
-                    "existing": existing_rule
-                })
-                print(f"  📝 UPDATE: {rule_name} (ID: {existing_id})")
-
-            elif metadata_id:
-                # Rule has metadata ID but name doesn't match - possible rename
-                # Treat as update using the ID from metadata
-                matched_existing.add(rule_name)
-                changes["update"].append({
-                    "config": config_rule,
-                    "existing_id": metadata_id,
-                    "existing": None  # Don't have the current version
-                })
-                print(f"  📝 UPDATE: {rule_name} (ID from metadata: {metadata_id})")
-
-            else:
+            if existing_rule is None:
                 # Rule doesn't exist, plan create
                 changes["create"].append({
                     "config": config_rule
                 })
                 print(f"  ➕ CREATE: {rule_name}")
+                continue
+
+            existing_id = existing_rule.get("id")
+            matched_ids.add(existing_id)
+
+            if risk_rule_hash(config_rule) == risk_rule_hash(existing_rule):
+                changes["unchanged"] += 1
+                continue
+
+            changes["update"].append({
+                "config": config_rule,
+                "existing_id": existing_id,
+                "existing": existing_rule
+            })
+            if existing_rule.get("name") != rule_name:
+                print(f"  📝 UPDATE: {existing_rule.get('name')} -> {rule_name} (ID: {existing_id})")
+            else:
+                print(f"  📝 UPDATE: {rule_name} (ID: {existing_id})")
 
-        # Find rules to delete (in Okta but not in config)
+        # Find rules to delete (in Okta but not matched by any config rule)
         if delete_removed:
-            for existing_name, existing_rule in existing_rules.items():
-                if existing_name not in matched_existing:
-                    # Check if any config rule references this by ID
-                    existing_id = existing_rule.get("id")
-                    id_matched = any(
-                        r.get("_metadata", {}).get("id") == existing_id
-                        for r in config_rules
-                    )
-
-                    if not id_matched:
-                        changes["delete"].append({
-                            "existing": existing_rule
-                        })
-                        print(f"  ❌ DELETE: {existing_name} (ID: {existing_rule.get('id')})")
+            for existing_id, existing_rule in existing_rules.items():
+                if existing_id not in matched_ids and existing_id not in conflicting_ids:
+                    changes["delete"].append({
+                        "existing": existing_rule
+                    })
+                    print(f"  ❌ DELETE: {existing_rule.get('name')} (ID: {existing_id})")
 
         print(f"\nPlanned changes:")
         print(f"  Create: {len(changes['create'])}")
         print(f"  Update: {len(changes['update'])}")
         print(f"  Delete: {len(changes['delete'])}")
+        print(f"  Unchanged: {changes['unchanged']}")
+        if changes["conflicts"]:
+            print(f"  Conflicts: {len(changes['conflicts'])} duplicate rule names (left untouched)")
 
         return changes
 
-    def apply_changes(self, changes: Dict) -> Dict:
-        """Execute the planned changes"""
+    def operation_key(self, action: str, item: Dict) -> str:
+        """
+        Stable identity of a planned operation, used to resume from a results file.
+
+        Creates and updates include the config content hash, so an operation
+        is redone if its rule was edited since the failed run.
+        """
+        if action == "create":
+            return f"create:{item['config'].get('name')}:{risk_rule_hash(item['config'])}"
+        if action == "update":
+            return f"update:{item['existing_id']}:{risk_rule_hash(item['config'])}"
+        return f"delete:{item['existing'].get('id')}"
+
+    def load_completed_operations(self, results_file: str) -> set:
+        """Keys of operations that succeeded in a previous run's NDJSON results"""
+        completed = set()
+        if not results_file or not os.path.exists(results_file):
+            return completed
+        with open(results_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written last line from a crash
+                if record.get("status") == "success":
+                    completed.add(record.get("key"))
+        return completed
+
+    def _execute(self, operation: Tuple[str, str, Dict]) -> Dict:
+        """Run one planned operation (called from worker threads)"""
+        action, key, item = operation
+        if action == "create":
+            result = self.create_risk_rule(item["config"])
+            result["rule_name"] = item["config"].get("name", "Unknown")
+        elif action == "update":
+            result = self.update_risk_rule(item["existing_id"], item["config"])
+            result["rule_name"] = item["config"].get("name", "Unknown")
+            result["rule_id"] = item["existing_id"]
+        else:
+            existing_rule = item["existing"]
+            result = self.delete_risk_rule(existing_rule.get("id"), existing_rule.get("name", "Unknown"))
+            result["rule_name"] = existing_rule.get("name", "Unknown")
+            result["rule_id"] = existing_rule.get("id")
+        return result
+
+    def apply_changes(self, changes: Dict, results_file: Optional[str] = None, resume: bool = False) -> Dict:
+        """
+        Execute the planned changes concurrently on the shared rate-limited session.
+
+        Each finished operation is appended to results_file (NDJSON) as it
+        completes. With resume, operations that already succeeded according
+        to results_file are skipped.
+        """
         print("\n" + "="*80)
         if self.dry_run:
             print("APPLYING CHANGES (DRY RUN)")
@@ -331,83 +433,85 @@ class RiskRuleApplier:
                 "total": 0,
                 "success": 0,
                 "errors": 0,
+                "skipped": 0,
                 "dry_run": self.dry_run
             }
         }
 
-        # Create new rules
-        if changes["create"]:
-            print("\n--- Creating New Risk Rules ---")
-            for item in changes["create"]:
-                rule_config = item["config"]
-                rule_name = rule_config.get("name", "Unknown")
-
-                print(f"\n{rule_name}:")
-                result = self.create_risk_rule(rule_config)
-                result["rule_name"] = rule_name
-                results["create"].append(result)
-                results["summary"]["total"] += 1
-
-                if result["status"] == "success":
-                    print(f"✅ Created successfully")
-                    results["summary"]["success"] += 1
-                elif result["status"] == "dry_run":
-                    results["summary"]["success"] += 1
-                else:
-                    print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                    results["summary"]["errors"] += 1
-
-        # Update existing rules
-        if changes["update"]:
-            print("\n--- Updating Existing Risk Rules ---")
-            for item in changes["update"]:
-                rule_config = item["config"]
-                existing_id = item["existing_id"]
-                rule_name = rule_config.get("name", "Unknown")
-
-                print(f"\n{rule_name} (ID: {existing_id}):")
-                result = self.update_risk_rule(existing_id, rule_config)
-                result["rule_name"] = rule_name
-                result["rule_id"] = existing_id
-                results["update"].append(result)
-                results["summary"]["total"] += 1
-
-                if result["status"] == "success":
-                    print(f"✅ Updated successfully")
-                    results["summary"]["success"] += 1
-                elif result["status"] == "dry_run":
-                    results["summary"]["success"] += 1
-                else:
-                    print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                    results["summary"]["errors"] += 1
-
-        # Delete removed rules
-        if changes["delete"]:
-            print("\n--- Deleting Removed Risk Rules ---")
-            for item in changes["delete"]:
-                existing_rule = item["existing"]
-                rule_id = existing_rule.get("id")
-                rule_name = existing_rule.get("name", "Unknown")
-
-                print(f"\n{rule_name} (ID: {rule_id}):")
-                result = self.delete_risk_rule(rule_id, rule_name)
-                result["rule_name"] = rule_name
-                result["rule_id"] = rule_id
-                results["delete"].append(result)
-                results["summary"]["total"] += 1
-
-                if result["status"] == "success":
-                    print(f"✅ Deleted successfully")
-                    results["summary"]["success"] += 1
-                elif result["status"] == "dry_run":
-                    results["summary"]["success"] += 1
-                else:
-                    print(f"❌ Error: {result.get('error', 'Unknown error')}")
-                    results["summary"]["errors"] += 1
+        completed = self.load_completed_operations(results_file) if resume else set()
+        if completed:
+            print(f"\nResuming: {len(completed)} operations already succeeded in {results_file}")
+
+        stream = None
+        if results_file and not self.dry_run:
+            stream = open(results_file, 'a' if resume else 'w')
+
+        phases = [
+            ("create", "Creating New Risk Rules", "Created"),
+            ("update", "Updating Existing Risk Rules", "Updated"),
+            ("delete", "Deleting Removed Risk Rules", "Deleted")
+        ]
+
+        try:
+            for action, title, done in phases:
+                operations = []
+                for item in changes[action]:
+                    key = self.operation_key(action, item)
+                    if key in completed:
+                        results["summary"]["skipped"] += 1
+                        continue
+                    operations.append((action, key, item))
+
+                if not operations:
+                    continue
+                print(f"\n--- {title} ---")
+
+                # Rules are independent; run each phase concurrently under the rate limiter
+                url = f"{self.governance_base}/risk-rules"
+                # Results are recorded as each operation finishes, so a killed run
+                # loses nothing that completed; the summary keeps plan order
+                finished = []
+                for outcome in fan_out(self._execute, operations, session=self.session, url=url,
+                                       ordered=False):
+                    _, key, item = outcome.item
+                    result = outcome.result if outcome.ok else {"status": "error", "error": str(outcome.error)}
+                    finished.append((outcome.index, result))
+                    results["summary"]["total"] += 1
+
+                    label = result.get("rule_name", "Unknown")
+                    if result.get("rule_id"):
+                        label += f" (ID: {result['rule_id']})"
+
+                    if result["status"] == "success":
+                        print(f"✅ {done} {label}")
+                        results["summary"]["success"] += 1
+                    elif result["status"] == "dry_run":
+                        results["summary"]["success"] += 1
+                    else:
+                        print(f"❌ {label}: {result.get('error', 'Unknown error')}")
+                        results["summary"]["errors"] += 1
+
+                    if stream:
+                        stream.write(json.dumps({
+                            "timestamp": datetime.utcnow().isoformat() + "Z",
+                            "key": key,
+                            "action": action,
+                            "rule_name": result.get("rule_name"),
+                            "rule_id": result.get("rule_id") or (result.get("rule") or {}).get("id"),
+                            "status": result["status"],
+                            "error": result.get("error")
+                        }) + "\n")
+                        stream.flush()
+
+                results[action].extend(result for _, result in sorted(finished, key=lambda pair: pair[0]))
+        finally:
+            if stream:
+                stream.close()
 
         return results
 
-    def run(self, config_file: str, delete_removed: bool = False):
+    def run(self, config_file: str, delete_removed: bool = False,
+            results_file: Optional[str] = None, resume: bool = False):
         """Main execution"""
         print("="*80)
         if self.dry_run:
@@ -428,6 +532,9 @@ class RiskRuleApplier:
 
         # Get existing rules from Okta
         existing_rules = self.get_existing_rules()
+        if existing_rules is None:
+            print("\n❌ Cannot plan changes without the current risk rules")
+            return False
 
         # Plan changes
         changes = self.plan_changes(config_rules, existing_rules, delete_removed)
@@ -435,11 +542,14 @@ class RiskRuleApplier:
         # Check if there are any changes
         total_changes = len(changes["create"]) + len(changes["update"]) + len(changes["delete"])
         if total_changes == 0:
+            if changes["conflicts"]:
+                print("\n❌ No changes applied, but duplicate rule names in Okta need resolving")
+                return False
             print("\n✅ No changes needed - config matches Okta")
             return True
 
         # Apply changes
-        results = self.apply_changes(changes)
+        results = self.apply_changes(changes, results_file=results_file, resume=resume)
 
         # Print summary
         print("\n" + "="*80)
@@ -451,11 +561,17 @@ class RiskRuleApplier:
         print(f"  Deleted: {len(results['delete'])}")
         print(f"Successful: {results['summary']['success']}")
         print(f"Errors: {results['summary']['errors']}")
+        if results['summary']['skipped']:
+            print(f"Skipped (already done): {results['summary']['skipped']}")
+        if results_file and not self.dry_run:
+            print(f"Results stream: {results_file}")
+        if changes["conflicts"]:
+            print(f"Conflicts: {len(changes['conflicts'])} duplicate rule names in Okta (not applied)")
         if self.dry_run:
             print("\n⚠️  DRY RUN MODE - No changes were made to Okta")
         print("="*80)
 
-        return results['summary']['errors'] == 0
+        return results['summary']['errors'] == 0 and not changes["conflicts"]
 
 
 def main():
@@ -492,6 +608,16 @@ def main():
         action="store_true",
         help="Delete risk rules that exist in Okta but not in config (default: false)"
     )
+    parser.add_argument(
+        "--results-file",
+        default="risk_rule_results.ndjson",
+        help="NDJSON file that receives one line per applied operation"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip operations that already succeeded according to --results-file"
+    )
 
     args = parser.parse_args()
 
@@ -506,7 +632,8 @@ def main():
         dry_run=args.dry_run
     )
 
-    success = applier.run(args.config, delete_removed=args.delete_removed)
+    success = applier.run(args.config, delete_removed=args.delete_removed,
+                          results_file=args.results_file, resume=args.resume)
     sys.exit(0 if success else 1)
 
 
@@ -11,24 +11,77 @@ Cleans up and refactors Terraformer-generated Terraform files:
 
 Usage:
   python3 cleanup_terraform.py --input generated/okta --output cleaned
+  python3 cleanup_terraform.py --input generated/okta --output cleaned --import-format blocks --import-shards 4
+  python3 cleanup_terraform.py --input generated/okta --output cleaned --jobs 32
+  python3 cleanup_terraform.py --input generated/okta --output cleaned --incremental
 """
 
 import argparse
+import hashlib
 import re
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
+
+from hcl_parser import HclSyntaxError, parse_file
+from terraform_import_blocks import IMPORT_FORMATS, remove_import_blocks, write_import_blocks
+
+
+# A resource reference: <type>.<name>, not part of a longer dotted or hyphenated token.
+# Tokens after a '.' are never matched, so data.okta_group.tfer--x and
+# module.m.okta_group.tfer--x are left alone. The old per-name re.sub did rewrite
+# them, but only resource block labels are renamed: a data source keeps its
+# tfer-- label, and the rewrite left its references dangling.
+REFERENCE_PATTERN = re.compile(r'(?<![\w.-])[A-Za-z_][\w-]*\.[A-Za-z_][\w-]*')
+
+# A resource block header; only used for files the HCL parser rejects
+RESOURCE_HEADER_PATTERN = re.compile(r'resource\s+"([^"]+)"\s+"([^"]+)"')
+
+# Reference-shaped tokens that never name a resource
+NON_RESOURCE_PREFIXES = {'var', 'local', 'each', 'count', 'data', 'module', 'path', 'self', 'terraform'}
+
+# Incremental runs: input hashes and per-file contributions, kept in the output dir
+MANIFEST_FILE = '.cleanup_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _file_hash(path: Path) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write content unless the file already holds exactly that; returns True if written"""
+    if path.exists():
+        with open(path, 'r') as f:
+            if f.read() == content:
+                return False
+    with open(path, 'w') as f:
+        f.write(content)
+    return True
 
 
 class TerraformCleaner:
     """Cleans and refactors Terraformer-generated Terraform files"""
     
-    def __init__(self, input_dir: str, output_dir: str):
+    def __init__(self, input_dir: str, output_dir: str, import_format: str = "script", import_shards: int = 1,
+                 jobs: int = 1, incremental: bool = False):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
+        self.jobs = jobs
+        self.incremental = incremental
+        self.import_format = import_format
+        self.import_shards = import_shards
         self.variables: Dict[str, Set[str]] = {}
         self.resource_mapping: Dict[str, str] = {}
+        # Input file -> cleaned content with references updated (see clean_all)
+        self.cleaned_files: Dict[Path, str] = {}
+        # Files whose cleaned content was (re)computed this run
+        self.rendered_files: Set[Path] = set()
+        # Manifest entry per input file, saved for incremental runs
+        self.manifest_files: Dict[str, Dict] = {}
         
     def clean_resource_name(self, name: str) -> str:
         """Remove tfer-- prefix and sanitize name"""
@@ -107,31 +160,52 @@ class TerraformCleaner:
         """Clean a single Terraform file"""
         print(f"Cleaning: {file_path}")
         
-        with open(file_path, 'r') as f:
-            content = f.read()
+        content, mapping, vars_found = self.clean_file_content(file_path)
+        self.merge_clean_result(mapping, vars_found)
+        return content
+    
+    def clean_file_content(self, file_path: Path) -> tuple[str, Dict[str, str], Dict[str, str]]:
+        """
+        Clean a single Terraform file without touching shared state
+        
+        Returns: (cleaned content, resource mapping found, variables found)
+        """
+        mapping: Dict[str, str] = {}
         
         # Skip provider.tf files
         if file_path.name == 'provider.tf':
-            return content
-        
-        # Clean resource names
-        def replace_resource_name(match):
-            resource_type = match.group(1)
-            old_name = match.group(2)
-            new_name = self.clean_resource_name(old_name)
+            with open(file_path, 'r') as f:
+                return f.read(), mapping, {}
+        
+        try:
+            hcl = parse_file(file_path)
+        except HclSyntaxError as e:
+            # Don't abort the whole run over one file the parser rejects; rename
+            # its resources with the plain regex the parser replaced
+            print(f"⚠️  Could not parse {file_path} ({e}); falling back to regex renaming")
+            with open(file_path, 'r') as f:
+                content = f.read()
             
-            # Store mapping for cross-references
-            old_ref = f"{resource_type}.{old_name}"
-            new_ref = f"{resource_type}.{new_name}"
-            self.resource_mapping[old_ref] = new_ref
+            def rename(match):
+                new_name = self._map_resource_name(match.group(1), match.group(2), mapping)
+                return f'resource "{match.group(1)}" "{new_name}"'
             
-            return f'resource "{resource_type}" "{new_name}"'
-        
-        content = re.sub(
-            r'resource\s+"([^"]+)"\s+"([^"]+)"',
-            replace_resource_name,
-            content
-        )
+            content = RESOURCE_HEADER_PATTERN.sub(rename, content)
+        else:
+            # Clean resource names: only the name label of real resource blocks is
+            # rewritten, never look-alike text inside strings, heredocs or comments
+            pieces = []
+            last = 0
+            for block in hcl.resources():
+                resource_type, old_name = block.labels
+                new_name = self._map_resource_name(resource_type, old_name, mapping)
+                
+                start, end = block.label_spans[1]
+                pieces.append(hcl.source[last:start])
+                pieces.append(f'"{new_name}"'.encode("utf-8"))
+                last = end
+            pieces.append(hcl.source[last:])
+            content = b"".join(pieces).decode("utf-8")
         
         # Remove null values and empty blocks
         content = self.remove_null_values(content)
@@ -141,22 +215,212 @@ class TerraformCleaner:
         
         # Extract variables
         content, vars_found = self.extract_variables(content)
+        
+        return content, mapping, vars_found
+    
+    def _map_resource_name(self, resource_type: str, old_name: str, mapping: Dict[str, str]) -> str:
+        """Cleaned name of a resource, recording old -> new reference in mapping"""
+        new_name = self.clean_resource_name(old_name)
+        
+        # Store mapping for cross-references
+        mapping[f"{resource_type}.{old_name}"] = f"{resource_type}.{new_name}"
+        return new_name
+    
+    def merge_clean_result(self, mapping: Dict[str, str], vars_found: Dict[str, str]):
+        """Add one file's resource mapping and variables to the shared collections"""
+        self.resource_mapping.update(mapping)
         for var_name, var_value in vars_found.items():
             if var_name not in self.variables:
                 self.variables[var_name] = set()
             self.variables[var_name].add(var_value)
-        
-        return content
     
     def update_references(self, content: str) -> str:
         """Update resource references to use cleaned names"""
-        for old_ref, new_ref in self.resource_mapping.items():
-            # Match references like okta_group.tfer--00g123.id
-            pattern = re.escape(old_ref) + r'(\.\w+)?'
-            replacement = new_ref + r'\1'
-            content = re.sub(pattern, replacement, content)
+        if not self.resource_mapping:
+            return content
         
-        return content
+        # One pass per file: match every <type>.<name> token once and look it up,
+        # instead of one re.sub per mapping entry. A trailing attribute
+        # (okta_group.tfer--00g123.id) is left in place.
+        mapping = self.resource_mapping
+        return REFERENCE_PATTERN.sub(lambda match: mapping.get(match.group(0), match.group(0)), content)
+    
+    def iter_input_files(self) -> List[Path]:
+        """All .tf files to clean, in a stable order (provider.tf is left out)"""
+        files = []
+        for resource_dir in sorted(self.input_dir.iterdir()):
+            if not resource_dir.is_dir():
+                continue
+            
+            for tf_file in sorted(resource_dir.glob('*.tf')):
+                if tf_file.name == 'provider.tf':
+                    continue
+                files.append(tf_file)
+        return files
+    
+    def _clean_files(self, files: List[Path]) -> List[tuple[str, Dict[str, str], Dict[str, str]]]:
+        """clean_file_content for each file, in order, using a process pool with --jobs"""
+        if self.jobs > 1 and len(files) > 1:
+            # Workers return their results; consuming them in input order keeps
+            # the output identical to a serial run
+            chunksize = max(1, len(files) // (self.jobs * 4))
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = []
+                for tf_file, result in zip(files, pool.map(_clean_file_content, files, chunksize=chunksize)):
+                    print(f"Cleaning: {tf_file}")
+                    results.append(result)
+                return results
+        
+        results = []
+        for tf_file in files:
+            print(f"Cleaning: {tf_file}")
+            results.append(self.clean_file_content(tf_file))
+        return results
+    
+    def clean_all(self) -> Dict[Path, str]:
+        """
+        Read and clean every input file once, keeping the result in memory.
+        
+        References are rewritten after all files are cleaned, since any file
+        can reference a resource renamed in another one.
+        """
+        print("\nCleaning Terraform files...")
+        files = self.iter_input_files()
+        for tf_file, (content, mapping, vars_found) in zip(files, self._clean_files(files)):
+            self.merge_clean_result(mapping, vars_found)
+            self.cleaned_files[tf_file] = content
+            self._record_manifest_entry(tf_file, mapping, vars_found, content)
+        self.rendered_files = set(files)
+        
+        print("\nUpdating resource references...")
+        for tf_file, content in self.cleaned_files.items():
+            self.cleaned_files[tf_file] = self.update_references(content)
+        
+        return self.cleaned_files
+    
+    def _manifest_key(self, tf_file: Path) -> str:
+        return f"{tf_file.parent.name}/{tf_file.name}"
+    
+    def _output_path(self, tf_file: Path) -> Path:
+        return self.output_dir / tf_file.parent.name / tf_file.name
+    
+    def _record_manifest_entry(self, tf_file: Path, mapping: Dict[str, str], vars_found: Dict[str, str],
+                               content: str, file_hash: Optional[str] = None):
+        """Remember what a file contributed, and which resources it references, for the next run"""
+        if file_hash is None:
+            file_hash = _file_hash(tf_file)
+        references = sorted({
+            ref for ref in REFERENCE_PATTERN.findall(content)
+            if ref.split('.', 1)[0] not in NON_RESOURCE_PREFIXES
+        })
+        self.manifest_files[self._manifest_key(tf_file)] = {
+            'hash': file_hash,
+            'mapping': mapping,
+            'variables': vars_found,
+            'references': references,
+            'output': str(self._output_path(tf_file).relative_to(self.output_dir))
+        }
+    
+    def load_manifest(self) -> Dict:
+        """Load the manifest written by the previous run (empty if missing or from another version)"""
+        manifest_file = self.output_dir / MANIFEST_FILE
+        if not manifest_file.exists():
+            return {}
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Ignoring unreadable manifest {manifest_file}: {e}")
+            return {}
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('input_dir') != str(self.input_dir):
+            return {}
+        return manifest
+    
+    def save_manifest(self):
+        with open(self.output_dir / MANIFEST_FILE, 'w') as f:
+            json.dump({
+                'version': MANIFEST_VERSION,
+                'input_dir': str(self.input_dir),
+                'resource_mapping': self.resource_mapping,
+                'files': self.manifest_files
+            }, f, indent=2)
+    
+    def clean_incremental(self, manifest: Dict) -> Dict[Path, str]:
+        """
+        Like clean_all, but reuse the previous run's output for unchanged inputs.
+        
+        A file is cleaned again only if its content hash changed, or if it
+        references a resource whose cleaned name changed in the global mapping.
+        Every other file's mapping and variables come from the manifest and its
+        cleaned content is read back from the previous output.
+        """
+        print("\nCleaning Terraform files (incremental)...")
+        previous_files = manifest.get('files', {})
+        files = self.iter_input_files()
+        hashes = {tf_file: _file_hash(tf_file) for tf_file in files}
+        changed = [
+            tf_file for tf_file in files
+            if previous_files.get(self._manifest_key(tf_file), {}).get('hash') != hashes[tf_file]
+            or not self._output_path(tf_file).exists()
+        ]
+        results = dict(zip(changed, self._clean_files(changed)))
+        
+        # Rebuild the shared collections in input order, as a full run would
+        for tf_file in files:
+            if tf_file in results:
+                content, mapping, vars_found = results[tf_file]
+                self._record_manifest_entry(tf_file, mapping, vars_found, content, hashes[tf_file])
+            else:
+                entry = previous_files[self._manifest_key(tf_file)]
+                self.manifest_files[self._manifest_key(tf_file)] = entry
+                mapping, vars_found = entry['mapping'], entry['variables']
+            self.merge_clean_result(mapping, vars_found)
+        
+        # Unchanged files that reference a renamed, added or removed resource need new references
+        previous_mapping = manifest.get('resource_mapping', {})
+        changed_refs = {
+            ref for ref in set(previous_mapping) | set(self.resource_mapping)
+            if previous_mapping.get(ref) != self.resource_mapping.get(ref)
+        }
+        affected = [
+            tf_file for tf_file in files
+            if tf_file not in results
+            and changed_refs.intersection(self.manifest_files[self._manifest_key(tf_file)]['references'])
+        ]
+        results.update(zip(affected, self._clean_files(affected)))
+        
+        print("\nUpdating resource references...")
+        for tf_file in files:
+            if tf_file in results:
+                self.cleaned_files[tf_file] = self.update_references(results[tf_file][0])
+            else:
+                with open(self._output_path(tf_file), 'r') as f:
+                    self.cleaned_files[tf_file] = f.read()
+        self.rendered_files = set(results)
+        
+        # Outputs of inputs that no longer exist
+        current = {self._manifest_key(tf_file) for tf_file in files}
+        for key, entry in previous_files.items():
+            if key not in current:
+                stale = self.output_dir / entry['output']
+                if stale.exists():
+                    stale.unlink()
+                    print(f"Removed: {stale}")
+        
+        print(f"\n{len(changed)} changed, {len(affected)} re-referenced, "
+              f"{len(files) - len(results)} unchanged of {len(files)} files")
+        return self.cleaned_files
+    
+    def write_cleaned_files(self):
+        """Write each cleaned file to the same <resource_type>/<file> layout as the input"""
+        for tf_file, content in self.cleaned_files.items():
+            if tf_file not in self.rendered_files:
+                continue
+            output_subdir = self.output_dir / tf_file.parent.name
+            output_subdir.mkdir(parents=True, exist_ok=True)
+            
+            with open(output_subdir / tf_file.name, 'w') as f:
+                f.write(content)
     
     def generate_variables_file(self) -> str:
         """Generate variables.tf content"""
@@ -178,6 +442,9 @@ class TerraformCleaner:
         """Organize cleaned files by resource type"""
         print("\nOrganizing files by resource type...")
         
+        if not self.cleaned_files:
+            self.clean_all()
+        
         # Map resource types to logical groupings
         resource_groups = {
             'identity': ['okta_user', 'okta_group', 'okta_group_rule'],
@@ -202,19 +469,18 @@ class TerraformCleaner:
                 if not resource_dir.exists():
                     continue
                 
-                for tf_file in resource_dir.glob('*.tf'):
+                for tf_file in sorted(resource_dir.glob('*.tf')):
                     if tf_file.name in ['provider.tf', 'outputs.tf', 'variables.tf']:
                         continue
                     
-                    cleaned = self.clean_terraform_file(tf_file)
+                    cleaned = self.cleaned_files[tf_file]
                     combined_content += f"\n# From {tf_file.name}\n"
                     combined_content += cleaned + "\n"
             
             if combined_content:
                 output_file = group_dir / f"{group_name}.tf"
-                with open(output_file, 'w') as f:
-                    f.write(combined_content)
-                print(f"Created: {output_file}")
+                if _write_if_changed(output_file, combined_content):
+                    print(f"Created: {output_file}")
     
     def generate_module_structure(self):
         """Generate a module structure for the imported resources"""
@@ -263,19 +529,12 @@ module "policies" {
 }
 """
         
-        with open(self.output_dir / 'main.tf', 'w') as f:
-            f.write(main_content)
-        
-        print(f"Created: {self.output_dir / 'main.tf'}")
+        if _write_if_changed(self.output_dir / 'main.tf', main_content):
+            print(f"Created: {self.output_dir / 'main.tf'}")
     
-    def create_import_statements(self):
-        """Generate terraform import commands for all resources"""
-        print("\nGenerating import commands...")
-        
-        import_script = "#!/bin/bash\n"
-        import_script += "# Generated import commands\n\n"
-        import_script += "set -e\n\n"
-        
+    def collect_imports(self) -> List[tuple[str, str]]:
+        """Collect (resource address, ID) pairs from Terraformer state files"""
+        imports = []
         for resource_dir in self.input_dir.iterdir():
             if not resource_dir.is_dir():
                 continue
@@ -296,14 +555,41 @@ module "policies" {
                     
                     if resource_id:
                         clean_name = self.clean_resource_name(resource_name)
-                        import_script += f'terraform import {resource_type}.{clean_name} {resource_id}\n'
+                        imports.append((f"{resource_type}.{clean_name}", resource_id))
         
+        return imports
+    
+    def create_import_statements(self):
+        """Generate terraform import commands (or import blocks) for all resources"""
+        imports = self.collect_imports()
         import_file = self.output_dir / 'import_commands.sh'
-        with open(import_file, 'w') as f:
-            f.write(import_script)
         
-        os.chmod(import_file, 0o755)
-        print(f"Created: {import_file}")
+        # Only one format's artifacts may remain, or a switch of --import-format
+        # leaves the other one around to import stale resources
+        if self.import_format == "blocks":
+            if import_file.exists():
+                import_file.unlink()
+                print(f"Removed: {import_file}")
+            print("\nGenerating import blocks...")
+            for path in write_import_blocks(imports, str(self.output_dir), shards=self.import_shards):
+                print(f"Created: {path}")
+            return
+        
+        for path in remove_import_blocks(str(self.output_dir)):
+            print(f"Removed: {path}")
+        
+        print("\nGenerating import commands...")
+        
+        import_script = "#!/bin/bash\n"
+        import_script += "# Generated import commands\n\n"
+        import_script += "set -e\n\n"
+        
+        for address, resource_id in imports:
+            import_script += f'terraform import {address} {resource_id}\n'
+        
+        if _write_if_changed(import_file, import_script):
+            os.chmod(import_file, 0o755)
+            print(f"Created: {import_file}")
     
     def run(self):
         """Execute the cleaning process"""
@@ -314,38 +600,13 @@ module "policies" {
         # Create output directory
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # First pass: clean all files and build resource mapping
-        print("\nCleaning Terraform files...")
-        for resource_dir in self.input_dir.iterdir():
-            if not resource_dir.is_dir():
-                continue
-            
-            for tf_file in resource_dir.glob('*.tf'):
-                if tf_file.name == 'provider.tf':
-                    continue
-                self.clean_terraform_file(tf_file)
-        
-        # Second pass: update references with cleaned names
-        print("\nUpdating resource references...")
-        for resource_dir in self.input_dir.iterdir():
-            if not resource_dir.is_dir():
-                continue
-            
-            for tf_file in resource_dir.glob('*.tf'):
-                if tf_file.name == 'provider.tf':
-                    continue
-                
-                with open(tf_file, 'r') as f:
-                    content = f.read()
-                
-                content = self.update_references(content)
-                
-                # Write to output directory
-                output_subdir = self.output_dir / resource_dir.name
-                output_subdir.mkdir(parents=True, exist_ok=True)
-                
-                with open(output_subdir / tf_file.name, 'w') as f:
-                    f.write(content)
+        # Read and clean each file once; both outputs below are written from this
+        manifest = self.load_manifest() if self.incremental else {}
+        if manifest:
+            self.clean_incremental(manifest)
+        else:
+            self.clean_all()
+        self.write_cleaned_files()
         
         # Organize by resource type
         self.organize_by_resource_type()
@@ -353,9 +614,8 @@ module "policies" {
         # Generate variables file
         print("\nGenerating variables.tf...")
         variables_content = self.generate_variables_file()
-        with open(self.output_dir / 'variables.tf', 'w') as f:
-            f.write(variables_content)
-        print(f"Created: {self.output_dir / 'variables.tf'}")
+        if _write_if_changed(self.output_dir / 'variables.tf', variables_content):
+            print(f"Created: {self.output_dir / 'variables.tf'}")
         
         # Generate module structure
         self.generate_module_structure()
@@ -366,6 +626,8 @@ module "policies" {
         # Generate summary
         self.generate_summary()
         
+        self.save_manifest()
+        
         print("\n" + "=" * 50)
         print("✓ Cleaning completed successfully!")
         print("=" * 50)
@@ -432,6 +694,8 @@ Files organized by resource type in logical groupings:
    ```bash
    ./import_commands.sh
    ```
+   With `--import-format blocks`, run `terraform plan` and `terraform apply`
+   instead; the `imports*.tf` files import everything in one run.
 
 5. **Refine Further**
    - Add locals for repeated values
@@ -446,16 +710,18 @@ Total resources renamed: """ + str(len(self.resource_mapping)) + """
 See `resource_mapping.json` for complete mapping of old to new names.
 """
         
-        with open(summary_file, 'w') as f:
-            f.write(content)
+        if _write_if_changed(summary_file, content):
+            print(f"Created: {summary_file}")
         
         # Save resource mapping as JSON
         mapping_file = self.output_dir / 'resource_mapping.json'
-        with open(mapping_file, 'w') as f:
-            json.dump(self.resource_mapping, f, indent=2)
-        
-        print(f"Created: {summary_file}")
-        print(f"Created: {mapping_file}")
+        if _write_if_changed(mapping_file, json.dumps(self.resource_mapping, indent=2)):
+            print(f"Created: {mapping_file}")
+
+
+def _clean_file_content(file_path: Path) -> tuple[str, Dict[str, str], Dict[str, str]]:
+    """Process pool entry point for TerraformCleaner.clean_file_content"""
+    return TerraformCleaner('.', '.').clean_file_content(file_path)
 
 
 def main():
@@ -473,9 +739,36 @@ def main():
         help='Output directory for cleaned files'
     )
     
+    parser.add_argument(
+        '--import-format',
+        choices=IMPORT_FORMATS,
+        default='script',
+        help='script: import_commands.sh with terraform import commands (default); '
+             'blocks: Terraform 1.5+ import blocks applied in one terraform run'
+    )
+    parser.add_argument(
+        '--import-shards',
+        type=int,
+        default=1,
+        help='Split import blocks across N files (with --import-format blocks)'
+    )
+    
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help=f'Only clean inputs that changed since the last run (uses {MANIFEST_FILE} in the output dir)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Clean files in N parallel processes (default: 1; output is identical to a serial run)'
+    )
+    
     args = parser.parse_args()
     
-    cleaner = TerraformCleaner(args.input, args.output)
+    cleaner = TerraformCleaner(args.input, args.output, args.import_format, args.import_shards, args.jobs,
+                               args.incremental)
     cleaner.run()
 
 
@@ -55,6 +55,8 @@ import requests
 import argparse
 from typing import Dict, List, Optional
 
+from okta_client import OktaSession
+
 
 class SCIMConfigurator:
     """Configures SCIM provisioning for Okta applications"""
@@ -63,13 +65,7 @@ class SCIMConfigurator:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.api_base = f"{self.base_url}/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
         self.dry_run = dry_run
 
     def get_app_details(self, app_id: str) -> Optional[Dict]:
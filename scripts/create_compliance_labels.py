@@ -50,16 +50,7 @@ def create_compliance_label_with_values(manager: OktaAPIManager) -> Optional[Dic
 
     try:
         print("Creating Compliance label with values: SOX, GDPR, PII...")
-        response = requests.post(
-            url,
-            headers={
-                "Authorization": f"SSWS {manager.api_token}",
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            },
-            json=payload
-        )
-        response.raise_for_status()
+        response = manager._make_request("POST", url, json=payload)
         result = response.json()
         print(f"✅ Created Compliance label!")
         print(f"   Label ID: {result.get('labelId')}")
@@ -116,16 +107,7 @@ def apply_sox_label_to_apps(manager: OktaAPIManager, label_value_id: str, app_id
 
     try:
         print(f"\nApplying SOX label to {len(app_ids)} applications...")
-        response = requests.put(
-            url,
-            headers={
-                "Authorization": f"SSWS {manager.api_token}",
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            },
-            json=payload
-        )
-        response.raise_for_status()
+        response = manager._make_request("PUT", url, json=payload)
         print("✅ Successfully applied SOX label to applications:")
         for app_id in app_ids:
             print(f"   - {app_id}")
@@ -163,16 +145,7 @@ def apply_label_to_group(manager: OktaAPIManager, label_value_id: str, group_id:
 
     try:
         print(f"\nApplying {value_name} label to group {group_id}...")
-        response = requests.put(
-            url,
-            headers={
-                "Authorization": f"SSWS {manager.api_token}",
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            },
-            json=payload
-        )
-        response.raise_for_status()
+        response = manager._make_request("PUT", url, json=payload)
         print(f"✅ Successfully applied {value_name} label to group")
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -208,16 +181,7 @@ def apply_label_to_entitlement_bundle(manager: OktaAPIManager, label_value_id: s
 
     try:
         print(f"\nApplying {value_name} label to entitlement bundle {bundle_id}...")
-        response = requests.put(
-            url,
-            headers={
-                "Authorization": f"SSWS {manager.api_token}",
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            },
-            json=payload
-        )
-        response.raise_for_status()
+        response = manager._make_request("PUT", url, json=payload)
         print(f"✅ Successfully applied {value_name} label to entitlement bundle")
         return response.json()
     except requests.exceptions.HTTPError as e:
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+evaluate_risk_rules.py
+
+Evaluates risk rules (SOD policies) offline against a snapshot of principal
+entitlements, without calling Okta. Use it to see who a proposed rule in
+config/risk_rules.json would flag before applying it.
+
+This script:
+1. Reads risk rules (conflictCriteria) from config/risk_rules.json
+2. Reads a principal entitlements snapshot
+3. Compiles every rule into bitsets over the principals (one bit per principal)
+4. Reports the principals violating each rule
+
+Snapshot format (JSON, or NDJSON with one principal per line):
+    {
+      "principals": [
+        {
+          "id": "00u1abcd...",
+          "name": "jane.doe@example.com",          # optional
+          "entitlements": [
+            {"id": "esp12pvbc9GsRkvu31d7", "values": [{"id": "ent12pve87e6OIyjW1d7"}]}
+          ]
+        }
+      ]
+    }
+
+The entitlements use the same {"id", "values": [{"id"}]} shape as the
+conflictCriteria value lists. A criterion entry without values matches any
+value of that entitlement.
+
+Usage:
+    python3 scripts/evaluate_risk_rules.py --snapshot principal_entitlements.json
+    python3 scripts/evaluate_risk_rules.py --rules config/risk_rules.json \\
+        --snapshot principal_entitlements.ndjson --output sod_violations.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+from typing import Dict, Iterator, List, Set
+
+
+# Criteria operations supported by Okta risk rules
+CONTAINS_ONE = "CONTAINS_ONE"
+CONTAINS_ALL = "CONTAINS_ALL"
+
+
+def _entitlement_token(entitlement_id: str) -> str:
+    return f"entitlement:{entitlement_id}"
+
+
+def _value_token(value_id: str) -> str:
+    return f"value:{value_id}"
+
+
+def _criterion_tokens(criterion: Dict) -> List[str]:
+    """Grant tokens referenced by one criterion's ENTITLEMENTS value list"""
+    tokens = []
+    for entitlement in (criterion.get("value") or {}).get("value", []):
+        values = entitlement.get("values") or []
+        if values:
+            tokens.extend(_value_token(v.get("id")) for v in values if v.get("id"))
+        elif entitlement.get("id"):
+            tokens.append(_entitlement_token(entitlement["id"]))
+    return tokens
+
+
+def _iter_criteria(node: Dict) -> Iterator[Dict]:
+    """Yield every leaf criterion of a conflictCriteria tree"""
+    for key in ("and", "or"):
+        for child in node.get(key, []):
+            yield from _iter_criteria(child)
+    if "operation" in node:
+        yield node
+
+
+class SodViolationEngine:
+    """Evaluates risk rule conflict criteria against principal entitlements using bitsets"""
+
+    def __init__(self):
+        self.rules: List[Dict] = []
+        self.principals: List[Dict] = []
+        # Grant token -> bitset of principals holding it (bit i = self.principals[i])
+        self.masks: Dict[str, int] = {}
+        self.all_principals = 0
+
+    def load_rules(self, rules_file: str) -> List[Dict]:
+        """Load risk rules from a risk_rules.json config file"""
+        print(f"Loading risk rules from {rules_file}...")
+        with open(rules_file, 'r') as f:
+            config = json.load(f)
+
+        self.rules = [rule for rule in config.get("rules", []) if rule.get("conflictCriteria")]
+        print(f"  ✅ Loaded {len(self.rules)} risk rules with conflict criteria")
+        return self.rules
+
+    def referenced_tokens(self) -> Set[str]:
+        """All grant tokens used by any loaded rule"""
+        tokens = set()
+        for rule in self.rules:
+            for criterion in _iter_criteria(rule["conflictCriteria"]):
+                tokens.update(_criterion_tokens(criterion))
+        return tokens
+
+    def _iter_snapshot(self, snapshot_file: str) -> Iterator[Dict]:
+        with open(snapshot_file, 'r') as f:
+            if snapshot_file.endswith((".ndjson", ".jsonl")):
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                data = json.load(f)
+                yield from (data.get("principals", []) if isinstance(data, dict) else data)
+
+    def load_snapshot(self, snapshot_file: str) -> int:
+        """
+        Stream the principal entitlements snapshot and build one bitset per grant token.
+
+        Only tokens referenced by the loaded rules are indexed, so memory grows
+        with principals x referenced entitlements, not the whole catalog.
+
+        Returns: Number of principals loaded
+        """
+        print(f"Loading principal entitlements from {snapshot_file}...")
+        wanted = self.referenced_tokens()
+        holders: Dict[str, List[int]] = {token: [] for token in wanted}
+
+        self.principals = []
+        for principal in self._iter_snapshot(snapshot_file):
+            index = len(self.principals)
+            self.principals.append({"id": principal.get("id"), "name": principal.get("name")})
+
+            for entitlement in principal.get("entitlements", []):
+                token = _entitlement_token(entitlement.get("id"))
+                if token in holders:
+                    holders[token].append(index)
+                for value in entitlement.get("values", []):
+                    value_id = value.get("id") if isinstance(value, dict) else value
+                    token = _value_token(value_id)
+                    if token in holders:
+                        holders[token].append(index)
+
+        # Set bits in a byte buffer once per token; shifting ints bit by bit is quadratic
+        size = (len(self.principals) + 7) // 8
+        self.masks = {}
+        for token, indexes in holders.items():
+            buffer = bytearray(size)
+            for index in indexes:
+                buffer[index >> 3] |= 1 << (index & 7)
+            self.masks[token] = int.from_bytes(buffer, "little")
+        self.all_principals = (1 << len(self.principals)) - 1
+
+        print(f"  ✅ Loaded {len(self.principals)} principals, indexed {len(wanted)} referenced grants")
+        return len(self.principals)
+
+    def _criterion_mask(self, criterion: Dict) -> int:
+        tokens = _criterion_tokens(criterion)
+        if not tokens:
+            return 0
+
+        operation = criterion.get("operation", CONTAINS_ONE)
+        if operation == CONTAINS_ALL:
+            mask = self.all_principals
+            for token in tokens:
+                mask &= self.masks.get(token, 0)
+            return mask
+
+        mask = 0
+        for token in tokens:
+            mask |= self.masks.get(token, 0)
+        return mask
+
+    def compile(self, node: Dict) -> int:
+        """Reduce a conflictCriteria tree to the bitset of principals that match it"""
+        if "and" in node:
+            mask = self.all_principals
+            for child in node["and"]:
+                mask &= self.compile(child)
+                if not mask:
+                    break
+            return mask
+        if "or" in node:
+            mask = 0
+            for child in node["or"]:
+                mask |= self.compile(child)
+            return mask
+        return self._criterion_mask(node)
+
+    def _members(self, mask: int) -> List[Dict]:
+        members = []
+        while mask:
+            lowest = mask & -mask
+            members.append(self.principals[lowest.bit_length() - 1])
+            mask ^= lowest
+        return members
+
+    def evaluate(self) -> List[Dict]:
+        """Evaluate every loaded rule; returns one result per rule with its violating principals"""
+        results = []
+        for rule in self.rules:
+            violators = self._members(self.compile(rule["conflictCriteria"]))
+            results.append({
+                "name": rule.get("name"),
+                "id": (rule.get("_metadata") or {}).get("id"),
+                "resources": [r.get("resourceOrn") for r in rule.get("resources", [])],
+                "violation_count": len(violators),
+                "violations": violators
+            })
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate risk rules offline against a principal entitlements snapshot"
+    )
+    parser.add_argument(
+        "--rules",
+        default="config/risk_rules.json",
+        help="Risk rules config file"
+    )
+    parser.add_argument(
+        "--snapshot",
+        required=True,
+        help="Principal entitlements snapshot (.json or .ndjson)"
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the violation report to this JSON file"
+    )
+
+    args = parser.parse_args()
+
+    for path in (args.rules, args.snapshot):
+        if not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            sys.exit(1)
+
+    engine = SodViolationEngine()
+    engine.load_rules(args.rules)
+    engine.load_snapshot(args.snapshot)
+    results = engine.evaluate()
+
+    print("\n" + "="*80)
+    print("SOD VIOLATIONS")
+    print("="*80)
+    for result in results:
+        emoji = "❌" if result["violation_count"] else "✅"
+        print(f"  {emoji} {result['name']}: {result['violation_count']} violating principal(s)")
+        for principal in result["violations"][:5]:
+            print(f"       - {principal.get('name') or principal.get('id')}")
+        if result["violation_count"] > 5:
+            print(f"       ... and {result['violation_count'] - 5} more")
+
+    total = sum(result["violation_count"] for result in results)
+    print(f"\nRules evaluated: {len(results)}")
+    print(f"Principals evaluated: {len(engine.principals)}")
+    print(f"Total violations: {total}")
+    print("="*80)
+
+    if args.output:
+        report = {
+            "evaluated_at": datetime.utcnow().isoformat() + "Z",
+            "rules_file": args.rules,
+            "snapshot_file": args.snapshot,
+            "principals_evaluated": len(engine.principals),
+            "rules": results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
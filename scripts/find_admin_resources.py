@@ -17,6 +17,8 @@ import argparse
 from typing import List, Dict, Tuple
 from pathlib import Path
 
+from hcl_parser import HclSyntaxError, parse_file
+
 
 class AdminResourceFinder:
     """Find and categorize admin-related resources in Terraform configs"""
@@ -31,18 +33,15 @@ class AdminResourceFinder:
         admin_resources = []
 
         for tf_file in self.config_dir.glob('*.tf'):
-            with open(tf_file, 'r') as f:
-                content = f.read()
+            try:
+                hcl = parse_file(tf_file)
+            except HclSyntaxError as e:
+                print(f"⚠️  Skipping {tf_file}: {e}")
+                continue
 
             # Find resource blocks
-            resource_pattern = re.compile(
-                r'resource\s+"([^"]+)"\s+"([^"]+)"\s*{',
-                re.MULTILINE
-            )
-
-            for match in resource_pattern.finditer(content):
-                resource_type = match.group(1)
-                resource_name = match.group(2)
+            for block in hcl.resources():
+                resource_type, resource_name = block.labels
 
                 # Check if name contains "admin"
                 if self.admin_pattern.match(resource_name):
@@ -9,9 +9,12 @@ Usage:
 import os
 import sys
 import argparse
-import requests
 from urllib.parse import quote
 
+import requests
+
+from okta_client import OktaSession
+
 def find_entitlement_value(app_id, search_term):
     """Find an entitlement value by searching app entitlements."""
 
@@ -30,25 +33,18 @@ def find_entitlement_value(app_id, search_term):
 
     url = f'https://{org_name}.{base_url}/governance/api/v1/entitlements?filter={encoded_filter}&limit=200'
 
-    headers = {
-        'Authorization': f'SSWS {token}',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
+    session = OktaSession(token)
 
     print(f"Searching entitlements for app: {app_id}")
     print(f"Search term: {search_term}\n")
 
-    response = requests.get(url, headers=headers)
-
-    if response.status_code != 200:
-        print(f"Error: {response.status_code}")
-        print(response.text)
+    try:
+        entitlements = list(session.paginate(url))
+    except requests.exceptions.HTTPError as e:
+        print(f"Error: {e.response.status_code}")
+        print(e.response.text)
         return None
 
-    data = response.json()
-    entitlements = data.get('data', [])
-
     print(f"Found {len(entitlements)} entitlements for this app\n")
 
     results = []
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+hcl_parser.py
+
+Streaming HCL lexer and block parser shared by the Terraform-processing
+scripts (cleanup_terraform.py, protect_admin_users.py, find_admin_resources.py).
+
+Unlike regex scanning or brace counting, the lexer understands quoted strings
+(including ${...} interpolation with nested braces and quotes), heredocs and
+comments, so braces or `resource "x" "y"` text inside them are not mistaken
+for structure.
+
+Features:
+- Tokens and blocks carry byte offsets into the file, so callers can slice or
+  splice the original text without reformatting it
+- Blocks expose their labels, attributes (raw expression text plus the value
+  of simple literals) and nested blocks
+- parse_file() caches each parsed file keyed by mtime/size, falling back to a
+  content hash, so a file is parsed once per process however many callers use it
+
+Usage:
+    from hcl_parser import parse_file
+
+    for block in parse_file("users.tf").resources("okta_user"):
+        print(block.labels[1], block.string("login"), block.start, block.end)
+"""
+
+import os
+import re
+import json
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class HclSyntaxError(ValueError):
+    """Raised when a file cannot be parsed as HCL"""
+
+    def __init__(self, message: str, source: bytes, offset: int, path: Optional[str] = None):
+        line = source.count(b"\n", 0, offset) + 1
+        super().__init__(f"{path or '<string>'}:{line}: {message}")
+        self.line = line
+        self.offset = offset
+
+
+# Token kinds
+IDENT = "ident"
+STRING = "string"
+HEREDOC = "heredoc"
+NUMBER = "number"
+PUNCT = "punct"
+NEWLINE = "newline"
+
+_TOKEN = re.compile(rb"""
+    (?P<space>[ \t\r]+)
+  | (?P<newline>\n)
+  | (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+  | (?P<heredoc><<-?(?P<marker>[A-Za-z_][\w-]*)[ \t]*\r?\n)
+  | (?P<string>")
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_][\w-]*)
+  | (?P<punct>==|!=|<=|>=|&&|\|\||=>|\.\.\.|[{}\[\]()=,.:?+\-*/%<>!])
+""", re.VERBOSE | re.DOTALL)
+
+# Characters that need attention inside a quoted string
+_STRING_SPECIAL = re.compile(rb'["\\$%\n]')
+# Characters that need attention inside a ${...} / %{...} template expression
+_TEMPLATE_SPECIAL = re.compile(rb'["{}]')
+
+
+class Token:
+    """One lexical token: kind and [start, end) byte offsets"""
+
+    __slots__ = ("kind", "start", "end")
+
+    def __init__(self, kind: str, start: int, end: int):
+        self.kind = kind
+        self.start = start
+        self.end = end
+
+    def text(self, source: bytes) -> str:
+        return source[self.start:self.end].decode("utf-8")
+
+
+def _scan_template(source: bytes, pos: int, path: Optional[str]) -> int:
+    """Offset just past the '}' closing a template expression that starts at pos"""
+    depth = 1
+    while True:
+        match = _TEMPLATE_SPECIAL.search(source, pos)
+        if not match:
+            raise HclSyntaxError("unterminated template expression", source, pos, path)
+        char = match.group()
+        if char == b'"':
+            pos = _scan_string(source, match.start(), path)
+        elif char == b"{":
+            depth += 1
+            pos = match.end()
+        else:
+            depth -= 1
+            pos = match.end()
+            if depth == 0:
+                return pos
+
+
+def _scan_string(source: bytes, start: int, path: Optional[str]) -> int:
+    """Offset just past the closing quote of the string starting at start"""
+    pos = start + 1
+    while True:
+        match = _STRING_SPECIAL.search(source, pos)
+        if not match or match.group() == b"\n":
+            raise HclSyntaxError("unterminated string", source, start, path)
+        char = match.group()
+        pos = match.end()
+        if char == b'"':
+            return pos
+        if char == b"\\":
+            pos += 1
+        elif source[pos:pos + 1] == b"{":
+            # ${...} or %{...}; $${ and %%{ are escapes for a literal ${ / %{
+            if source[match.start() - 1:match.start()] != char:
+                pos = _scan_template(source, pos + 1, path)
+
+
+def tokenize(source: bytes, path: Optional[str] = None) -> Iterator[Token]:
+    """Yield tokens lazily; whitespace and comments are skipped, newlines are kept"""
+    pos = 0
+    length = len(source)
+    while pos < length:
+        match = _TOKEN.match(source, pos)
+        if not match:
+            raise HclSyntaxError(f"unexpected character {source[pos:pos + 1]!r}", source, pos, path)
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            pos = match.end()
+        elif kind == "string":
+            end = _scan_string(source, pos, path)
+            yield Token(STRING, pos, end)
+            pos = end
+        elif kind == "heredoc":
+            marker = re.escape(match.group("marker"))
+            terminator = re.compile(rb"^[ \t]*" + marker + rb"[ \t]*\r?$", re.MULTILINE)
+            closing = terminator.search(source, match.end())
+            if not closing:
+                raise HclSyntaxError("unterminated heredoc", source, pos, path)
+            yield Token(HEREDOC, pos, closing.end())
+            pos = closing.end()
+        else:
+            yield Token(kind, pos, match.end())
+            pos = match.end()
+
+
+def _literal(source: bytes, tokens: List[Token]) -> Tuple[bool, Any]:
+    """(True, value) if the expression is a single literal, else (False, None)"""
+    if len(tokens) == 2 and tokens[0].kind == PUNCT and source[tokens[0].start:tokens[0].end] == b"-" \
+            and tokens[1].kind == NUMBER:
+        ok, value = _literal(source, tokens[1:])
+        return ok, -value
+    if len(tokens) != 1:
+        return False, None
+    token = tokens[0]
+    text = token.text(source)
+    if token.kind == STRING:
+        if re.search(r"(?<![$%])[$%]\{", text):
+            return False, None
+        try:
+            value = json.loads(text)
+        except ValueError:
+            value = text[1:-1]
+        return True, value.replace("$${", "${").replace("%%{", "%{")
+    if token.kind == NUMBER:
+        return True, float(text) if any(c in text for c in ".eE") else int(text)
+    if token.kind == IDENT and text in ("true", "false", "null"):
+        return True, {"true": True, "false": False, "null": None}[text]
+    return False, None
+
+
+class Attribute:
+    """An `name = expression` attribute; offsets span the whole attribute"""
+
+    __slots__ = ("name", "start", "end", "expr_start", "expr_end", "raw", "is_literal", "value")
+
+    def __init__(self, name: str, start: int, end: int, expr_start: int, expr_end: int,
+                 raw: str, is_literal: bool, value: Any):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.expr_start = expr_start
+        self.expr_end = expr_end
+        self.raw = raw
+        self.is_literal = is_literal
+        self.value = value
+
+
+class Block:
+    """A `type "label" ... { ... }` block; offsets span from the type keyword to the closing brace"""
+
+    __slots__ = ("type", "labels", "label_spans", "start", "end", "attributes", "blocks", "source")
+
+    def __init__(self, block_type: str, labels: List[str], label_spans: List[Tuple[int, int]],
+                 start: int, source: bytes):
+        self.type = block_type
+        self.labels = labels
+        self.label_spans = label_spans
+        self.start = start
+        self.end = start
+        self.attributes: Dict[str, Attribute] = {}
+        self.blocks: List["Block"] = []
+        self.source = source
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start:self.end].decode("utf-8")
+
+    @property
+    def address(self) -> str:
+        """<type>.<name> for resource blocks, data.<type>.<name> for data blocks"""
+        return ".".join(self.labels) if self.type == "resource" else ".".join([self.type] + self.labels)
+
+    def string(self, name: str) -> Optional[str]:
+        """Value of a literal string attribute, or None"""
+        attribute = self.attributes.get(name)
+        if attribute is None or not attribute.is_literal or not isinstance(attribute.value, str):
+            return None
+        return attribute.value
+
+    def blocks_of_type(self, block_type: str) -> List["Block"]:
+        return [block for block in self.blocks if block.type == block_type]
+
+
+class HclFile:
+    """Top-level attributes and blocks of one parsed file"""
+
+    __slots__ = ("path", "source", "attributes", "blocks")
+
+    def __init__(self, path: Optional[str], source: bytes, attributes: Dict[str, Attribute], blocks: List[Block]):
+        self.path = path
+        self.source = source
+        self.attributes = attributes
+        self.blocks = blocks
+
+    @property
+    def text(self) -> str:
+        return self.source.decode("utf-8")
+
+    def resources(self, resource_type: Optional[str] = None) -> List[Block]:
+        """Resource blocks, optionally of one type, in file order"""
+        return [
+            block for block in self.blocks
+            if block.type == "resource" and len(block.labels) == 2
+            and (resource_type is None or block.labels[0] == resource_type)
+        ]
+
+
+class _Parser:
+    _OPENERS = {b"{": b"}", b"[": b"]", b"(": b")"}
+
+    def __init__(self, source: bytes, path: Optional[str]):
+        self.source = source
+        self.path = path
+        self.tokens = tokenize(source, path)
+        self.lookahead: Optional[Token] = None
+
+    def _peek(self) -> Optional[Token]:
+        if self.lookahead is None:
+            self.lookahead = next(self.tokens, None)
+        return self.lookahead
+
+    def _next(self) -> Optional[Token]:
+        token = self._peek()
+        self.lookahead = None
+        return token
+
+    def _is(self, token: Optional[Token], punct: bytes) -> bool:
+        return token is not None and token.kind == PUNCT and self.source[token.start:token.end] == punct
+
+    def _error(self, message: str, offset: int):
+        raise HclSyntaxError(message, self.source, offset, self.path)
+
+    def parse_body(self, block: Optional[Block]) -> Tuple[Dict[str, Attribute], List[Block]]:
+        """Parse attributes and blocks until the closing brace of block (or EOF at top level)"""
+        attributes: Dict[str, Attribute] = {}
+        blocks: List[Block] = []
+        while True:
+            token = self._next()
+            while token is not None and token.kind == NEWLINE:
+                token = self._next()
+            if token is None:
+                if block is not None:
+                    self._error(f"unclosed block '{block.type}'", block.start)
+                return attributes, blocks
+            if self._is(token, b"}"):
+                if block is None:
+                    self._error("unexpected '}'", token.start)
+                block.end = token.end
+                return attributes, blocks
+            if token.kind != IDENT:
+                self._error("expected an attribute or block", token.start)
+
+            name = token.text(self.source)
+            if self._is(self._peek(), b"="):
+                self._next()
+                attributes[name] = self._parse_attribute(name, token.start)
+            else:
+                blocks.append(self._parse_block(name, token.start))
+
+    def _parse_attribute(self, name: str, start: int) -> Attribute:
+        expression: List[Token] = []
+        closers: List[bytes] = []
+        while True:
+            token = self._peek()
+            if token is None:
+                break
+            if not closers and (token.kind == NEWLINE or self._is(token, b"}")):
+                break
+            self._next()
+            if token.kind == NEWLINE:
+                continue
+            if token.kind == PUNCT:
+                punct = self.source[token.start:token.end]
+                if punct in self._OPENERS:
+                    closers.append(self._OPENERS[punct])
+                elif closers and punct == closers[-1]:
+                    closers.pop()
+            expression.append(token)
+        if not expression:
+            self._error(f"missing value for '{name}'", start)
+        if closers:
+            self._error(f"unbalanced brackets in '{name}'", start)
+        expr_start, expr_end = expression[0].start, expression[-1].end
+        is_literal, value = _literal(self.source, expression)
+        return Attribute(name, start, expr_end, expr_start, expr_end,
+                         self.source[expr_start:expr_end].decode("utf-8"), is_literal, value)
+
+    def _parse_block(self, block_type: str, start: int) -> Block:
+        labels: List[str] = []
+        spans: List[Tuple[int, int]] = []
+        while True:
+            token = self._next()
+            if token is None:
+                self._error(f"unclosed block '{block_type}'", start)
+            if self._is(token, b"{"):
+                break
+            if token.kind == STRING:
+                ok, value = _literal(self.source, [token])
+                labels.append(value if ok else token.text(self.source)[1:-1])
+            elif token.kind == IDENT:
+                labels.append(token.text(self.source))
+            else:
+                self._error(f"unexpected token in '{block_type}' block header", token.start)
+            spans.append((token.start, token.end))
+
+        block = Block(block_type, labels, spans, start, self.source)
+        block.attributes, block.blocks = self.parse_body(block)
+        return block
+
+
+def parse(source: bytes, path: Optional[str] = None) -> HclFile:
+    """Parse HCL source bytes"""
+    parser = _Parser(source, path)
+    attributes, blocks = parser.parse_body(None)
+    return HclFile(path, source, attributes, blocks)
+
+
+# path -> ((mtime_ns, size), sha256, parsed file)
+_parse_cache: Dict[str, Tuple[Tuple[int, int], str, HclFile]] = {}
+
+
+def parse_file(path) -> HclFile:
+    """
+    Parse a file, reusing the previous parse while it is unchanged.
+
+    The cache is keyed by mtime and size; if those changed but the content
+    hash did not (e.g. the file was touched or rewritten identically), the
+    earlier parse is still reused. Parsed files are shared: do not mutate them.
+    """
+    path = os.fspath(path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _parse_cache.get(path)
+    if cached and cached[0] == key:
+        return cached[2]
+
+    with open(path, "rb") as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    if cached and cached[1] == digest:
+        _parse_cache[path] = (key, digest, cached[2])
+        return cached[2]
+
+    parsed = parse(source, path)
+    _parse_cache[path] = (key, digest, parsed)
+    return parsed
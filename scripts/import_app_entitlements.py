@@ -20,35 +20,27 @@ import requests
 from urllib.parse import quote
 from typing import List, Dict
 
-def fetch_all_apps(org_name: str, base_url: str, token: str) -> List[Dict]:
+from okta_client import OktaSession, fan_out
+
+def fetch_all_apps(session: OktaSession, org_name: str, base_url: str) -> List[Dict]:
     """Fetch all applications from Okta."""
 
     url = f'https://{org_name}.{base_url}/api/v1/apps'
-    headers = {
-        'Authorization': f'SSWS {token}',
-        'Accept': 'application/json'
-    }
 
     print("Fetching all applications...")
     apps = []
 
-    while url:
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            print(f"Error fetching apps: {response.status_code}")
-            print(response.text)
-            break
-
-        apps.extend(response.json())
-
-        # Check for pagination
-        links = response.links
-        url = links.get('next', {}).get('url') if links else None
+    try:
+        for app in session.paginate(url, {'limit': 200}):
+            apps.append(app)
+    except requests.exceptions.HTTPError as e:
+        print(f"Error fetching apps: {e.response.status_code}")
+        print(e.response.text)
 
     print(f"  Found {len(apps)} applications")
     return apps
 
-def fetch_entitlements_for_app(app_id: str, org_name: str, base_url: str, token: str) -> List[Dict]:
+def fetch_entitlements_for_app(session: OktaSession, app_id: str, org_name: str, base_url: str) -> List[Dict]:
     """Fetch all entitlements for a specific app."""
 
     filter_query = f'parent.externalId eq "{app_id}" AND parent.type eq "APPLICATION"'
@@ -56,20 +48,11 @@ def fetch_entitlements_for_app(app_id: str, org_name: str, base_url: str, token:
 
     url = f'https://{org_name}.{base_url}/governance/api/v1/entitlements?filter={encoded_filter}&limit=200'
 
-    headers = {
-        'Authorization': f'SSWS {token}',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
-
-    response = requests.get(url, headers=headers)
-
-    if response.status_code != 200:
+    try:
+        return list(session.paginate(url))
+    except requests.exceptions.HTTPError:
         return []
 
-    data = response.json()
-    return data.get('data', [])
-
 def main():
     parser = argparse.ArgumentParser(
         description='Import all entitlements from all applications'
@@ -91,20 +74,34 @@ def main():
         print("  OKTA_ORG_NAME, OKTA_BASE_URL, OKTA_API_TOKEN")
         sys.exit(1)
 
+    session = OktaSession(token)
+
     # Fetch all apps
-    apps = fetch_all_apps(org_name, base_url, token)
+    apps = fetch_all_apps(session, org_name, base_url)
 
     # For each app, fetch entitlements
     all_app_entitlements = []
 
-    for app in apps:
+    # Entitlement lookups run concurrently; results come back in app order
+    entitlements_url = f'https://{org_name}.{base_url}/governance/api/v1/entitlements'
+    results = fan_out(
+        lambda app: fetch_entitlements_for_app(session, app.get('id'), org_name, base_url),
+        apps, session=session, url=entitlements_url
+    )
+
+    for result in results:
+        app = result.item
         app_id = app.get('id')
         app_name = app.get('label')
         app_status = app.get('status')
 
         print(f"\nProcessing: {app_name} ({app_id}) - Status: {app_status}")
 
-        entitlements = fetch_entitlements_for_app(app_id, org_name, base_url, token)
+        if result.error:
+            print(f"  Error fetching entitlements: {result.error}")
+            continue
+
+        entitlements = result.result
 
         if entitlements:
             print(f"  Found {len(entitlements)} entitlements")
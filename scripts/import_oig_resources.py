@@ -11,6 +11,10 @@ This script:
 
 Usage:
     python3 scripts/import_oig_resources.py --output-dir imported_oig
+    python3 scripts/import_oig_resources.py --output-dir imported_oig --cache-file .oig_import_cache.json
+    python3 scripts/import_oig_resources.py --output-dir imported_oig --import-format blocks --import-shards 4
+    python3 scripts/import_oig_resources.py --output-dir imported_oig --incremental
+    python3 scripts/import_oig_resources.py --output-dir imported_oig --resources-per-file 500
 
 Environment variables required:
     OKTA_ORG_NAME - Your Okta org name
@@ -19,27 +23,168 @@ Environment variables required:
 """
 
 import argparse
+import hashlib
 import json
 import os
 import sys
 import requests
 from typing import List, Dict, Optional
 import re
+from datetime import datetime
+
+from okta_client import OktaSession, fan_out
+from terraform_import_blocks import IMPORT_FORMATS, parse_import_command, write_import_blocks
+
+
+DEFAULT_CACHE_FILE = ".oig_import_cache.json"
+DEFAULT_STATE_FILE = ".oig_import_state.json"
+CHANGES_REPORT_FILE = "changed_resources.json"
+
+
+def content_hash(resource) -> str:
+    """Stable SHA-256 of a resource's API representation"""
+    return hashlib.sha256(
+        json.dumps(resource, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def _resource_key(resource: Dict) -> Optional[str]:
+    return resource.get("id") or resource.get("bundleId")
+
+
+class ImportCache:
+    """
+    JSON cache of API lookups that is reused across import runs.
+
+    Entries live in named sections and are keyed by resource ID. Each entry
+    records the resource's lastUpdated value and is only reused while it
+    still matches, so a changed resource is always looked up again.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.sections: Dict[str, Dict[str, Dict]] = {}
+        self.hits = 0
+
+    def load(self):
+        """Load the cache file (a missing or unreadable file starts an empty cache)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.sections = json.load(f).get("sections", {})
+            print(f"  ℹ️  Loaded import cache: {self.path}")
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️  Ignoring unreadable import cache {self.path}: {e}")
+            self.sections = {}
+
+    def get(self, section: str, key: str, last_updated: Optional[str]) -> Optional[Dict]:
+        """Cached entry for key, or None if missing or recorded for another lastUpdated"""
+        entry = self.sections.get(section, {}).get(key)
+        if entry is None or entry.get("lastUpdated") != last_updated:
+            return None
+        self.hits += 1
+        return entry
+
+    def value(self, section: str, key: str) -> Optional[Dict]:
+        """Cached entry for key regardless of lastUpdated"""
+        return self.sections.get(section, {}).get(key)
+
+    def put(self, section: str, key: str, last_updated: Optional[str], **values):
+        self.sections.setdefault(section, {})[key] = {"lastUpdated": last_updated, **values}
+
+    def discard(self, section: str, key: str):
+        self.sections.get(section, {}).pop(key, None)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump({
+                "saved_at": datetime.utcnow().isoformat() + "Z",
+                "sections": self.sections
+            }, f, indent=2, sort_keys=True)
+
+
+class TerraformWriter:
+    """
+    Streams generated Terraform straight to disk instead of building it in memory.
+
+    Generators call header() once, begin_resource() before each resource and
+    line() for every line. Output goes to <name>.tf, or with shard set to
+    <name>_<shard>.tf (e.g. entitlements_003.tf) so that one shard can be
+    rewritten without touching the others. Every file starts with the
+    header. No file is created until the first resource is written.
+    """
+
+    def __init__(self, output_dir: str, name: str, shard: Optional[int] = None):
+        self.output_dir = output_dir
+        self.name = name
+        self.shard = shard
+        self.paths: List[str] = []
+        self.resource_count = 0
+        self._header: List[str] = []
+        self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def file_name(self) -> str:
+        if self.shard is None:
+            return f"{self.name}.tf"
+        return f"{self.name}_{self.shard:03d}.tf"
+
+    def existing_files(self) -> List[str]:
+        """Files a previous run may have written for this name (unsharded or sharded)"""
+        pattern = re.compile(rf'^{re.escape(self.name)}(_\d{{3,}})?\.tf$')
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(os.path.join(self.output_dir, f) for f in os.listdir(self.output_dir) if pattern.match(f))
+
+    def header(self, lines: List[str]):
+        """Lines written at the top of every file"""
+        self._header = list(lines)
+
+    def begin_resource(self):
+        if self._file is None:
+            self._open()
+        self.resource_count += 1
+
+    def line(self, text: str = ""):
+        if self._file is None:
+            self._open()
+        self._file.write(text + "\n")
+
+    def _open(self):
+        if self.shard is None:
+            # Replace the output of a previous run, whatever its sharding
+            for stale in self.existing_files():
+                os.remove(stale)
+        path = os.path.join(self.output_dir, self.file_name())
+        self._file = open(path, 'w')
+        self.paths.append(path)
+        for header_line in self._header:
+            self._file.write(header_line + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
 
 class OIGImporter:
     """Import existing OIG resources from Okta"""
 
-    def __init__(self, org_name: str, base_url: str, api_token: str):
+    def __init__(self, org_name: str, base_url: str, api_token: str, cache_file: Optional[str] = None):
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
+        self.cache_file = cache_file
+        self.cache = ImportCache(cache_file)
 
     def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
         """Make API request with error handling"""
@@ -66,8 +211,8 @@ class OIGImporter:
             sanitized = f"resource_{sanitized}"
         return sanitized or "unnamed"
 
-    def fetch_entitlements(self) -> List[Dict]:
-        """Fetch all entitlement bundles from Okta"""
+    def fetch_entitlements(self) -> Optional[List[Dict]]:
+        """Fetch all entitlement bundles from Okta (None if they could not be listed)"""
         print("Fetching entitlement bundles...")
         try:
             # Use the correct entitlement-bundles endpoint with full entitlements included
@@ -76,32 +221,66 @@ class OIGImporter:
                 "limit": 200,
                 "include": "full_entitlements"  # Include entitlement details in response
             }
-            response = self._make_request("GET", url, params=params)
-
-            # Handle both dict and list responses
-            data = response.json()
-            if isinstance(data, list):
-                bundles = data
-            elif isinstance(data, dict):
-                bundles = data.get("data", data.get("entitlements", []))
-            else:
-                bundles = []
+            # Follow every page (handles both dict and list responses)
+            bundles = list(self.session.paginate(url, params))
 
             print(f"  Found {len(bundles)} entitlement bundles")
             return bundles
         except Exception as e:
             print(f"  ⚠️  Could not fetch entitlement bundles: {e}")
-            return []
+            return None
 
-    def validate_bundle_readable(self, bundle_id: str) -> bool:
-        """Test if a bundle can be individually retrieved (not all listed bundles are readable)"""
-        try:
-            # Correct endpoint: entitlement-bundles (not entitlements)
-            url = f"{self.base_url}/governance/api/v1/entitlement-bundles/{bundle_id}"
-            response = self._make_request("GET", url)
-            return response.status_code == 200
-        except Exception:
-            return False
+    def _bundle_status(self, bundle_id: str) -> int:
+        """HTTP status of GET /entitlement-bundles/{id} (raises on connection errors)"""
+        # Correct endpoint: entitlement-bundles (not entitlements)
+        url = f"{self.base_url}/governance/api/v1/entitlement-bundles/{bundle_id}"
+        return self.session.get(url).status_code
+
+    def prefetch_bundle_readability(self, bundles: List[Dict]) -> Dict[str, bool]:
+        """
+        Validate that bundles can be individually retrieved, concurrently.
+
+        Some bundles are listed but return 404 when accessed individually.
+        404s are remembered in the import cache (keyed by the bundle's
+        lastUpdated) and not requested again on later runs; bundles without
+        a lastUpdated are always checked. Other failures count as unreadable
+        for this run only.
+
+        Returns: Bundle ID -> readable
+        """
+        candidates = [
+            bundle for bundle in bundles
+            if not (":apps:" in bundle.get("orn", "") and bundle.get("bundleType", "MANUAL") != "MANUAL")
+        ]
+        readable = {}
+        to_check = []
+        for bundle in candidates:
+            bundle_id = bundle.get("id") or bundle.get("bundleId")
+            if bundle.get("lastUpdated") and \
+                    self.cache.get("unreadable_bundles", bundle_id, bundle.get("lastUpdated")):
+                readable[bundle_id] = False
+            else:
+                to_check.append(bundle)
+
+        print(f"Validating {len(to_check)} entitlement bundles "
+              f"({len(readable)} known unreadable from cache)...")
+
+        bundles_url = f"{self.base_url}/governance/api/v1/entitlement-bundles/{{id}}"
+        for result in fan_out(
+            lambda bundle: self._bundle_status(bundle.get("id") or bundle.get("bundleId")),
+            to_check, session=self.session, url=bundles_url
+        ):
+            bundle_id = result.item.get("id") or result.item.get("bundleId")
+            readable[bundle_id] = result.ok and result.result == 200
+            if result.ok and result.result == 404 and result.item.get("lastUpdated"):
+                # Without lastUpdated a cached 404 could never expire
+                self.cache.put("unreadable_bundles", bundle_id, result.item.get("lastUpdated"), status=404)
+            elif result.ok and result.result == 200:
+                self.cache.discard("unreadable_bundles", bundle_id)
+
+        unreadable = sum(1 for ok in readable.values() if not ok)
+        print(f"  ✅ {len(readable) - unreadable} readable, {unreadable} unreadable")
+        return readable
 
     def fetch_entitlements_for_resource(self, resource_id: str, resource_type: str = "APPLICATION") -> List[Dict]:
         """Fetch individual entitlements for a specific resource (app/group/etc)"""
@@ -113,70 +292,142 @@ class OIGImporter:
                 "filter": filter_expr,
                 "limit": 200
             }
-            response = self._make_request("GET", url, params=params)
-            entitlements = response.json().get("data", [])
-            return entitlements
+            return list(self.session.paginate(url, params))
         except Exception as e:
             print(f"  ⚠️  Could not fetch entitlements for resource {resource_id}: {e}")
             return []
 
-    def fetch_reviews(self) -> List[Dict]:
-        """Fetch all access review campaigns"""
+    def fetch_reviews(self) -> Optional[List[Dict]]:
+        """Fetch all access review campaigns (None if they could not be listed)"""
         print("Fetching access review campaigns...")
         try:
             url = f"{self.base_url}/governance/api/v1/reviews"
             params = {"limit": 200}
-            response = self._make_request("GET", url, params=params)
-            reviews = response.json().get("data", [])
+            reviews = list(self.session.paginate(url, params))
             print(f"  Found {len(reviews)} review campaigns")
             return reviews
         except Exception as e:
             print(f"  ⚠️  Could not fetch reviews: {e}")
-            return []
+            return None
+
+    def _fetch_resource_request_sequences(self, resource_id: str) -> List[Dict]:
+        """All request sequences attached to one resource ([] if it has none)"""
+        url = f"{self.base_url}/governance/api/v2/resources/{resource_id}/request-sequences"
+        try:
+            return list(self.session.paginate(url, {"limit": 200}))
+        except requests.exceptions.HTTPError as e:
+            # Expected for bundles without sequences
+            if e.response is not None and e.response.status_code == 404:
+                return []
+            raise
+
+    def _fetch_request_sequence(self, resource_id: str, sequence_id: str) -> Dict:
+        """One request sequence attached to a resource"""
+        url = f"{self.base_url}/governance/api/v2/resources/{resource_id}/request-sequences/{sequence_id}"
+        return self._make_request("GET", url).json()
 
-    def fetch_request_sequences(self, entitlement_bundles: List[Dict]) -> List[Dict]:
+    def fetch_request_sequences(self, entitlement_bundles: Optional[List[Dict]]) -> Optional[List[Dict]]:
         """
         Fetch all approval workflows (request sequences).
 
         Note: API v2 requires request sequences to be fetched per-resource.
-        We iterate through entitlement bundles and collect unique sequences.
+        Every entitlement bundle is queried concurrently and sequences are
+        deduplicated by ID as results arrive. Which sequences a bundle uses
+        is cached by the bundle's lastUpdated; for unchanged bundles only the
+        bodies of those sequences are fetched again (once per sequence), since
+        editing a sequence does not change its bundles' lastUpdated.
+
+        Returns None if the bundles or any bundle's sequences could not be
+        read, since a partial list would look like deleted sequences.
 
         API: GET /governance/api/v2/resources/{resourceId}/request-sequences
+             GET /governance/api/v2/resources/{resourceId}/request-sequences/{requestSequenceId}
         """
         print("Fetching approval workflows (request sequences)...")
-        all_sequences = {}  # Use dict to deduplicate by ID
 
+        if entitlement_bundles is None:
+            print("  ⚠️  Entitlement bundles unavailable; cannot query sequences")
+            return None
         if not entitlement_bundles:
             print("  ℹ️  No entitlement bundles to query for sequences")
             return []
 
-        # Sample a few bundles to find sequences (most bundles share sequences)
-        sample_size = min(5, len(entitlement_bundles))
-        print(f"  Sampling {sample_size} of {len(entitlement_bundles)} bundles for sequences...")
+        # Sequence bodies are never served from the cache
+        self.cache.sections.pop("sequences", None)
 
-        for bundle in entitlement_bundles[:sample_size]:
+        all_sequences = {}  # Use dict to deduplicate by ID
+        sequence_ids_by_bundle = {}
+        bundles_by_sequence = {}
+        to_fetch = []
+        for bundle in entitlement_bundles:
             bundle_id = bundle.get("id") or bundle.get("bundleId")
             if not bundle_id:
                 continue
-
-            try:
-                # v2 API endpoint with resourceId
-                url = f"{self.base_url}/governance/api/v2/resources/{bundle_id}/request-sequences"
-                params = {"limit": 200}
-                response = self._make_request("GET", url, params=params)
-                sequences = response.json().get("data", [])
-
-                # Add to dict to deduplicate
-                for seq in sequences:
+            cached = self.cache.get("request_sequences", bundle_id, bundle.get("lastUpdated"))
+            if cached:
+                sequence_ids_by_bundle[bundle_id] = cached["sequence_ids"]
+                for seq_id in cached["sequence_ids"]:
+                    bundles_by_sequence.setdefault(seq_id, []).append(bundle)
+            else:
+                to_fetch.append(bundle)
+
+        if bundles_by_sequence:
+            print(f"  Refreshing {len(bundles_by_sequence)} workflows used by "
+                  f"{len(sequence_ids_by_bundle)} unchanged bundles...")
+            sequence_url = f"{self.base_url}/governance/api/v2/resources/{{id}}/request-sequences/{{id}}"
+            for result in fan_out(
+                lambda item: self._fetch_request_sequence(_resource_key(item[1][0]), item[0]),
+                bundles_by_sequence.items(), session=self.session, url=sequence_url
+            ):
+                seq_id, bundles = result.item
+                if result.ok:
+                    all_sequences[seq_id] = result.result
+                    continue
+                # Deleted or unreadable: list these bundles' sequences again
+                for bundle in bundles:
+                    bundle_id = _resource_key(bundle)
+                    if sequence_ids_by_bundle.pop(bundle_id, None) is not None:
+                        self.cache.discard("request_sequences", bundle_id)
+                        to_fetch.append(bundle)
+
+        print(f"  Querying {len(to_fetch)} of {len(entitlement_bundles)} bundles "
+              f"({len(sequence_ids_by_bundle)} unchanged)...")
+
+        failed = 0
+        progress_every = max(1, len(to_fetch) // 10)
+        sequences_url = f"{self.base_url}/governance/api/v2/resources/{{id}}/request-sequences"
+        for done, result in enumerate(fan_out(
+            lambda bundle: self._fetch_resource_request_sequences(bundle.get("id") or bundle.get("bundleId")),
+            to_fetch, session=self.session, url=sequences_url
+        ), 1):
+            bundle_id = result.item.get("id") or result.item.get("bundleId")
+            if not result.ok:
+                failed += 1
+            else:
+                seq_ids = []
+                for seq in result.result:
                     seq_id = seq.get("id")
-                    if seq_id and seq_id not in all_sequences:
-                        all_sequences[seq_id] = seq
-
-            except Exception as e:
-                # Expected for bundles without sequences - continue silently
-                continue
+                    if not seq_id:
+                        continue
+                    seq_ids.append(seq_id)
+                    all_sequences[seq_id] = seq
+                sequence_ids_by_bundle[bundle_id] = seq_ids
+                self.cache.put("request_sequences", bundle_id, result.item.get("lastUpdated"), sequence_ids=seq_ids)
+
+            if done % progress_every == 0 or done == len(to_fetch):
+                print(f"  [{done}/{len(to_fetch)}] bundles queried, {len(all_sequences)} unique workflows so far")
+
+        if failed:
+            print(f"  ⚠️  Could not query request sequences for {failed} bundles")
+            return None
 
-        sequences_list = list(all_sequences.values())
+        # Order by first appearance in the bundle list, whatever order results arrived in
+        ordered_ids = dict.fromkeys(
+            seq_id
+            for bundle in entitlement_bundles
+            for seq_id in sequence_ids_by_bundle.get(bundle.get("id") or bundle.get("bundleId"), [])
+        )
+        sequences_list = [all_sequences[seq_id] for seq_id in ordered_ids if seq_id in all_sequences]
         print(f"  Found {len(sequences_list)} unique approval workflows")
         return sequences_list
 
@@ -197,6 +448,9 @@ class OIGImporter:
         """
         Fetch organization-level request settings.
 
+        Returns {} if request settings are not configured (404) and None if
+        they could not be read.
+
         API: GET /governance/api/v2/request-settings (org-level)
         """
         print("Fetching organization request settings...")
@@ -207,34 +461,52 @@ class OIGImporter:
             settings = response.json()
             print(f"  ✅ Found organization request settings")
             return settings
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                print(f"  ℹ️  Request settings are not configured")
+                return {}
+            print(f"  ⚠️  Could not fetch request settings: {e}")
+            return None
         except Exception as e:
             print(f"  ⚠️  Could not fetch request settings: {e}")
-            print(f"  ℹ️  This may be expected if request settings are not configured")
             return None
 
-    def generate_entitlement_tf(self, bundles: List[Dict]) -> tuple[str, List[str]]:
-        """Generate Terraform config and import commands for entitlement bundles"""
+    def generate_entitlement_tf(self, bundles: List[Dict], out: "TerraformWriter",
+                                readable: Optional[Dict[str, bool]] = None) -> List[str]:
+        """
+        Write Terraform config for entitlement bundles to out; returns import commands
+
+        Args:
+            bundles: Entitlement bundles from fetch_entitlements()
+            out: Writer the configuration is streamed to
+            readable: Bundle ID -> readable, from prefetch_bundle_readability()
+                      (validated here when not given)
+        """
         if not bundles:
-            return "", []
+            return []
 
-        tf_config = []
         import_commands = []
 
-        tf_config.append("# =============================================================================")
-        tf_config.append("# OKTA IDENTITY GOVERNANCE - ENTITLEMENT BUNDLES")
-        tf_config.append("# =============================================================================")
-        tf_config.append("# Entitlement bundles define collections of access rights that can be assigned")
-        tf_config.append("# to users and groups. These bundles are managed via Terraform.")
-        tf_config.append("#")
-        tf_config.append("# IMPORTANT:")
-        tf_config.append("# - Entitlement BUNDLES (definitions) are managed here in Terraform")
-        tf_config.append("# - Entitlement ASSIGNMENTS (which users/groups have bundles) should be")
-        tf_config.append("#   managed in Okta Admin UI or via direct API calls, NOT in Terraform")
-        tf_config.append("#")
-        tf_config.append("# Resource: okta_entitlement_bundle")
-        tf_config.append("# Documentation: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/entitlement_bundle")
-        tf_config.append("# =============================================================================")
-        tf_config.append("")
+        out.header([
+            "# =============================================================================",
+            "# OKTA IDENTITY GOVERNANCE - ENTITLEMENT BUNDLES",
+            "# =============================================================================",
+            "# Entitlement bundles define collections of access rights that can be assigned",
+            "# to users and groups. These bundles are managed via Terraform.",
+            "#",
+            "# IMPORTANT:",
+            "# - Entitlement BUNDLES (definitions) are managed here in Terraform",
+            "# - Entitlement ASSIGNMENTS (which users/groups have bundles) should be",
+            "#   managed in Okta Admin UI or via direct API calls, NOT in Terraform",
+            "#",
+            "# Resource: okta_entitlement_bundle",
+            "# Documentation: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/entitlement_bundle",
+            "# =============================================================================",
+            "",
+        ])
+
+        if readable is None:
+            readable = self.prefetch_bundle_readability(bundles)
 
         for bundle in bundles:
             bundle_id = bundle.get("id") or bundle.get("bundleId")
@@ -248,9 +520,7 @@ class OIGImporter:
                 print(f"  Skipping app-managed bundle: {name}")
                 continue
 
-            # Validate bundle can be individually retrieved
-            # Some bundles are listed but return 404 when accessed individually
-            if not self.validate_bundle_readable(bundle_id):
+            if not readable.get(bundle_id):
                 print(f"  ⚠️  Skipping unreadable bundle (404): {name} (ID: {bundle_id})")
                 continue
 
@@ -265,41 +535,42 @@ class OIGImporter:
             entitlements = bundle.get("entitlements", [])
 
             print(f"  Generating resource for bundle: {name}")
+            out.begin_resource()
 
             # Add comment header
-            tf_config.append(f'# {"-" * 77}')
-            tf_config.append(f'# {name}')
+            out.line(f'# {"-" * 77}')
+            out.line(f'# {name}')
             if description:
-                tf_config.append(f'# {description}')
-            tf_config.append(f'# {"-" * 77}')
-            tf_config.append(f'')
+                out.line(f'# {description}')
+            out.line(f'# {"-" * 77}')
+            out.line(f'')
 
             # Generate okta_entitlement_bundle resource
-            tf_config.append(f'resource "okta_entitlement_bundle" "{safe_name}" {{')
-            tf_config.append(f'  name = "{name}"')
+            out.line(f'resource "okta_entitlement_bundle" "{safe_name}" {{')
+            out.line(f'  name = "{name}"')
 
             if description:
                 # Escape quotes in description
                 escaped_desc = description.replace('"', '\\"')
-                tf_config.append(f'  description = "{escaped_desc}"')
+                out.line(f'  description = "{escaped_desc}"')
 
             if orn:
-                tf_config.append(f'  target_resource_orn = "{orn}"')
+                out.line(f'  target_resource_orn = "{orn}"')
 
             if status:
-                tf_config.append(f'  status = "{status}"')
+                out.line(f'  status = "{status}"')
 
-            tf_config.append(f'')
+            out.line(f'')
 
             # Add target block
             if target_id and target_type:
-                tf_config.append(f'  target {{')
-                tf_config.append(f'    external_id = "{target_id}"')
-                tf_config.append(f'    type        = "{target_type}"')
+                out.line(f'  target {{')
+                out.line(f'    external_id = "{target_id}"')
+                out.line(f'    type        = "{target_type}"')
                 if target_name:
-                    tf_config.append(f'    # Resource name: {target_name}')
-                tf_config.append(f'  }}')
-                tf_config.append(f'')
+                    out.line(f'    # Resource name: {target_name}')
+                out.line(f'  }}')
+                out.line(f'')
 
             # Add entitlements blocks
             if entitlements:
@@ -308,41 +579,40 @@ class OIGImporter:
                     ent_values = entitlement.get("values", [])
 
                     if ent_id:
-                        tf_config.append(f'  entitlements {{')
-                        tf_config.append(f'    id = "{ent_id}"')
+                        out.line(f'  entitlements {{')
+                        out.line(f'    id = "{ent_id}"')
 
                         if ent_values:
                             for value in ent_values:
                                 value_id = value.get("id") or value.get("externalId")
                                 if value_id:
-                                    tf_config.append(f'    values {{')
-                                    tf_config.append(f'      id = "{value_id}"')
-                                    tf_config.append(f'    }}')
+                                    out.line(f'    values {{')
+                                    out.line(f'      id = "{value_id}"')
+                                    out.line(f'    }}')
 
-                        tf_config.append(f'  }}')
-                        tf_config.append(f'')
+                        out.line(f'  }}')
+                        out.line(f'')
 
-            tf_config.append(f'  # Bundle Type: {bundle_type}')
-            tf_config.append(f'  # ORN: {orn}')
-            tf_config.append(f'}}')
-            tf_config.append('')
+            out.line(f'  # Bundle Type: {bundle_type}')
+            out.line(f'  # ORN: {orn}')
+            out.line(f'}}')
+            out.line('')
 
             # Generate import command
             import_commands.append(f'# Import bundle: {name}')
             import_commands.append(f'terraform import okta_entitlement_bundle.{safe_name} {bundle_id}')
             import_commands.append('')
 
-        return "\n".join(tf_config), import_commands
+        return import_commands
 
-    def generate_reviews_tf(self, reviews: List[Dict]) -> tuple[str, List[str]]:
-        """Generate Terraform config and import commands for access reviews"""
+    def generate_reviews_tf(self, reviews: List[Dict], out: "TerraformWriter") -> List[str]:
+        """Write Terraform config for access reviews to out; returns import commands"""
         if not reviews:
-            return "", []
+            return []
 
-        tf_config = []
         import_commands = []
 
-        tf_config.append("# Access Review Campaigns\n")
+        out.header(["# Access Review Campaigns\n"])
 
         for idx, review in enumerate(reviews, 1):
             review_id = review.get("id")
@@ -358,53 +628,53 @@ class OIGImporter:
                 safe_name = f"review_{id_suffix}"
                 name = f"Review {id_suffix}"  # Placeholder display name
 
-            tf_config.append(f'resource "okta_reviews" "{safe_name}" {{')
-            tf_config.append(f'  # ID: {review_id}')
-            tf_config.append(f'  name        = "{name}"')
+            out.begin_resource()
+            out.line(f'resource "okta_reviews" "{safe_name}" {{')
+            out.line(f'  # ID: {review_id}')
+            out.line(f'  name        = "{name}"')
             if description:
-                tf_config.append(f'  description = "{description}"')
-            tf_config.append(f'')
-            tf_config.append(f'  # REQUIRED: Add schedule, scope, and reviewer configuration')
-            tf_config.append(f'  # This access review campaign will not run until you configure these required fields.')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example schedule configuration:')
-            tf_config.append(f'  # schedule {{')
-            tf_config.append(f'  #   frequency   = "QUARTERLY"    # Options: WEEKLY, MONTHLY, QUARTERLY')
-            tf_config.append(f'  #   day_of_week = "MONDAY"       # For WEEKLY: MONDAY-SUNDAY')
-            tf_config.append(f'  #   day_of_month = 1             # For MONTHLY: 1-31')
-            tf_config.append(f'  #   hour        = 9              # 24-hour format: 0-23')
-            tf_config.append(f'  #   timezone    = "America/Los_Angeles"')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example scope configuration (what to review):')
-            tf_config.append(f'  # scope {{')
-            tf_config.append(f'  #   resource_type = "ENTITLEMENT_BUNDLE"  # or "APPLICATION", "GROUP"')
-            tf_config.append(f'  #   resource_ids  = [okta_entitlement_bundle.example.id]')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example reviewer configuration:')
-            tf_config.append(f'  # reviewer {{')
-            tf_config.append(f'  #   type = "MANAGER"      # or "RESOURCE_OWNER", "SPECIFIC_USER"')
-            tf_config.append(f'  #   fallback_user_id = okta_user.reviewer.id  # If manager not found')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/reviews')
-            tf_config.append(f'}}')
-            tf_config.append('')
+                out.line(f'  description = "{description}"')
+            out.line(f'')
+            out.line(f'  # REQUIRED: Add schedule, scope, and reviewer configuration')
+            out.line(f'  # This access review campaign will not run until you configure these required fields.')
+            out.line(f'  #')
+            out.line(f'  # Example schedule configuration:')
+            out.line(f'  # schedule {{')
+            out.line(f'  #   frequency   = "QUARTERLY"    # Options: WEEKLY, MONTHLY, QUARTERLY')
+            out.line(f'  #   day_of_week = "MONDAY"       # For WEEKLY: MONDAY-SUNDAY')
+            out.line(f'  #   day_of_month = 1             # For MONTHLY: 1-31')
+            out.line(f'  #   hour        = 9              # 24-hour format: 0-23')
+            out.line(f'  #   timezone    = "America/Los_Angeles"')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # Example scope configuration (what to review):')
+            out.line(f'  # scope {{')
+            out.line(f'  #   resource_type = "ENTITLEMENT_BUNDLE"  # or "APPLICATION", "GROUP"')
+            out.line(f'  #   resource_ids  = [okta_entitlement_bundle.example.id]')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # Example reviewer configuration:')
+            out.line(f'  # reviewer {{')
+            out.line(f'  #   type = "MANAGER"      # or "RESOURCE_OWNER", "SPECIFIC_USER"')
+            out.line(f'  #   fallback_user_id = okta_user.reviewer.id  # If manager not found')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/reviews')
+            out.line(f'}}')
+            out.line('')
 
             import_commands.append(f'terraform import okta_reviews.{safe_name} {review_id}')
 
-        return "\n".join(tf_config), import_commands
+        return import_commands
 
-    def generate_request_sequences_tf(self, sequences: List[Dict]) -> tuple[str, List[str]]:
-        """Generate Terraform config and import commands for approval workflows"""
+    def generate_request_sequences_tf(self, sequences: List[Dict], out: "TerraformWriter") -> List[str]:
+        """Write Terraform config for approval workflows to out; returns import commands"""
         if not sequences:
-            return "", []
+            return []
 
-        tf_config = []
         import_commands = []
 
-        tf_config.append("# Approval Workflows (Request Sequences)\n")
+        out.header(["# Approval Workflows (Request Sequences)\n"])
 
         for seq in sequences:
             seq_id = seq.get("id")
@@ -412,54 +682,54 @@ class OIGImporter:
             description = seq.get("description", "")
             safe_name = self._sanitize_name(name)
 
-            tf_config.append(f'resource "okta_request_sequences" "{safe_name}" {{')
-            tf_config.append(f'  # ID: {seq_id}')
-            tf_config.append(f'  name        = "{name}"')
+            out.begin_resource()
+            out.line(f'resource "okta_request_sequences" "{safe_name}" {{')
+            out.line(f'  # ID: {seq_id}')
+            out.line(f'  name        = "{name}"')
             if description:
-                tf_config.append(f'  description = "{description}"')
-            tf_config.append(f'')
-            tf_config.append(f'  # REQUIRED: Add approval stages configuration')
-            tf_config.append(f'  # Approval workflows require at least one approval stage to function.')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example single-stage approval:')
-            tf_config.append(f'  # stage {{')
-            tf_config.append(f'  #   name          = "Manager Approval"')
-            tf_config.append(f'  #   type          = "MANAGER"         # or "SPECIFIC_USER", "RESOURCE_OWNER"')
-            tf_config.append(f'  #   approvers     = []                # Leave empty for MANAGER type')
-            tf_config.append(f'  #   timeout_hours = 48                # Hours before escalation')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example two-stage approval (manager → security team):')
-            tf_config.append(f'  # stage {{')
-            tf_config.append(f'  #   name          = "Manager Approval"')
-            tf_config.append(f'  #   type          = "MANAGER"')
-            tf_config.append(f'  #   approvers     = []')
-            tf_config.append(f'  #   timeout_hours = 48')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  # stage {{')
-            tf_config.append(f'  #   name          = "Security Team Approval"')
-            tf_config.append(f'  #   type          = "SPECIFIC_USER"')
-            tf_config.append(f'  #   approvers     = [okta_user.security_lead.id, okta_user.security_admin.id]')
-            tf_config.append(f'  #   timeout_hours = 72')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/request_sequences')
-            tf_config.append(f'}}')
-            tf_config.append('')
+                out.line(f'  description = "{description}"')
+            out.line(f'')
+            out.line(f'  # REQUIRED: Add approval stages configuration')
+            out.line(f'  # Approval workflows require at least one approval stage to function.')
+            out.line(f'  #')
+            out.line(f'  # Example single-stage approval:')
+            out.line(f'  # stage {{')
+            out.line(f'  #   name          = "Manager Approval"')
+            out.line(f'  #   type          = "MANAGER"         # or "SPECIFIC_USER", "RESOURCE_OWNER"')
+            out.line(f'  #   approvers     = []                # Leave empty for MANAGER type')
+            out.line(f'  #   timeout_hours = 48                # Hours before escalation')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # Example two-stage approval (manager → security team):')
+            out.line(f'  # stage {{')
+            out.line(f'  #   name          = "Manager Approval"')
+            out.line(f'  #   type          = "MANAGER"')
+            out.line(f'  #   approvers     = []')
+            out.line(f'  #   timeout_hours = 48')
+            out.line(f'  # }}')
+            out.line(f'  # stage {{')
+            out.line(f'  #   name          = "Security Team Approval"')
+            out.line(f'  #   type          = "SPECIFIC_USER"')
+            out.line(f'  #   approvers     = [okta_user.security_lead.id, okta_user.security_admin.id]')
+            out.line(f'  #   timeout_hours = 72')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/request_sequences')
+            out.line(f'}}')
+            out.line('')
 
             import_commands.append(f'terraform import okta_request_sequences.{safe_name} {seq_id}')
 
-        return "\n".join(tf_config), import_commands
+        return import_commands
 
-    def generate_catalog_entries_tf(self, entries: List[Dict]) -> tuple[str, List[str]]:
-        """Generate Terraform config and import commands for catalog entries"""
+    def generate_catalog_entries_tf(self, entries: List[Dict], out: "TerraformWriter") -> List[str]:
+        """Write Terraform config for catalog entries to out; returns import commands"""
         if not entries:
-            return "", []
+            return []
 
-        tf_config = []
         import_commands = []
 
-        tf_config.append("# Catalog Entries\n")
+        out.header(["# Catalog Entries\n"])
 
         for entry in entries:
             entry_id = entry.get("id")
@@ -467,67 +737,68 @@ class OIGImporter:
             name = entry.get("name", "unnamed")
             safe_name = self._sanitize_name(name)
 
-            tf_config.append(f'resource "okta_catalog_entry_default" "{safe_name}" {{')
-            tf_config.append(f'  # ID: {entry_id}')
-            tf_config.append(f'  app_id = "{app_id}"')
-            tf_config.append(f'')
-            tf_config.append(f'  # OPTIONAL: Review and add catalog configuration')
-            tf_config.append(f'  # Catalog entries control how resources appear in the access request catalog.')
-            tf_config.append(f'  # Default configuration is usually sufficient, but you can customize:')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # Example customization:')
-            tf_config.append(f'  # visibility           = "EVERYONE"       # or "SPECIFIC_GROUPS"')
-            tf_config.append(f'  # visible_to_groups    = [okta_group.marketing.id]')
-            tf_config.append(f'  # auto_grant           = false            # Require approval (default)')
-            tf_config.append(f'  # approval_workflow_id = okta_request_sequences.manager_approval.id')
-            tf_config.append(f'  # request_form_fields {{')
-            tf_config.append(f'  #   name     = "Business Justification"')
-            tf_config.append(f'  #   required = true')
-            tf_config.append(f'  #   type     = "TEXT"')
-            tf_config.append(f'  # }}')
-            tf_config.append(f'  #')
-            tf_config.append(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/catalog_entry_default')
-            tf_config.append(f'}}')
-            tf_config.append('')
+            out.begin_resource()
+            out.line(f'resource "okta_catalog_entry_default" "{safe_name}" {{')
+            out.line(f'  # ID: {entry_id}')
+            out.line(f'  app_id = "{app_id}"')
+            out.line(f'')
+            out.line(f'  # OPTIONAL: Review and add catalog configuration')
+            out.line(f'  # Catalog entries control how resources appear in the access request catalog.')
+            out.line(f'  # Default configuration is usually sufficient, but you can customize:')
+            out.line(f'  #')
+            out.line(f'  # Example customization:')
+            out.line(f'  # visibility           = "EVERYONE"       # or "SPECIFIC_GROUPS"')
+            out.line(f'  # visible_to_groups    = [okta_group.marketing.id]')
+            out.line(f'  # auto_grant           = false            # Require approval (default)')
+            out.line(f'  # approval_workflow_id = okta_request_sequences.manager_approval.id')
+            out.line(f'  # request_form_fields {{')
+            out.line(f'  #   name     = "Business Justification"')
+            out.line(f'  #   required = true')
+            out.line(f'  #   type     = "TEXT"')
+            out.line(f'  # }}')
+            out.line(f'  #')
+            out.line(f'  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/catalog_entry_default')
+            out.line(f'}}')
+            out.line('')
 
             import_commands.append(f'terraform import okta_catalog_entry_default.{safe_name} {entry_id}')
 
-        return "\n".join(tf_config), import_commands
+        return import_commands
 
-    def generate_request_settings_tf(self, settings: Optional[Dict]) -> tuple[str, List[str]]:
-        """Generate Terraform config and import commands for request settings"""
+    def generate_request_settings_tf(self, settings: Optional[Dict], out: "TerraformWriter") -> List[str]:
+        """Write Terraform config for request settings to out; returns import commands"""
         if not settings:
-            return "", []
+            return []
 
-        tf_config = []
         import_commands = []
 
-        tf_config.append("# Global Request Settings\n")
-        tf_config.append('resource "okta_request_settings" "settings" {')
-        tf_config.append('  # Global settings for access requests')
-        tf_config.append('')
-        tf_config.append('  # OPTIONAL: Add request settings configuration')
-        tf_config.append('  # Global settings that apply to all access requests in your org.')
-        tf_config.append('  # If not specified, Okta defaults will be used.')
-        tf_config.append('  #')
-        tf_config.append('  # Example configuration:')
-        tf_config.append('  # default_approval_workflow_id = okta_request_sequences.default.id')
-        tf_config.append('  # require_justification        = true')
-        tf_config.append('  # notification_settings {{')
-        tf_config.append('  #   notify_requester  = true  # Email requester on status changes')
-        tf_config.append('  #   notify_approver   = true  # Email approver when action needed')
-        tf_config.append('  #   notify_on_grant   = true  # Email when access granted')
-        tf_config.append('  #   notify_on_revoke  = true  # Email when access revoked')
-        tf_config.append('  # }}')
-        tf_config.append('  # request_expiry_days         = 90   # Auto-expire requests after 90 days')
-        tf_config.append('  #')
-        tf_config.append('  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/request_settings')
-        tf_config.append('}')
-        tf_config.append('')
+        out.header(["# Global Request Settings\n"])
+        out.begin_resource()
+        out.line('resource "okta_request_settings" "settings" {')
+        out.line('  # Global settings for access requests')
+        out.line('')
+        out.line('  # OPTIONAL: Add request settings configuration')
+        out.line('  # Global settings that apply to all access requests in your org.')
+        out.line('  # If not specified, Okta defaults will be used.')
+        out.line('  #')
+        out.line('  # Example configuration:')
+        out.line('  # default_approval_workflow_id = okta_request_sequences.default.id')
+        out.line('  # require_justification        = true')
+        out.line('  # notification_settings {{')
+        out.line('  #   notify_requester  = true  # Email requester on status changes')
+        out.line('  #   notify_approver   = true  # Email approver when action needed')
+        out.line('  #   notify_on_grant   = true  # Email when access granted')
+        out.line('  #   notify_on_revoke  = true  # Email when access revoked')
+        out.line('  # }}')
+        out.line('  # request_expiry_days         = 90   # Auto-expire requests after 90 days')
+        out.line('  #')
+        out.line('  # See: https://registry.terraform.io/providers/okta/okta/latest/docs/resources/request_settings')
+        out.line('}')
+        out.line('')
 
         import_commands.append('terraform import okta_request_settings.settings default')
 
-        return "\n".join(tf_config), import_commands
+        return import_commands
 
     def export_json(self, output_file: str, data: Dict):
         """Export raw API data to JSON for reference"""
@@ -535,8 +806,153 @@ class OIGImporter:
             json.dump(data, f, indent=2)
         print(f"  Exported JSON to: {output_file}")
 
-    def generate_import_files(self, output_dir: str):
-        """Generate all Terraform files and import commands"""
+    def load_import_state(self, state_file: str) -> Dict:
+        """Load the previous run's import state (content hashes per resource)"""
+        if not os.path.exists(state_file):
+            return {}
+        try:
+            with open(state_file, 'r') as f:
+                return json.load(f).get("categories", {})
+        except (OSError, ValueError) as e:
+            print(f"  ⚠️  Ignoring unreadable import state {state_file}: {e}")
+            return {}
+
+    def diff_resources(self, resources: List[Dict], previous: Dict) -> Dict[str, List[Dict]]:
+        """Compare resources against the hashes from the previous run"""
+        previous_hashes = previous.get("resources", {})
+        changes = {"added": [], "changed": [], "removed": []}
+        seen = set()
+        for resource in resources:
+            key = _resource_key(resource) or "default"
+            seen.add(key)
+            entry = {"id": key, "name": resource.get("name")}
+            if key not in previous_hashes:
+                changes["added"].append(entry)
+            elif previous_hashes[key] != content_hash(resource):
+                changes["changed"].append(entry)
+        changes["removed"] = [{"id": key} for key in previous_hashes if key not in seen]
+        return changes
+
+    def plan_shards(self, resources: List[Dict], previous: Dict, changes: Dict[str, List[Dict]],
+                    resources_per_file: int, incremental: bool) -> Dict[int, Dict]:
+        """
+        Assign resources to numbered shards of at most resources_per_file resources
+
+        Incremental runs keep every resource in the shard it was written to
+        last time and only mark shards holding added, changed or removed
+        resources as dirty; added resources fill up the last shard, then new
+        ones. Otherwise resources are packed in order and every shard is dirty.
+
+        Returns: Shard number -> {"keys": [...], "dirty": bool}
+        """
+        keys = [_resource_key(r) or "default" for r in resources]
+        previous_shards = previous.get("shards", {})
+        if not incremental or not previous_shards or previous.get("resources_per_file") != resources_per_file:
+            return {
+                number: {"keys": keys[start:start + resources_per_file], "dirty": True}
+                for number, start in enumerate(range(0, len(keys), resources_per_file), 1)
+            }
+
+        shard_of = {key: int(number) for number, shard in previous_shards.items() for key in shard["keys"]}
+        shards = {int(number): {"keys": [], "dirty": False} for number in previous_shards}
+        for entry in changes["changed"] + changes["removed"]:
+            if entry["id"] in shard_of:
+                shards[shard_of[entry["id"]]]["dirty"] = True
+
+        last = max(shards, default=0)
+        for key in keys:
+            if key not in shard_of:
+                if not last or len(shards[last]["keys"]) >= resources_per_file:
+                    last += 1
+                    shards[last] = {"keys": [], "dirty": True}
+                shard_of[key] = last
+                shards[last]["dirty"] = True
+            shards[shard_of[key]]["keys"].append(key)
+        return shards
+
+    def generate_sharded(self, resources: List[Dict], generate, output_dir: str, file_name: str,
+                         resources_per_file: int, previous: Dict, changes: Dict[str, List[Dict]],
+                         incremental: bool) -> Dict:
+        """
+        Write resources to <file_name>_NNN.tf shards, regenerating only dirty shards
+
+        Unchanged shards keep their file and the import commands recorded for
+        them in the previous state, so an incremental run only does work for
+        the shards that contain changed resources.
+
+        Returns: The category's shard state ({"shards": ..., "files": ...}) and the
+                 number of shards regenerated
+        """
+        shards = self.plan_shards(resources, previous, changes, resources_per_file, incremental)
+        previous_shards = previous.get("shards", {}) if incremental else {}
+        by_key = {_resource_key(r) or "default": r for r in resources}
+
+        shard_state = {}
+        regenerated = 0
+        for number in sorted(shards):
+            shard = shards[number]
+            prior = previous_shards.get(str(number))
+            if not shard["dirty"] and prior and \
+                    (not prior.get("file") or os.path.exists(os.path.join(output_dir, prior["file"]))):
+                shard_state[str(number)] = prior
+                continue
+
+            regenerated += 1
+            writer = TerraformWriter(output_dir, file_name, shard=number)
+            with writer:
+                imports = generate([by_key[key] for key in shard["keys"]], writer) if shard["keys"] else []
+            for path in writer.paths:
+                print(f"  Created: {path}")
+            if not writer.paths and os.path.exists(os.path.join(output_dir, writer.file_name())):
+                os.remove(os.path.join(output_dir, writer.file_name()))
+                print(f"  Removed: {os.path.join(output_dir, writer.file_name())}")
+            if shard["keys"]:
+                shard_state[str(number)] = {
+                    "keys": shard["keys"],
+                    "imports": imports,
+                    "file": writer.file_name() if writer.paths else None
+                }
+
+        # Drop files that belong to no shard (e.g. output of an unsharded or resharded run)
+        files = [shard["file"] for _, shard in sorted(shard_state.items(), key=lambda item: int(item[0]))
+                 if shard["file"]]
+        for stale in TerraformWriter(output_dir, file_name).existing_files():
+            if os.path.basename(stale) not in files:
+                os.remove(stale)
+                print(f"  Removed: {stale}")
+
+        print(f"  Regenerated {regenerated} of {len(shards)} shards")
+        return {"shards": shard_state, "files": files, "resources_per_file": resources_per_file,
+                "regenerated": regenerated}
+
+    def _category_imports(self, category_state: Dict) -> List[str]:
+        """Import commands recorded for a category, whether sharded or not"""
+        if category_state.get("shards"):
+            return [
+                command
+                for _, shard in sorted(category_state["shards"].items(), key=lambda item: int(item[0]))
+                for command in shard["imports"]
+            ]
+        return category_state.get("imports", [])
+
+    def generate_import_files(self, output_dir: str, import_format: str = "script", import_shards: int = 1,
+                              incremental: bool = False, state_file: Optional[str] = None,
+                              resources_per_file: int = 0):
+        """
+        Generate all Terraform files and import commands
+
+        Args:
+            output_dir: Output directory for generated files
+            import_format: "script" for an import.sh of `terraform import` commands,
+                           "blocks" for Terraform 1.5+ import blocks (imports*.tf)
+            import_shards: Number of files to split import blocks across
+            incremental: Only regenerate resource types (or, with resources_per_file, shards)
+                         whose content changed since the last run (the changed-resources
+                         report is written either way)
+            state_file: Import state with content hashes (default: <output_dir>/.oig_import_state.json)
+            resources_per_file: Shard each resource type into files of at most this many
+                                resources (0 writes one file per type)
+        """
         print(f"\n{'='*60}")
         print(f"Importing OIG Resources from Okta")
         print(f"{'='*60}\n")
@@ -544,8 +960,31 @@ class OIGImporter:
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
 
+        if self.cache.path is None:
+            self.cache.path = os.path.join(output_dir, DEFAULT_CACHE_FILE)
+        self.cache.load()
+
+        state_file = state_file or os.path.join(output_dir, DEFAULT_STATE_FILE)
+        previous_state = self.load_import_state(state_file)
+
         # Fetch all resources
         entitlements = self.fetch_entitlements()
+
+        # Unchanged bundles that were readable last run stay readable; unreadable
+        # ones are always re-checked (prefetch has its own lastUpdated-keyed 404 cache)
+        previous_bundles = previous_state.get("entitlement_bundles", {})
+        readable = {}
+        to_validate = []
+        for bundle in entitlements or []:
+            key = _resource_key(bundle)
+            if incremental and previous_bundles.get("resources", {}).get(key) == content_hash(bundle) \
+                    and previous_bundles.get("readable", {}).get(key) is True:
+                readable[key] = True
+            else:
+                to_validate.append(bundle)
+        if to_validate:
+            readable.update(self.prefetch_bundle_readability(to_validate))
+
         # Skip reviews - they should be managed in Okta Admin UI
         # Reviews are individual access review decisions, not campaign definitions
         # For campaign management, use the Okta Admin Console
@@ -553,86 +992,135 @@ class OIGImporter:
         sequences = self.fetch_request_sequences(entitlements)  # Pass bundles for v2 API
         catalog_entries = self.fetch_catalog_entries()
         request_settings = self.fetch_request_settings()
+        self.cache.save()
 
         print(f"\n{'='*60}")
         print(f"Generating Terraform Configurations")
         print(f"{'='*60}\n")
 
-        all_import_commands = []
-
-        # Generate entitlements
-        if entitlements:
-            print("Generating entitlements configuration...")
-            tf_content, imports = self.generate_entitlement_tf(entitlements)
-            if tf_content:
-                tf_file = os.path.join(output_dir, "entitlements.tf")
-                with open(tf_file, 'w') as f:
-                    f.write(tf_content)
-                print(f"  Created: {tf_file}")
-                all_import_commands.extend(imports)
+        # (state category, label, resources, generator, file name, JSON key)
+        categories = [
+            ("entitlement_bundles", "entitlements", entitlements,
+             lambda items, out: self.generate_entitlement_tf(items, out, readable), "entitlements", "entitlements"),
+            ("reviews", "access reviews", reviews,
+             self.generate_reviews_tf, "reviews", "reviews"),
+            ("request_sequences", "approval workflows", sequences,
+             self.generate_request_sequences_tf, "request_sequences", "sequences"),
+            ("catalog_entries", "catalog entries", catalog_entries,
+             self.generate_catalog_entries_tf, "catalog_entries", "catalog_entries"),
+            ("request_settings", "request settings",
+             None if request_settings is None else [request_settings] if request_settings else [],
+             lambda items, out: self.generate_request_settings_tf(items[0], out), "request_settings", "request_settings"),
+        ]
 
-            # Export raw JSON for reference
-            json_file = os.path.join(output_dir, "entitlements.json")
-            self.export_json(json_file, {"entitlements": entitlements})
-
-        # Generate reviews
-        if reviews:
-            print("Generating access reviews configuration...")
-            tf_content, imports = self.generate_reviews_tf(reviews)
-            if tf_content:
-                tf_file = os.path.join(output_dir, "reviews.tf")
-                with open(tf_file, 'w') as f:
-                    f.write(tf_content)
-                print(f"  Created: {tf_file}")
-                all_import_commands.extend(imports)
-
-            json_file = os.path.join(output_dir, "reviews.json")
-            self.export_json(json_file, {"reviews": reviews})
-
-        # Generate request sequences
-        if sequences:
-            print("Generating approval workflows configuration...")
-            tf_content, imports = self.generate_request_sequences_tf(sequences)
-            if tf_content:
-                tf_file = os.path.join(output_dir, "request_sequences.tf")
-                with open(tf_file, 'w') as f:
-                    f.write(tf_content)
-                print(f"  Created: {tf_file}")
-                all_import_commands.extend(imports)
+        all_import_commands = []
+        new_state = {}
+        report = {}
+
+        for category, label, resources, generate, file_name, json_key in categories:
+            previous = previous_state.get(category, {})
+            if resources is None:
+                # A failed fetch is not an empty org: keep the last run's state and files
+                print(f"Skipping {label}: could not be fetched, keeping previous output")
+                if previous:
+                    new_state[category] = previous
+                report[category] = {"added": [], "changed": [], "removed": [], "fetch_failed": True}
+                all_import_commands.extend(self._category_imports(previous))
+                continue
 
-            json_file = os.path.join(output_dir, "request_sequences.json")
-            self.export_json(json_file, {"sequences": sequences})
-
-        # Generate catalog entries
-        if catalog_entries:
-            print("Generating catalog entries configuration...")
-            tf_content, imports = self.generate_catalog_entries_tf(catalog_entries)
-            if tf_content:
-                tf_file = os.path.join(output_dir, "catalog_entries.tf")
-                with open(tf_file, 'w') as f:
-                    f.write(tf_content)
-                print(f"  Created: {tf_file}")
-                all_import_commands.extend(imports)
+            changes = self.diff_resources(resources, previous)
+            if category == "entitlement_bundles":
+                # A bundle that became readable (or unreadable) must be regenerated too
+                previous_readable = previous.get("readable", {})
+                listed = {entry["id"] for entry in changes["added"] + changes["changed"]}
+                for bundle in resources:
+                    key = _resource_key(bundle)
+                    if key not in listed and previous_readable.get(key) != readable.get(key):
+                        changes["changed"].append({"id": key, "name": bundle.get("name")})
+            report[category] = changes
+            writer = TerraformWriter(output_dir, file_name)
+            new_state[category] = {
+                "resources": {_resource_key(r) or "default": content_hash(r) for r in resources},
+                "imports": previous.get("imports", []),
+                "files": previous.get("files", [])
+            }
+            if category == "entitlement_bundles":
+                new_state[category]["readable"] = readable
+
+            if not resources:
+                new_state[category]["imports"] = []
+                new_state[category]["files"] = []
+                if incremental and changes["removed"]:
+                    for stale in writer.existing_files():
+                        os.remove(stale)
+                        print(f"  Removed: {stale} (no {label} left)")
+                continue
 
-            json_file = os.path.join(output_dir, "catalog_entries.json")
-            self.export_json(json_file, {"catalog_entries": catalog_entries})
-
-        # Generate request settings
-        if request_settings:
-            print("Generating request settings configuration...")
-            tf_content, imports = self.generate_request_settings_tf(request_settings)
-            if tf_content:
-                tf_file = os.path.join(output_dir, "request_settings.tf")
-                with open(tf_file, 'w') as f:
-                    f.write(tf_content)
-                print(f"  Created: {tf_file}")
+            if resources_per_file:
+                # Only shards holding changed resources are rewritten
+                print(f"Generating {label} configuration...")
+                shard_state = self.generate_sharded(resources, generate, output_dir, file_name,
+                                                    resources_per_file, previous, changes, incremental)
+                regenerated = shard_state.pop("regenerated")
+                new_state[category].update(shard_state)
+                # Import commands are kept per shard; the flat list is rebuilt from them
+                new_state[category]["imports"] = []
+                all_import_commands.extend(self._category_imports(new_state[category]))
+                if not regenerated:
+                    continue
+            else:
+                unchanged = not any(changes.values())
+                previous_files = new_state[category]["files"]
+                if incremental and unchanged and previous_files and not previous.get("resources_per_file") and \
+                        all(os.path.exists(os.path.join(output_dir, f)) for f in previous_files):
+                    print(f"Skipping {label}: unchanged since last import")
+                    all_import_commands.extend(new_state[category]["imports"])
+                    continue
+
+                print(f"Generating {label} configuration...")
+                with writer:
+                    imports = generate(resources, writer)
+                for path in writer.paths:
+                    print(f"  Created: {path}")
                 all_import_commands.extend(imports)
+                new_state[category]["imports"] = imports
+                new_state[category]["files"] = [os.path.basename(path) for path in writer.paths]
 
-            json_file = os.path.join(output_dir, "request_settings.json")
-            self.export_json(json_file, {"request_settings": request_settings})
+            # Export raw JSON for reference
+            json_data = resources[0] if category == "request_settings" else resources
+            self.export_json(os.path.join(output_dir, f"{file_name}.json"), {json_key: json_data})
+
+        # Record content hashes and a report of what changed since the last run
+        with open(state_file, 'w') as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "categories": new_state
+            }, f, indent=2, sort_keys=True)
+
+        report_file = os.path.join(output_dir, CHANGES_REPORT_FILE)
+        with open(report_file, 'w') as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat() + "Z",
+                "incremental": incremental,
+                "changes": report
+            }, f, indent=2)
+
+        print("\nChanged resources since last import:")
+        for category, changes in report.items():
+            if changes.get("fetch_failed"):
+                print(f"  {category}: could not be fetched (previous output kept)")
+            elif any(changes.values()):
+                print(f"  {category}: {len(changes['added'])} added, "
+                      f"{len(changes['changed'])} changed, {len(changes['removed'])} removed")
+        print(f"  Report: {report_file}")
 
         # Generate import script
-        if all_import_commands:
+        if all_import_commands and import_format == "blocks":
+            print("\nGenerating import blocks...")
+            imports = [pair for pair in map(parse_import_command, all_import_commands) if pair]
+            for path in write_import_blocks(imports, output_dir, shards=import_shards):
+                print(f"  Created: {path}")
+        elif all_import_commands:
             print("\nGenerating import script...")
             import_script = os.path.join(output_dir, "import.sh")
             with open(import_script, 'w') as f:
@@ -656,7 +1144,10 @@ class OIGImporter:
         print(f"2. Complete TODO items in each file")
         print(f"3. Copy files to your Terraform directory")
         print(f"4. Run: cd {output_dir} && terraform init")
-        print(f"5. Run: ./import.sh")
+        if import_format == "blocks":
+            print(f"5. Run: terraform plan, then terraform apply (imports everything in one run)")
+        else:
+            print(f"5. Run: ./import.sh")
         print(f"6. Verify: terraform plan (should show no changes)")
         print(f"")
         print(f"Note: .json files contain raw API data for reference")
@@ -685,6 +1176,38 @@ def main():
         "--api-token",
         help="Okta API token (or set OKTA_API_TOKEN env var)"
     )
+    parser.add_argument(
+        "--import-format",
+        choices=IMPORT_FORMATS,
+        default="script",
+        help="script: import.sh with terraform import commands (default); "
+             "blocks: Terraform 1.5+ import blocks applied in one terraform run"
+    )
+    parser.add_argument(
+        "--import-shards",
+        type=int,
+        default=1,
+        help="Split import blocks across N files (with --import-format blocks)"
+    )
+    parser.add_argument(
+        "--resources-per-file",
+        type=int,
+        default=0,
+        help="Split generated .tf files into shards of at most N resources (e.g. 500; default: one file per type)"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only regenerate resource types (or shards, with --resources-per-file) whose content changed since the last run"
+    )
+    parser.add_argument(
+        "--state-file",
+        help=f"Import state with content hashes (default: <output-dir>/{DEFAULT_STATE_FILE})"
+    )
+    parser.add_argument(
+        "--cache-file",
+        help=f"Cache of API lookups reused across runs (default: <output-dir>/{DEFAULT_CACHE_FILE})"
+    )
 
     args = parser.parse_args()
 
@@ -699,8 +1222,10 @@ def main():
         sys.exit(1)
 
     # Run import
-    importer = OIGImporter(org_name, base_url, api_token)
-    importer.generate_import_files(args.output_dir)
+    importer = OIGImporter(org_name, base_url, api_token, cache_file=args.cache_file)
+    importer.generate_import_files(args.output_dir, import_format=args.import_format,
+                                   import_shards=args.import_shards, incremental=args.incremental,
+                                   state_file=args.state_file, resources_per_file=args.resources_per_file)
 
 
 if __name__ == "__main__":
@@ -9,6 +9,7 @@ Usage:
     python3 scripts/import_risk_rules.py
     python3 scripts/import_risk_rules.py --output environments/myorg/config/risk_rules.json
     python3 scripts/import_risk_rules.py --filter 'name sw "Process"'
+    python3 scripts/import_risk_rules.py --format ndjson --output risk_rules.ndjson
 """
 
 import os
@@ -16,9 +17,34 @@ import sys
 import json
 import requests
 import argparse
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, TextIO
 from datetime import datetime
 
+from okta_client import OktaSession
+
+
+CONFIG_NOTES = [
+    "This file manages risk rules (SOD policies) for Access Certifications and Access Requests",
+    "Risk rules define criteria for granted principal access that are a risk to your org",
+    "To add a new risk rule, submit a PR adding the rule to the 'rules' array",
+    "Run 'python3 scripts/apply_risk_rules.py' or the GitHub Actions workflow to apply changes to Okta",
+    "Run 'python3 scripts/import_risk_rules.py' to sync this file from Okta",
+    "",
+    "The '_metadata' field in each rule contains read-only information from Okta:",
+    "  - id: Risk rule ID (assigned by Okta, used for updates)",
+    "  - status: Current status (ACTIVE, INACTIVE)",
+    "  - created/lastUpdated: Timestamps",
+    "  - createdBy/lastUpdatedBy: User IDs",
+    "",
+    "Operations:",
+    "  - CONTAINS_ONE: Principal has at least one of the specified entitlements",
+    "  - CONTAINS_ALL: Principal has all of the specified entitlements",
+    "",
+    "API Scopes Required:",
+    "  - okta.governance.riskRule.read (for import)",
+    "  - okta.governance.riskRule.manage (for apply/delete)"
+]
+
 
 class RiskRuleImporter:
     """Imports risk rules from Okta to local config"""
@@ -27,27 +53,16 @@ class RiskRuleImporter:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
-    def get_all_risk_rules(self, filter_expr: str = None, limit: int = 200) -> List[Dict]:
+    def iter_risk_rules(self, filter_expr: str = None, limit: int = 200) -> Iterator[Dict]:
         """
-        Fetch all risk rules from Okta
+        Stream all risk rules from Okta, page by page (raises requests.HTTPError)
 
         Args:
             filter_expr: Optional filter (e.g., 'name sw "Process"')
             limit: Results per page (default 200)
         """
-        print("="*80)
-        print("FETCHING RISK RULES FROM OKTA")
-        print("="*80)
-        print()
-
         url = f"{self.governance_base}/risk-rules"
         params = {"limit": limit}
 
@@ -55,165 +70,190 @@ class RiskRuleImporter:
             params["filter"] = filter_expr
             print(f"Applying filter: {filter_expr}")
 
-        all_rules = []
-        after = None
+        print("Fetching risk rules...")
+        count = 0
+        for rule in self.session.paginate(url, params):
+            count += 1
+            if count % limit == 0:
+                print(f"  ✅ Retrieved {count} risk rules so far")
+            yield rule
 
-        try:
-            while True:
-                if after:
-                    params["after"] = after
-
-                print(f"Fetching risk rules (page {len(all_rules) // limit + 1})...")
-                response = self.session.get(url, params=params)
-                response.raise_for_status()
-
-                data = response.json()
-                rules = data.get("data", [])
-                all_rules.extend(rules)
-
-                print(f"  ✅ Retrieved {len(rules)} risk rules")
-
-                # Check for pagination
-                next_link = data.get("_links", {}).get("next", {}).get("href")
-                if not next_link:
-                    break
+    def get_all_risk_rules(self, filter_expr: str = None, limit: int = 200) -> List[Dict]:
+        """
+        Fetch all risk rules from Okta into a list
 
-                # Extract 'after' cursor from next link
-                if "after=" in next_link:
-                    after = next_link.split("after=")[1].split("&")[0]
-                else:
-                    break
+        Args:
+            filter_expr: Optional filter (e.g., 'name sw "Process"')
+            limit: Results per page (default 200)
+        """
+        print("="*80)
+        print("FETCHING RISK RULES FROM OKTA")
+        print("="*80)
+        print()
 
+        try:
+            all_rules = list(self.iter_risk_rules(filter_expr, limit))
             print(f"\nTotal risk rules retrieved: {len(all_rules)}")
             return all_rules
-
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                print("  ℹ️  Risk rules API not available (OIG may not be enabled or feature not available)")
-                return []
-            elif e.response.status_code == 403:
-                print("  ❌ Access denied. Ensure API token has 'okta.governance.riskRule.read' scope")
-                return []
-            else:
-                error_msg = str(e)
-                try:
-                    error_detail = e.response.json()
-                    error_msg = error_detail.get("errorSummary", error_msg)
-                except:
-                    pass
-                print(f"  ❌ Error fetching risk rules: {error_msg}")
-                return []
+            self._report_http_error(e)
+            return []
         except Exception as e:
             print(f"  ❌ Unexpected error: {e}")
             return []
 
-    def transform_risk_rules(self, raw_rules: List[Dict]) -> List[Dict]:
+    def _report_http_error(self, e: requests.exceptions.HTTPError):
+        if e.response.status_code == 404:
+            print("  ℹ️  Risk rules API not available (OIG may not be enabled or feature not available)")
+        elif e.response.status_code == 403:
+            print("  ❌ Access denied. Ensure API token has 'okta.governance.riskRule.read' scope")
+        else:
+            error_msg = str(e)
+            try:
+                error_detail = e.response.json()
+                error_msg = error_detail.get("errorSummary", error_msg)
+            except:
+                pass
+            print(f"  ❌ Error fetching risk rules: {error_msg}")
+
+    def transform_risk_rule(self, rule: Dict) -> Dict:
         """
-        Transform raw API response to config file format
+        Transform one raw API risk rule to config file format
 
         Removes read-only fields like id, created, lastUpdated, etc.
         """
+        # Only keep fields that can be used for create/update
+        transformed_rule = {
+            "name": rule.get("name"),
+            "description": rule.get("description"),
+            "notes": rule.get("notes"),
+            "type": rule.get("type"),
+            "resources": rule.get("resources", []),
+            "conflictCriteria": rule.get("conflictCriteria", {})
+        }
+
+        # Clean up None values
+        transformed_rule = {k: v for k, v in transformed_rule.items() if v is not None and v != ""}
+
+        # Add metadata as comment for reference
+        transformed_rule["_metadata"] = {
+            "id": rule.get("id"),
+            "status": rule.get("status"),
+            "created": rule.get("created"),
+            "lastUpdated": rule.get("lastUpdated"),
+            "createdBy": rule.get("createdBy"),
+            "lastUpdatedBy": rule.get("lastUpdatedBy")
+        }
+
+        print(f"  ✅ {rule.get('name')} (ID: {rule.get('id')})")
+        return transformed_rule
+
+    def transform_risk_rules(self, raw_rules: List[Dict]) -> List[Dict]:
+        """Transform raw API response to config file format"""
         print("\nTransforming risk rules for config file...")
+        return [self.transform_risk_rule(rule) for rule in raw_rules]
+
+    def save_to_file(self, rules: Iterable[Dict], output_file: str, output_format: str = "json") -> int:
+        """
+        Write risk rules to the config file as they arrive.
+
+        rules may be a generator; each rule is written as soon as it is
+        produced, so memory stays flat. The file is written next to the
+        output as <output>.partial and moved into place when complete, so a
+        failed import never leaves a truncated config behind.
 
-        transformed_rules = []
-        for rule in raw_rules:
-            # Only keep fields that can be used for create/update
-            transformed_rule = {
-                "name": rule.get("name"),
-                "description": rule.get("description"),
-                "notes": rule.get("notes"),
-                "type": rule.get("type"),
-                "resources": rule.get("resources", []),
-                "conflictCriteria": rule.get("conflictCriteria", {})
-            }
-
-            # Clean up None values
-            transformed_rule = {k: v for k, v in transformed_rule.items() if v is not None and v != ""}
-
-            # Add metadata as comment for reference
-            transformed_rule["_metadata"] = {
-                "id": rule.get("id"),
-                "status": rule.get("status"),
-                "created": rule.get("created"),
-                "lastUpdated": rule.get("lastUpdated"),
-                "createdBy": rule.get("createdBy"),
-                "lastUpdatedBy": rule.get("lastUpdatedBy")
-            }
-
-            transformed_rules.append(transformed_rule)
-            print(f"  ✅ {rule.get('name')} (ID: {rule.get('id')})")
-
-        return transformed_rules
-
-    def save_to_file(self, rules: List[Dict], output_file: str):
-        """Save risk rules to JSON config file"""
-        print(f"\nSaving risk rules to {output_file}...")
-
-        config = {
+        Returns: Number of rules written
+        """
+        print(f"\nWriting risk rules to {output_file}...")
+
+        # Ensure output directory exists
+        os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+        partial_file = f"{output_file}.partial"
+
+        try:
+            with open(partial_file, 'w') as f:
+                if output_format == "ndjson":
+                    count = 0
+                    for rule in rules:
+                        f.write(json.dumps(rule) + "\n")
+                        count += 1
+                else:
+                    count = self._write_json_config(f, rules)
+        except BaseException:
+            os.remove(partial_file)
+            raise
+
+        os.replace(partial_file, output_file)
+        print(f"  ✅ Saved {count} risk rules")
+        return count
+
+    def _write_json_config(self, f: TextIO, rules: Iterable[Dict]) -> int:
+        """Write the config object with a streamed "rules" array (same bytes as json.dump(indent=2))"""
+        header = {
             "description": "Risk rules (Separation of Duties policies) synced from Okta OIG",
             "last_synced": datetime.utcnow().isoformat() + "Z",
-            "version": "1.0",
-            "rules": rules,
-            "notes": [
-                "This file manages risk rules (SOD policies) for Access Certifications and Access Requests",
-                "Risk rules define criteria for granted principal access that are a risk to your org",
-                "To add a new risk rule, submit a PR adding the rule to the 'rules' array",
-                "Run 'python3 scripts/apply_risk_rules.py' or the GitHub Actions workflow to apply changes to Okta",
-                "Run 'python3 scripts/import_risk_rules.py' to sync this file from Okta",
-                "",
-                "The '_metadata' field in each rule contains read-only information from Okta:",
-                "  - id: Risk rule ID (assigned by Okta, used for updates)",
-                "  - status: Current status (ACTIVE, INACTIVE)",
-                "  - created/lastUpdated: Timestamps",
-                "  - createdBy/lastUpdatedBy: User IDs",
-                "",
-                "Operations:",
-                "  - CONTAINS_ONE: Principal has at least one of the specified entitlements",
-                "  - CONTAINS_ALL: Principal has all of the specified entitlements",
-                "",
-                "API Scopes Required:",
-                "  - okta.governance.riskRule.read (for import)",
-                "  - okta.governance.riskRule.manage (for apply/delete)"
-            ]
+            "version": "1.0"
         }
 
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_file), exist_ok=True)
-
-        with open(output_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        f.write("{\n")
+        for key, value in header.items():
+            f.write(f"  {json.dumps(key)}: {_indent(json.dumps(value, indent=2))},\n")
+
+        f.write('  "rules": [')
+        count = 0
+        for rule in rules:
+            f.write(",\n" if count else "\n")
+            f.write("    " + _indent(json.dumps(rule, indent=2), "    "))
+            f.flush()
+            count += 1
+        f.write("\n  ]" if count else "]")
+
+        f.write(f',\n  "notes": {_indent(json.dumps(CONFIG_NOTES, indent=2))}\n}}')
+        return count
+
+    def import_rules(self, output_file: str, filter_expr: str = None, output_format: str = "json",
+                     limit: int = 200) -> bool:
+        """Run the complete import process: paginate -> transform -> write, one rule at a time"""
+        print("="*80)
+        print("IMPORTING RISK RULES FROM OKTA")
+        print("="*80)
+        print()
 
-        print(f"  ✅ Saved {len(rules)} risk rules")
-        return config
+        rules = (self.transform_risk_rule(rule) for rule in self.iter_risk_rules(filter_expr=filter_expr, limit=limit))
 
-    def import_rules(self, output_file: str, filter_expr: str = None) -> bool:
-        """Run the complete import process"""
-        # Fetch risk rules
-        raw_rules = self.get_all_risk_rules(filter_expr=filter_expr)
+        try:
+            count = self.save_to_file(rules, output_file, output_format)
+        except requests.exceptions.HTTPError as e:
+            self._report_http_error(e)
+            if e.response.status_code != 404:
+                print(f"  ⚠️  Left {output_file} unchanged")
+                return False
+            # API not available: still save an empty file
+            count = self.save_to_file([], output_file, output_format)
+        except Exception as e:
+            print(f"  ❌ Unexpected error: {e}")
+            print(f"  ⚠️  Left {output_file} unchanged")
+            return False
 
-        if not raw_rules:
+        if count == 0:
             print("\n⚠️  No risk rules found to import")
-            # Still save empty file
-            self.save_to_file([], output_file)
-            return True
-
-        # Transform rules
-        transformed_rules = self.transform_risk_rules(raw_rules)
-
-        # Save to file
-        self.save_to_file(transformed_rules, output_file)
 
         # Summary
         print("\n" + "="*80)
         print("IMPORT SUMMARY")
         print("="*80)
-        print(f"  Total risk rules imported: {len(transformed_rules)}")
+        print(f"  Total risk rules imported: {count}")
         print(f"  Output file: {output_file}")
         print("="*80)
 
         return True
 
 
+def _indent(text: str, prefix: str = "  ") -> str:
+    """Indent every line after the first (for nesting json.dumps output)"""
+    return text.replace("\n", "\n" + prefix)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Import risk rules from Okta to local config"
@@ -242,6 +282,12 @@ def main():
         "--filter",
         help="Filter expression (e.g., 'name sw \"Process\"' or 'resourceOrn eq \"orn:...\"')"
     )
+    parser.add_argument(
+        "--format",
+        choices=["json", "ndjson"],
+        default="json",
+        help="Output format: config JSON (default) or one rule per line"
+    )
     parser.add_argument(
         "--limit",
         type=int,
@@ -256,7 +302,8 @@ def main():
         sys.exit(1)
 
     importer = RiskRuleImporter(args.org_name, args.base_url, args.api_token)
-    success = importer.import_rules(args.output, filter_expr=args.filter)
+    success = importer.import_rules(args.output, filter_expr=args.filter, output_format=args.format,
+                                   limit=args.limit)
 
     sys.exit(0 if success else 1)
 
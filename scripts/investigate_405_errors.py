@@ -27,6 +27,8 @@ import json
 import requests
 from typing import Dict, List, Optional
 
+from okta_client import OktaSession
+
 
 class EndpointInvestigator:
     """Test various API endpoints to identify correct patterns"""
@@ -34,13 +36,7 @@ class EndpointInvestigator:
     def __init__(self, org_name: str, base_url: str, api_token: str):
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
     def test_endpoint(self, method: str, endpoint: str, params: Optional[Dict] = None) -> Dict:
         """Test a single endpoint and return results"""
@@ -12,9 +12,10 @@ Usage:
 import os
 import sys
 import json
-import requests
 from typing import Dict, Optional
 
+from okta_client import OktaSession
+
 
 class LabelsAPIInvestigator:
     """Investigate Labels API endpoints and methods"""
@@ -23,13 +24,7 @@ class LabelsAPIInvestigator:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
     def print_section(self, title: str):
         """Print a formatted section header"""
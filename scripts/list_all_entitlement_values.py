@@ -9,9 +9,10 @@ Usage:
 import os
 import sys
 import argparse
-import requests
 import json
 
+from okta_client import OktaSession
+
 def list_entitlement_values(entitlement_id):
     """List all values for a given entitlement."""
 
@@ -27,15 +28,11 @@ def list_entitlement_values(entitlement_id):
     # Get entitlement details first
     url = f'https://{org_name}.{base_url}/governance/api/v1/entitlements/{entitlement_id}'
 
-    headers = {
-        'Authorization': f'SSWS {token}',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json'
-    }
+    session = OktaSession(token)
 
     print(f"Fetching entitlement: {entitlement_id}\n")
 
-    response = requests.get(url, headers=headers)
+    response = session.get(url)
 
     if response.status_code != 200:
         print(f"Error: {response.status_code}")
@@ -29,9 +29,7 @@ def main():
 
     # Get all apps
     url = f"{manager.base_url}/api/v1/apps"
-    response = manager.session.get(url)
-    response.raise_for_status()
-    apps = response.json()
+    apps = list(manager.session.paginate(url, {"limit": 200}))
 
     print(f"Found {len(apps)} applications in {org_name}:")
     print("=" * 100)
@@ -30,103 +30,213 @@ Usage:
 import argparse
 import json
 import sys
+import threading
 import requests
-from typing import List, Dict, Optional
+from collections import defaultdict
+from typing import Callable, Iterable, List, Dict, Iterator, Optional, Set, Tuple
 import time
 
+from okta_client import OktaSession, fan_out
+
+
+# Seconds a fetched label catalog is trusted before it is re-listed
+DEFAULT_LABEL_CATALOG_TTL = 300
+
+
+class LabelCatalog:
+    """
+    In-memory index of governance labels, fetched once and shared by all lookups.
+
+    Indexed by label name, labelId, labelValueId and (label name, value name).
+    The catalog is re-listed after ttl seconds or an explicit invalidate();
+    labels created through OktaAPIManager are added without re-listing.
+    """
+
+    def __init__(self, fetch: Callable[[], Iterable[Dict]], ttl: float = DEFAULT_LABEL_CATALOG_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._loaded_at: Optional[float] = None
+        self._labels: List[Dict] = []
+        self._by_name: Dict[str, Dict] = {}
+        self._by_id: Dict[str, Dict] = {}
+        self._by_value_id: Dict[str, Tuple[Dict, Dict]] = {}
+        self._by_label_value: Dict[Tuple[str, str], Dict] = {}
+
+    def invalidate(self):
+        """Drop the cached labels; the next lookup re-lists them from Okta"""
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self):
+        """Re-list all labels from Okta and rebuild the indexes"""
+        labels = list(self.fetch())
+        with self._lock:
+            self._rebuild(labels)
+            self._loaded_at = time.monotonic()
+
+    def add(self, label: Dict):
+        """Index a label returned by a create call (replaces any label with the same labelId)"""
+        with self._lock:
+            if self._loaded_at is None:
+                return  # Not loaded yet; the first lookup will list it
+            label_id = label.get("labelId")
+            if label_id in self._by_id:
+                self._rebuild([l for l in self._labels if l.get("labelId") != label_id] + [label])
+            else:
+                self._index(label)
+
+    def _rebuild(self, labels: List[Dict]):
+        self._labels = []
+        self._by_name = {}
+        self._by_id = {}
+        self._by_value_id = {}
+        self._by_label_value = {}
+        for label in labels:
+            self._index(label)
+
+    def _index(self, label: Dict):
+        name = label.get("name")
+        self._labels.append(label)
+        # First match wins, as with the previous linear scans
+        self._by_name.setdefault(name, label)
+        if label.get("labelId"):
+            self._by_id.setdefault(label["labelId"], label)
+        for value in label.get("values", []):
+            if value.get("labelValueId"):
+                self._by_value_id.setdefault(value["labelValueId"], (label, value))
+            self._by_label_value.setdefault((name, value.get("name")), value)
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            self.refresh()
+
+    def labels(self) -> List[Dict]:
+        """All labels, in the order Okta listed them"""
+        self._ensure_loaded()
+        return list(self._labels)
+
+    def by_name(self, label_name: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._by_name.get(label_name)
+
+    def by_id(self, label_id: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._by_id.get(label_id)
+
+    def by_value_id(self, label_value_id: str) -> Optional[Tuple[Dict, Dict]]:
+        """(label, value) pair that owns a labelValueId"""
+        self._ensure_loaded()
+        return self._by_value_id.get(label_value_id)
+
+    def value(self, label_name: str, value_name: str) -> Optional[Dict]:
+        self._ensure_loaded()
+        return self._by_label_value.get((label_name, value_name))
+
+
+# Max resourceOrns (and labelValueIds) per /resource-labels/assign or /unassign request
+LABEL_ASSIGNMENT_CHUNK_SIZE = 10
+
+
+def chunk_label_assignments(pairs: Iterable[Tuple[str, str]],
+                            chunk_size: int = LABEL_ASSIGNMENT_CHUNK_SIZE) -> List[Tuple[List[str], List[str]]]:
+    """
+    Group (labelValueId, resource ORN) pairs into request-sized payloads.
+
+    Resources that need exactly the same set of label values share requests,
+    so N resources labelled alike cost ceil(N / chunk_size) calls.
+
+    Returns:
+        List of (labelValueIds, resourceOrns) tuples, each within chunk_size
+    """
+    values_by_orn: Dict[str, Set[str]] = defaultdict(set)
+    for label_value_id, resource_orn in pairs:
+        values_by_orn[resource_orn].add(label_value_id)
+
+    orns_by_values: Dict[Tuple[str, ...], List[str]] = defaultdict(list)
+    for resource_orn, label_value_ids in values_by_orn.items():
+        orns_by_values[tuple(sorted(label_value_ids))].append(resource_orn)
+
+    chunks = []
+    for label_value_ids, resource_orns in orns_by_values.items():
+        for i in range(0, len(label_value_ids), chunk_size):
+            for j in range(0, len(resource_orns), chunk_size):
+                chunks.append((list(label_value_ids[i:i + chunk_size]), resource_orns[j:j + chunk_size]))
+    return chunks
+
+
+def write_label_assignments(session: OktaSession, governance_base: str,
+                            pairs: Iterable[Tuple[str, str]], unassign: bool = False,
+                            chunk_size: int = LABEL_ASSIGNMENT_CHUNK_SIZE) -> Dict:
+    """
+    Assign (or unassign) label values in bulk via /resource-labels/assign|unassign.
+
+    Pairs are grouped and chunked with chunk_label_assignments() and the chunks
+    are sent concurrently under the session's rate limiter. A failed chunk does
+    not stop the others.
+
+    Args:
+        session: OktaSession to send requests with
+        governance_base: e.g. https://myorg.okta.com/governance/api/v1
+        pairs: (labelValueId, resource ORN) pairs
+        unassign: Remove the label values instead of assigning them
+
+    Returns:
+        {"applied": int, "failed": int, "requests": int, "errors": [...]}, counting
+        (labelValueId, ORN) assignments; each error names the chunk's IDs and ORNs
+    """
+    action = "unassign" if unassign else "assign"
+    url = f"{governance_base}/resource-labels/{action}"
+    chunks = chunk_label_assignments(pairs, chunk_size)
+    results = {"applied": 0, "failed": 0, "requests": len(chunks), "errors": []}
+
+    def send(chunk: Tuple[List[str], List[str]]):
+        label_value_ids, resource_orns = chunk
+        response = session.post(url, json={"resourceOrns": resource_orns, "labelValueIds": label_value_ids})
+        response.raise_for_status()
+
+    for result in fan_out(send, chunks, session=session, url=url):
+        label_value_ids, resource_orns = result.item
+        count = len(label_value_ids) * len(resource_orns)
+        if result.ok:
+            results["applied"] += count
+            continue
+
+        results["failed"] += count
+        error = str(result.error)
+        response = getattr(result.error, "response", None)
+        if response is not None and response.text:
+            error = f"{error}: {response.text[:300]}"
+        print(f"  ❌ Chunk {result.index + 1}/{len(chunks)} failed to {action} "
+              f"{len(label_value_ids)} value(s) on {len(resource_orns)} resource(s): {error}")
+        results["errors"].append({
+            "labelValueIds": label_value_ids,
+            "resourceOrns": resource_orns,
+            "error": error
+        })
+
+    print(f"{'Unassigned' if unassign else 'Assigned'} {results['applied']} label value assignment(s) "
+          f"in {len(chunks)} request(s)" + (f", {results['failed']} failed" if results["failed"] else ""))
+    return results
+
 
 class OktaAPIManager:
     """Manages Okta OIG resources via REST API"""
     
-    def __init__(self, org_name: str, base_url: str, api_token: str):
+    def __init__(self, org_name: str, base_url: str, api_token: str,
+                 label_catalog_ttl: float = DEFAULT_LABEL_CATALOG_TTL):
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
-
-        # Rate limit tracking
-        self.rate_limit_remaining = None
-        self.rate_limit_reset = None
-        self.rate_limit_warning_threshold = 10  # Warn when fewer than this many requests remain
-    
-    def _update_rate_limit_info(self, response: requests.Response):
-        """Update rate limit tracking from response headers"""
-        try:
-            self.rate_limit_remaining = int(response.headers.get('X-Rate-Limit-Remaining', 0))
-            self.rate_limit_reset = int(response.headers.get('X-Rate-Limit-Reset', 0))
-
-            # Warn if approaching rate limit
-            if self.rate_limit_remaining is not None and self.rate_limit_remaining <= self.rate_limit_warning_threshold:
-                print(f"  ⚠️  Rate limit warning: {self.rate_limit_remaining} requests remaining")
-        except (ValueError, TypeError):
-            pass  # Headers might not be integers or might be missing
-
-    def _wait_for_rate_limit_reset(self):
-        """Wait until rate limit reset time if we're close to the limit"""
-        if self.rate_limit_remaining is not None and self.rate_limit_remaining <= 1:
-            if self.rate_limit_reset:
-                wait_time = max(self.rate_limit_reset - time.time() + 1, 1)  # Add 1 second buffer
-                print(f"  ⏳ Rate limit nearly exhausted. Waiting {wait_time:.0f} seconds for reset...")
-                time.sleep(wait_time)
+        self.session = OktaSession(api_token)
+        self.label_catalog = LabelCatalog(self.iter_labels, ttl=label_catalog_ttl)
 
     def _make_request(self, method: str, url: str, **kwargs) -> requests.Response:
-        """Make API request with rate limit awareness and retry logic"""
-        max_retries = 5  # Increased for rate limit retries
-        base_retry_delay = 1
-
-        # Check if we should wait before making the request
-        self._wait_for_rate_limit_reset()
-
-        for attempt in range(max_retries):
-            try:
-                response = self.session.request(method, url, **kwargs)
-
-                # Update rate limit tracking from response headers
-                self._update_rate_limit_info(response)
-
-                # Handle rate limiting (429)
-                if response.status_code == 429:
-                    # Use X-Rate-Limit-Reset header for accurate wait time
-                    reset_time = int(response.headers.get('X-Rate-Limit-Reset', time.time() + 60))
-                    wait_time = max(reset_time - time.time() + 1, 1)  # Add 1 second buffer
-
-                    print(f"  ⚠️  Rate limited (429). Waiting {wait_time:.0f} seconds until reset...")
-                    time.sleep(wait_time)
-                    continue
-
-                response.raise_for_status()
-                return response
-
-            except requests.exceptions.HTTPError as e:
-                # Don't retry on 4xx errors (except 429 which is handled above)
-                if 400 <= e.response.status_code < 500 and e.response.status_code != 429:
-                    raise
-
-                if attempt == max_retries - 1:
-                    raise
-
-                # Exponential backoff for other errors
-                wait_time = base_retry_delay * (2 ** attempt)
-                print(f"  ⚠️  Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                print(f"     Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-
-            except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
-                    raise
-
-                # Exponential backoff
-                wait_time = base_retry_delay * (2 ** attempt)
-                print(f"  ⚠️  Request failed (attempt {attempt + 1}/{max_retries}): {e}")
-                print(f"     Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-
-        raise Exception("Max retries exceeded")
+        """Make API request via the shared OktaSession (rate limits/retries) and raise on HTTP errors"""
+        response = self.session.request(method, url, **kwargs)
+        response.raise_for_status()
+        return response
     
     # ==================== Resource Owners ====================
     
@@ -142,8 +252,8 @@ class OktaAPIManager:
         response = self._make_request("PUT", url, json=payload)
         return response.json()
     
-    def list_resource_owners(self, parent_resource_orn: str, include_parent: bool = False) -> Dict:
-        """List all resources with assigned owners for a parent resource"""
+    def iter_resource_owners(self, parent_resource_orn: str, include_parent: bool = False) -> Iterator[Dict]:
+        """Stream all resources with assigned owners for a parent resource, following pagination"""
         url = f"{self.base_url}/governance/api/v1/resource-owners"
         
         # URL encode the filter
@@ -156,8 +266,11 @@ class OktaAPIManager:
         if include_parent:
             params["include"] = "parent_resource_owner"
         
-        response = self._make_request("GET", url, params=params)
-        return response.json()
+        return self.session.paginate(url, params)
+    
+    def list_resource_owners(self, parent_resource_orn: str, include_parent: bool = False) -> Dict:
+        """List all resources with assigned owners for a parent resource"""
+        return {"data": list(self.iter_resource_owners(parent_resource_orn, include_parent))}
     
     def update_resource_owners(self, resource_orn: str, operations: List[Dict]) -> Dict:
         """Update resource owners using PATCH operations"""
@@ -179,8 +292,8 @@ class OktaAPIManager:
         }]
         return self.update_resource_owners(resource_orn, operations)
     
-    def list_unassigned_resources(self, parent_resource_orn: str, resource_type: Optional[str] = None) -> Dict:
-        """List resources without assigned owners"""
+    def iter_unassigned_resources(self, parent_resource_orn: str, resource_type: Optional[str] = None) -> Iterator[Dict]:
+        """Stream resources without assigned owners, following pagination"""
         url = f"{self.base_url}/governance/api/v1/resource-owners/catalog/resources"
         
         filter_expr = f'parentResourceOrn eq "{parent_resource_orn}"'
@@ -192,8 +305,11 @@ class OktaAPIManager:
             "limit": 200
         }
         
-        response = self._make_request("GET", url, params=params)
-        return response.json()
+        return self.session.paginate(url, params)
+    
+    def list_unassigned_resources(self, parent_resource_orn: str, resource_type: Optional[str] = None) -> Dict:
+        """List resources without assigned owners"""
+        return {"data": list(self.iter_unassigned_resources(parent_resource_orn, resource_type))}
     
     # ==================== Labels ====================
     
@@ -208,37 +324,40 @@ class OktaAPIManager:
         try:
             response = self._make_request("POST", url, json=payload)
             print(f"Created label: {name}")
-            return response.json()
+            result = response.json()
+            self.label_catalog.add(result)
+            return result
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 409:
                 print(f"Label already exists: {name}")
+                # Created outside this catalog's view; re-list on next lookup
+                self.label_catalog.invalidate()
                 return {"name": name, "exists": True}
             raise
     
-    def list_labels(self) -> Dict:
-        """List all governance labels"""
+    def iter_labels(self) -> Iterator[Dict]:
+        """Stream all governance labels, following pagination"""
         url = f"{self.base_url}/governance/api/v1/labels"
 
-        response = self._make_request("GET", url)
-        return response.json()
+        return self.session.paginate(url)
+
+    def list_labels(self) -> Dict:
+        """List all governance labels"""
+        return {"data": list(self.iter_labels())}
 
     def get_label_id_from_name(self, label_name: str) -> Optional[str]:
-        """Get labelId from label name by listing all labels"""
-        labels_response = self.list_labels()
-        for label in labels_response.get("data", []):
-            if label.get("name") == label_name:
-                return label.get("labelId")
-        return None
+        """Get labelId from label name via the label catalog"""
+        label = self.label_catalog.by_name(label_name)
+        return label.get("labelId") if label else None
 
     def get_label_value_id_from_name(self, label_name: str) -> Optional[str]:
-        """Get labelValueId from label name by listing all labels"""
-        labels_response = self.list_labels()
-        for label in labels_response.get("data", []):
-            if label.get("name") == label_name:
-                # Get the first labelValueId from values array
-                values = label.get("values", [])
-                if values:
-                    return values[0].get("labelValueId")
+        """Get labelValueId from label name via the label catalog"""
+        label = self.label_catalog.by_name(label_name)
+        if label:
+            # Get the first labelValueId from values array
+            values = label.get("values", [])
+            if values:
+                return values[0].get("labelValueId")
         return None
 
     def get_label(self, label_name: str) -> Optional[Dict]:
@@ -271,13 +390,18 @@ class OktaAPIManager:
         print(f"Applied label '{label_name}' to {len(resource_orns)} resources")
         return response.json()
 
-    def list_all_resource_labels(self, limit: int = 200) -> Dict:
-        """List all resource-label assignments"""
+    def iter_resource_labels(self, filter_expr: Optional[str] = None, limit: int = 200) -> Iterator[Dict]:
+        """Stream resource-label assignments (optionally filtered), following pagination"""
         url = f"{self.base_url}/governance/api/v1/resource-labels"
         params = {"limit": limit}
+        if filter_expr:
+            params["filter"] = filter_expr
 
-        response = self._make_request("GET", url, params=params)
-        return response.json()
+        return self.session.paginate(url, params)
+
+    def list_all_resource_labels(self, limit: int = 200) -> Dict:
+        """List all resource-label assignments (limit is the page size)"""
+        return {"data": list(self.iter_resource_labels(limit=limit))}
 
     def list_resources_by_label(self, label_name: str) -> Dict:
         """List all resources with a specific label using filter parameter"""
@@ -287,15 +411,8 @@ class OktaAPIManager:
             raise ValueError(f"Label '{label_name}' not found")
 
         # Use filter parameter to query resources with this label
-        url = f"{self.base_url}/governance/api/v1/resource-labels"
         filter_expr = f'labelValueId eq "{label_value_id}"'
-        params = {
-            "filter": filter_expr,
-            "limit": 200
-        }
-
-        response = self._make_request("GET", url, params=params)
-        return response.json()
+        return {"data": list(self.iter_resource_labels(filter_expr))}
 
     def remove_label_from_resources(self, label_name: str, resource_orns: List[str]) -> Dict:
         """Remove a label from resources (looks up labelId first)"""
@@ -344,6 +461,7 @@ class OktaAPIManager:
         try:
             response = self._make_request("POST", url, json=payload)
             result = response.json()
+            self.label_catalog.add(result)
             print(f"Created label '{name}' with {len(values)} values")
             for value in result.get("values", []):
                 print(f"  - {value.get('name')}: {value.get('labelValueId')}")
@@ -351,6 +469,7 @@ class OktaAPIManager:
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 409:
                 print(f"Label '{name}' already exists")
+                self.label_catalog.invalidate()
                 return {"name": name, "exists": True}
             raise
 
@@ -368,14 +487,8 @@ class OktaAPIManager:
         Example:
             sox_value_id = manager.get_label_value_id("Compliance", "SOX")
         """
-        labels_response = self.list_labels()
-        for label in labels_response.get("data", []):
-            if label.get("name") == label_name:
-                values = label.get("values", [])
-                for value in values:
-                    if value.get("name") == value_name:
-                        return value.get("labelValueId")
-        return None
+        value = self.label_catalog.value(label_name, value_name)
+        return value.get("labelValueId") if value else None
 
     def assign_label_values_to_resources(self, label_value_ids: List[str], resource_orns: List[str]) -> Dict:
         """
@@ -391,6 +504,9 @@ class OktaAPIManager:
         Returns:
             API response
 
+        Sends a single request; use write_label_assignments() for lists larger
+        than the API's per-request limit.
+
         Example:
             # Assign SOX label value to 4 applications
             sox_value_id = manager.get_label_value_id("Compliance", "SOX")
@@ -408,10 +524,6 @@ class OktaAPIManager:
             "labelValueIds": label_value_ids
         }
 
-        print(f"DEBUG: API Request Details:")
-        print(f"  URL: {url}")
-        print(f"  Payload: {json.dumps(payload, indent=2)}")
-
         try:
             response = self._make_request("POST", url, json=payload)
             print(f"Assigned {len(label_value_ids)} label value(s) to {len(resource_orns)} resource(s)")
@@ -425,9 +537,33 @@ class OktaAPIManager:
                 except:
                     pass
             print(f"Error assigning labels: {e}{error_detail}")
-            print(f"DEBUG: Failed payload was: {json.dumps(payload, indent=2)}")
             raise
 
+    def unassign_label_values_from_resources(self, label_value_ids: List[str], resource_orns: List[str]) -> Dict:
+        """
+        Remove specific label values from resources using the /resource-labels/unassign endpoint.
+
+        Args:
+            label_value_ids: List of labelValueIds to remove
+            resource_orns: List of resource ORNs
+
+        Returns:
+            API response
+        """
+        url = f"{self.base_url}/governance/api/v1/resource-labels/unassign"
+        payload = {
+            "resourceOrns": resource_orns,
+            "labelValueIds": label_value_ids
+        }
+
+        response = self._make_request("POST", url, json=payload)
+        print(f"Unassigned {len(label_value_ids)} label value(s) from {len(resource_orns)} resource(s)")
+        return response.json() if response.content else {}
+
+    def write_label_assignments(self, pairs: Iterable[Tuple[str, str]], unassign: bool = False) -> Dict:
+        """Assign (or unassign) (labelValueId, ORN) pairs in chunked, concurrent requests"""
+        return write_label_assignments(self.session, f"{self.base_url}/governance/api/v1", pairs, unassign=unassign)
+
     # ==================== Helper Methods ====================
 
     def build_user_orn(self, user_id: str) -> str:
@@ -518,6 +654,7 @@ def destroy_configuration(manager: OktaAPIManager, config: Dict):
     # Remove label assignments
     if "label_assignments" in config:
         print("Removing label assignments...")
+        pairs = []
         for assignment in config["label_assignments"]:
             label_name = assignment["label_name"]
             
@@ -533,13 +670,32 @@ def destroy_configuration(manager: OktaAPIManager, config: Dict):
                 resource_orns = assignment["resource_orns"]
             
             try:
-                manager.remove_label_from_resources(label_name, resource_orns)
+                label = manager.label_catalog.by_name(label_name)
             except Exception as e:
                 print(f"Warning: Could not remove labels: {e}")
+                continue
+            if not label:
+                print(f"Warning: Could not remove labels: Label '{label_name}' not found")
+                continue
+
+            # Removing a label removes every one of its values
+            pairs.extend(
+                (value.get("labelValueId"), orn)
+                for value in label.get("values", [])
+                for orn in resource_orns
+            )
+        
+        if pairs:
+            # Chunked to the API limit and sent concurrently
+            result = manager.write_label_assignments(pairs, unassign=True)
+            if result["failed"]:
+                print(f"Warning: Could not remove {result['failed']} label assignments")
     
     # Remove resource owners
     if "resource_owners" in config:
         print("\nRemoving resource owners...")
+        # resource ORN -> principals to remove, across all assignments
+        owners_by_resource: Dict[str, List[str]] = defaultdict(list)
         for assignment in config["resource_owners"]:
             principal_orns = [
                 manager.build_user_orn(uid) if assignment["principal_type"] == "user"
@@ -560,34 +716,71 @@ def destroy_configuration(manager: OktaAPIManager, config: Dict):
             
             for resource_orn in resource_orns:
                 for principal_orn in principal_orns:
-                    try:
-                        manager.remove_resource_owner(resource_orn, principal_orn)
-                    except Exception as e:
-                        print(f"Warning: Could not remove owner: {e}")
+                    if principal_orn not in owners_by_resource[resource_orn]:
+                        owners_by_resource[resource_orn].append(principal_orn)
+
+        # One PATCH with every REMOVE op per resource; resources run concurrently
+        def remove_owners(item):
+            resource_orn, principal_orns = item
+            operations = [
+                {"op": "REMOVE", "path": "/principalOrn", "value": principal_orn}
+                for principal_orn in principal_orns
+            ]
+            return manager.update_resource_owners(resource_orn, operations)
+
+        owners_url = f"{manager.base_url}/governance/api/v1/resource-owners"
+        for result in fan_out(remove_owners, owners_by_resource.items(),
+                              session=manager.session, url=owners_url):
+            resource_orn, principal_orns = result.item
+            if result.error:
+                print(f"Warning: Could not remove owners from {resource_orn}: {result.error}")
+            else:
+                print(f"Removed {len(principal_orns)} owner(s) from {resource_orn}")
     
     print("\n✅ Configuration destroyed successfully!")
 
 
 def export_labels_only(manager: OktaAPIManager) -> Dict:
-    """Export only governance labels"""
+    """
+    Export only governance labels with the resources assigned to each.
+
+    Streams every /resource-labels page once and joins assignments to labels
+    locally by labelValueId, instead of one filtered query per label.
+    """
     print("Exporting labels...")
     labels_data = []
 
     try:
-        labels_response = manager.list_labels()
-        for label in labels_response.get("data", []):
+        # Export reflects Okta right now, not a cached catalog
+        manager.label_catalog.refresh()
+        labels = manager.label_catalog.labels()
+
+        # labelValueId -> resource-label records carrying that value
+        resources_by_value: Dict[str, List[Dict]] = {}
+        assignment_count = 0
+        for assignment in manager.iter_resource_labels():
+            assignment_count += 1
+            for label_value in assignment.get("labels", []):
+                resources_by_value.setdefault(label_value.get("labelValueId"), []).append(assignment)
+        print(f"  Streamed {assignment_count} resource-label assignments")
+
+        for label in labels:
             label_name = label.get("name")
-            try:
-                # Get resources for this label
-                resources = manager.list_resources_by_label(label_name)
-                labels_data.append({
-                    "name": label_name,
-                    "description": label.get("description", ""),
-                    "resources": resources.get("data", [])
-                })
-                print(f"  ✅ {label_name}: {len(resources.get('data', []))} resources")
-            except Exception as e:
-                print(f"  ⚠️  Could not get resources for label '{label_name}': {e}")
+            resources = []
+            seen = set()
+            for value in label.get("values", []):
+                for assignment in resources_by_value.get(value.get("labelValueId"), []):
+                    # A resource carrying several values of this label is listed once
+                    if id(assignment) not in seen:
+                        seen.add(id(assignment))
+                        resources.append(assignment)
+
+            labels_data.append({
+                "name": label_name,
+                "description": label.get("description", ""),
+                "resources": resources
+            })
+            print(f"  ✅ {label_name}: {len(resources)} resources")
 
         print(f"✅ Exported {len(labels_data)} labels")
         return {"labels": labels_data, "status": "success"}
@@ -777,16 +970,14 @@ def main():
         print("\n=== Current State ===\n")
 
         print("Labels:")
-        labels = manager.list_labels()
-        for label in labels.get("data", []):
+        for label in manager.iter_labels():
             print(f"  - {label.get('name')}: {label.get('description')}")
 
         print("\nResource Owners:")
         if config.get("query_resources"):
             for resource in config["query_resources"]:
-                owners = manager.list_resource_owners(resource)
                 print(f"  Resource: {resource}")
-                for item in owners.get("data", []):
+                for item in manager.iter_resource_owners(resource):
                     principals = item.get("principals", [])
                     print(f"    Owners: {len(principals)}")
 
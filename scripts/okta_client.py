@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+okta_client.py
+
+Shared HTTP client for the Okta Management and Governance APIs.
+
+Every script in this directory talks to Okta through OktaSession instead of a
+bare requests.Session, so they all get the same behaviour:
+- Pooled keep-alive connections (TLS handshakes are reused across requests)
+- gzip/deflate response compression
+- Default connect/read timeouts
+- One retry/backoff policy for 429s, 5xx errors and dropped connections
+- A proactive rate limiter per Okta endpoint bucket (see RateLimiter)
+- A streaming paginator for list endpoints (see OktaSession.paginate)
+- Bounded-concurrency fan-out for per-resource calls (see fan_out)
+
+Usage:
+  from okta_client import OktaSession
+
+  session = OktaSession(api_token)
+  response = session.get(f"https://{org_name}.okta.com/api/v1/org")
+
+  for app in session.paginate(f"https://{org_name}.okta.com/api/v1/apps", {"limit": 200}):
+      ...
+
+  for result in fan_out(fetch_owners, orns, session=session, url=owners_url):
+      if result.error:
+          ...
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Connection pool sizing. pool_maxsize bounds the number of concurrent
+# keep-alive connections per host, so it should be at least as large as the
+# number of worker threads any script uses against a single org.
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 32
+
+# (connect timeout, read timeout) in seconds
+DEFAULT_TIMEOUT = (10, 60)
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1  # Seconds; doubles on every retry
+
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+# Fraction of each bucket's limit left unused for other clients of the org
+DEFAULT_RATE_LIMIT_RESERVE = 0.05
+# Burst capacity as a fraction of each bucket's limit
+DEFAULT_RATE_LIMIT_BURST = 0.1
+
+# Upper bound on worker threads for fan_out(); keep <= DEFAULT_POOL_MAXSIZE
+DEFAULT_MAX_WORKERS = 8
+
+# Path segments that look like Okta object IDs (e.g. 0oa1b2c3d4e5f6g7h8i9)
+_ID_SEGMENT = re.compile(r'^(?=.*\d)[A-Za-z0-9]{15,}$')
+
+
+def rate_limit_bucket(url: str) -> str:
+    """
+    Map a request URL to its Okta rate-limit bucket.
+
+    Okta enforces limits per endpoint family rather than per URL, so object
+    IDs are collapsed: /api/v1/apps/0oa123.../users -> /api/v1/apps/{id}/users
+    """
+    segments = urlparse(url).path.rstrip("/").split("/")
+    return "/".join("{id}" if _ID_SEGMENT.match(seg) else seg for seg in segments)
+
+
+class _Bucket:
+    """Token-bucket state for one Okta rate-limit bucket"""
+
+    def __init__(self):
+        self.limit = 0
+        self.remaining = 0
+        self.reset = 0.0
+        self.rate = 0.0          # Tokens per second for the rest of the window
+        self.capacity = 1.0
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.known = False       # True once X-Rate-Limit headers have been seen
+        self.notified_reset = 0.0
+
+
+class RateLimiter:
+    """
+    Proactive token-bucket rate limiter keyed by Okta endpoint bucket.
+
+    Each bucket learns X-Rate-Limit-Limit/Remaining/Reset from responses and
+    refills at (remaining budget / time left in the window), so requests are
+    spread evenly across the window instead of bursting into 429s and then
+    stalling until the reset. Safe to share between threads.
+    """
+
+    def __init__(self, reserve: float = DEFAULT_RATE_LIMIT_RESERVE,
+                 burst: float = DEFAULT_RATE_LIMIT_BURST):
+        self.reserve = reserve
+        self.burst = burst
+        self._buckets: Dict[str, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url: str) -> _Bucket:
+        key = rate_limit_bucket(url)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket()
+        return bucket
+
+    def acquire(self, url: str):
+        """Block until a request to this URL's bucket fits within the budget"""
+        with self._lock:
+            bucket = self._bucket(url)
+            now = time.monotonic()
+            wall_now = time.time()
+
+            if not bucket.known:
+                return
+            if wall_now >= bucket.reset:
+                # Window rolled over without fresh headers; relearn from the next response
+                bucket.known = False
+                return
+
+            # Never wait past the reset: the new window brings a fresh budget
+            until_reset = bucket.reset - wall_now + 1  # Add 1 second buffer
+            notify = False
+
+            if bucket.rate > 0:
+                bucket.tokens = min(bucket.capacity,
+                                    bucket.tokens + (now - bucket.last_refill) * bucket.rate)
+                bucket.last_refill = now
+                bucket.tokens -= 1
+                wait_time = min(-bucket.tokens / bucket.rate, until_reset) if bucket.tokens < 0 else 0
+            else:
+                # Budget for this window is spent; resume once it resets
+                wait_time = until_reset
+                notify = bucket.notified_reset != bucket.reset
+                bucket.notified_reset = bucket.reset
+
+        if notify:
+            print(f"  ⏳ Rate limit budget spent for {rate_limit_bucket(url)}. Waiting {wait_time:.0f} seconds for reset...")
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def max_concurrency(self, url: str, ceiling: int) -> int:
+        """
+        How many requests to this URL's bucket may be in flight at once.
+
+        Never more than the tokens usable right now, so a nearly spent bucket
+        is drained by a single worker instead of a burst that ends in 429s.
+        """
+        with self._lock:
+            bucket = self._bucket(url)
+            if not bucket.known or time.time() >= bucket.reset:
+                return ceiling
+            available = bucket.remaining - int(bucket.limit * self.reserve)
+            return max(1, min(ceiling, int(bucket.capacity), available))
+
+    def update(self, url: str, response: requests.Response):
+        """Learn the bucket's budget from X-Rate-Limit-* response headers"""
+        try:
+            limit = int(response.headers["X-Rate-Limit-Limit"])
+            remaining = int(response.headers["X-Rate-Limit-Remaining"])
+            reset = int(response.headers["X-Rate-Limit-Reset"])
+        except (KeyError, ValueError, TypeError):
+            if response.status_code != 429:
+                return
+            # 429 without usable headers: assume Okta's one-minute window
+            limit, remaining, reset = 0, 0, int(time.time()) + 60
+
+        with self._lock:
+            bucket = self._bucket(url)
+            same_window = bucket.known and reset == bucket.reset
+            if response.status_code == 429:
+                remaining = 0
+            elif same_window:
+                # Responses can arrive out of order, keep the lowest count
+                remaining = min(remaining, bucket.remaining)
+
+            usable = max(remaining - int(limit * self.reserve), 0)
+            window_left = max(reset - time.time(), 1)
+
+            bucket.limit = limit
+            bucket.remaining = remaining
+            bucket.reset = reset
+            bucket.rate = usable / window_left
+            bucket.capacity = max(1.0, limit * self.burst)
+            if same_window:
+                bucket.tokens = min(bucket.tokens, usable)
+            else:
+                bucket.tokens = min(bucket.capacity, usable)
+                bucket.last_refill = time.monotonic()
+            bucket.known = True
+
+
+class OktaSession(requests.Session):
+    """requests.Session tuned for Okta with a shared retry/backoff policy"""
+
+    def __init__(self, api_token: str,
+                 timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 rate_limiter: Optional[RateLimiter] = None):
+        super().__init__()
+        self.headers.update({
+            "Authorization": f"SSWS {api_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive"
+        })
+
+        # Retries are handled in request() so that 429s can honour Okta's
+        # X-Rate-Limit-Reset header; the adapter itself never retries.
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+        self.rate_limiter = rate_limiter or RateLimiter()
+
+    def _backoff(self, attempt: int, reason) -> None:
+        """Sleep with exponential backoff before the next attempt"""
+        wait_time = self.backoff_base * (2 ** attempt)
+        print(f"  ⚠️  Request failed (attempt {attempt + 1}/{self.max_retries}): {reason}")
+        print(f"     Retrying in {wait_time} seconds...")
+        time.sleep(wait_time)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request with the default timeout and the shared retry policy.
+
+        - Every attempt first waits for budget in the URL's rate-limit bucket
+        - 429: the bucket is drained until X-Rate-Limit-Reset, then retried
+        - 500/502/503/504 and connection errors/timeouts: exponential backoff
+
+        The final response is returned as-is (including error statuses), so
+        callers keep using raise_for_status() or status_code checks.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries):
+            last_attempt = attempt == self.max_retries - 1
+
+            self.rate_limiter.acquire(url)
+
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if last_attempt:
+                    raise
+                self._backoff(attempt, e)
+                continue
+
+            self.rate_limiter.update(url, response)
+
+            if last_attempt:
+                return response
+
+            # Handle rate limiting (429); the next acquire() waits for the reset
+            if response.status_code == 429:
+                print(f"  ⚠️  Rate limited (429) on {rate_limit_bucket(url)}")
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                self._backoff(attempt, f"HTTP {response.status_code}")
+                continue
+
+            return response
+
+        raise requests.exceptions.RetryError("Max retries exceeded")
+
+    def paginate(self, url: str, params: Optional[Dict] = None,
+                 data_key: str = "data") -> Iterator[Any]:
+        """
+        Lazily yield every record from an Okta list endpoint, page by page.
+
+        Follows both pagination styles used by Okta:
+        - Management API (/api/v1): JSON array body, next page in the Link header
+        - Governance API: {"data": [...], "_links": {"next": {"href": ...}}}
+
+        Only one page is held in memory at a time. Raises requests.HTTPError
+        for error responses, like raise_for_status().
+        """
+        while url:
+            response = self.get(url, params=params)
+            response.raise_for_status()
+            body = response.json()
+
+            if isinstance(body, list):
+                records = body
+            elif isinstance(body, dict):
+                records = body.get(data_key) or []
+            else:
+                records = []
+
+            next_url = response.links.get("next", {}).get("url")
+            if not next_url and isinstance(body, dict):
+                next_url = (body.get("_links") or {}).get("next", {}).get("href")
+
+            yield from records
+
+            if not records or not next_url:
+                break
+
+            # The next link already carries the full query (filter, limit, after)
+            url = urljoin(url, next_url)
+            params = None
+
+
+class FanOutResult:
+    """Outcome of one fan_out() item: its result, or the exception it raised"""
+
+    __slots__ = ("index", "item", "result", "error")
+
+    def __init__(self, index: int, item: Any, result: Any = None,
+                 error: Optional[BaseException] = None):
+        self.index = index
+        self.item = item
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def fan_out(func: Callable[[Any], Any], items: Iterable[Any],
+            max_workers: int = DEFAULT_MAX_WORKERS,
+            session: Optional[OktaSession] = None,
+            url: Optional[str] = None,
+            ordered: bool = True) -> Iterator[FanOutResult]:
+    """
+    Run func(item) for every item on a thread pool, yielding results in input order.
+
+    Args:
+        func: Called once per item; typically makes one or more API calls
+        items: Any iterable, consumed lazily (e.g. an OktaSession.paginate generator)
+        max_workers: Upper bound on concurrent calls
+        session: When given with url, in-flight calls are further capped by
+                 the live budget of url's rate-limit bucket
+        url: Representative URL of the endpoint func calls
+        ordered: When False, results are yielded as soon as each call
+                 finishes (use FanOutResult.index to restore input order)
+
+    Returns:
+        Iterator of FanOutResult, one per item and in the same order. An
+        exception raised by func is stored on its result instead of aborting
+        the remaining items. An exception raised by items itself is re-raised
+        once the calls already started have been yielded.
+    """
+    def call(index: int, item: Any) -> FanOutResult:
+        try:
+            return FanOutResult(index, item, result=func(item))
+        except Exception as e:
+            return FanOutResult(index, item, error=e)
+
+    def window() -> int:
+        if session is not None and url:
+            return session.rate_limiter.max_concurrency(url, max_workers)
+        return max_workers
+
+    pending = deque()
+    source = iter(enumerate(items))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        exhausted = False
+        source_error = None
+        while True:
+            while not exhausted and len(pending) < window():
+                try:
+                    index, item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                except Exception as e:
+                    # Finish what was started before surfacing the source's error
+                    exhausted = True
+                    source_error = e
+                    break
+                pending.append(executor.submit(call, index, item))
+
+            if not pending:
+                if source_error is not None:
+                    raise source_error
+                break
+
+            if not ordered:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+                continue
+
+            # Head-of-line wait keeps output ordered; later items keep running
+            yield pending.popleft().result()
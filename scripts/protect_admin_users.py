@@ -12,11 +12,12 @@ Usage:
 import argparse
 import json
 import os
-import re
 import sys
-import requests
 from typing import List, Dict, Set
 
+from hcl_parser import parse_file
+from okta_client import OktaSession
+
 
 class OktaAdminProtector:
     """Protect super admin users from Terraform management"""
@@ -24,13 +25,7 @@ class OktaAdminProtector:
     def __init__(self, org_name: str, base_url: str, api_token: str):
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
     def get_super_admins(self) -> Set[str]:
         """Get all users with super admin role"""
@@ -55,13 +50,9 @@ class OktaAdminProtector:
 
         # Get users assigned to super admin role
         url = f"{self.base_url}/api/v1/iam/roles/{super_admin_role}/users"
-        response = self.session.get(url)
-        response.raise_for_status()
-
-        admin_users = response.json()
         admin_logins = set()
 
-        for user in admin_users:
+        for user in self.session.paginate(url):
             login = user.get('profile', {}).get('login') or user.get('email')
             if login:
                 admin_logins.add(login)
@@ -75,14 +66,11 @@ class OktaAdminProtector:
 
         url = f"{self.base_url}/api/v1/users"
         params = {"limit": 200}
-        response = self.session.get(url, params=params)
-        response.raise_for_status()
 
         admin_logins = set()
-        users = response.json()
 
-        # Check each user's roles
-        for user in users:
+        # Check each user's roles (streams every page of users)
+        for user in self.session.paginate(url, params):
             user_id = user.get('id')
             login = user.get('profile', {}).get('login')
 
@@ -102,51 +90,17 @@ class OktaAdminProtector:
 
     def parse_terraform_users(self, tf_file: str) -> List[Dict]:
         """Parse Terraform user resources from file"""
-        with open(tf_file, 'r') as f:
-            content = f.read()
-
-        # Parse user resources by finding balanced braces
         users = []
-        lines = content.split('\n')
-        i = 0
-
-        while i < len(lines):
-            line = lines[i]
-
-            # Look for resource "okta_user"
-            resource_match = re.match(r'resource\s+"okta_user"\s+"([^"]+)"\s+\{', line)
-            if resource_match:
-                resource_name = resource_match.group(1)
-                resource_lines = [line]
-                brace_count = 1
-                i += 1
-
-                # Collect lines until braces are balanced
-                while i < len(lines) and brace_count > 0:
-                    current_line = lines[i]
-                    resource_lines.append(current_line)
-
-                    # Count braces (simple approach)
-                    brace_count += current_line.count('{')
-                    brace_count -= current_line.count('}')
-                    i += 1
-
-                full_block = '\n'.join(resource_lines)
-
-                # Extract login (email)
-                login_match = re.search(r'login\s*=\s*"([^"]+)"', full_block)
-                email_match = re.search(r'email\s*=\s*"([^"]+)"', full_block)
-
-                login = login_match.group(1) if login_match else None
-                email = email_match.group(1) if email_match else None
-
-                users.append({
-                    'resource_name': resource_name,
-                    'login': login or email,
-                    'full_block': full_block
-                })
-            else:
-                i += 1
+        for block in parse_file(tf_file).resources("okta_user"):
+            # Extract login (email)
+            login = block.string("login")
+            email = block.string("email")
+
+            users.append({
+                'resource_name': block.labels[1],
+                'login': login or email,
+                'full_block': block.text
+            })
 
         return users
 
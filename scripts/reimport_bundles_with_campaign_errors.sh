@@ -3,13 +3,18 @@
 # Script to remove and re-import entitlement bundles that have stale campaign associations
 # causing "Error reading campaign: 404" during terraform refresh
 #
-# Usage: ./reimport_bundles_with_campaign_errors.sh [environment]
+# Usage: ./reimport_bundles_with_campaign_errors.sh [environment] [--import-blocks]
 # Example: ./reimport_bundles_with_campaign_errors.sh lowerdecklabs
 #
+# With --import-blocks, step 2 writes Terraform 1.5+ import blocks to
+# reimport_bundles.tf and imports all bundles in a single 'terraform apply'
+# instead of running one 'terraform import' per bundle.
+#
 
 set -e
 
 ENVIRONMENT=${1:-lowerdecklabs}
+IMPORT_MODE=${2:-}
 TERRAFORM_DIR="$(dirname "$0")/../environments/${ENVIRONMENT}/terraform"
 
 if [ ! -d "$TERRAFORM_DIR" ]; then
@@ -55,12 +60,32 @@ echo ""
 
 # Step 2: Re-import
 echo "📥 Step 2: Re-importing bundles with fresh state..."
-for bundle in "${BUNDLES_TO_REIMPORT[@]}"; do
-    resource_name="${bundle%%:*}"
-    bundle_id="${bundle##*:}"
-    echo "   Importing: $resource_name (ID: $bundle_id)"
-    terraform import "$resource_name" "$bundle_id" 2>&1 | tail -1
-done
+if [ "$IMPORT_MODE" = "--import-blocks" ]; then
+    IMPORT_FILE="reimport_bundles.tf"
+    # Never leave the import blocks in the root module, even if apply fails
+    trap 'rm -f "$IMPORT_FILE"' EXIT
+    echo "# Terraform import blocks (requires Terraform >= 1.5)" > "$IMPORT_FILE"
+    echo "# Generated by reimport_bundles_with_campaign_errors.sh" >> "$IMPORT_FILE"
+    for bundle in "${BUNDLES_TO_REIMPORT[@]}"; do
+        resource_name="${bundle%%:*}"
+        bundle_id="${bundle##*:}"
+        printf '\nimport {\n  to = %s\n  id = "%s"\n}\n' "$resource_name" "$bundle_id" >> "$IMPORT_FILE"
+    done
+    echo "   Wrote ${#BUNDLES_TO_REIMPORT[@]} import blocks to $IMPORT_FILE"
+    TARGETS=()
+    for bundle in "${BUNDLES_TO_REIMPORT[@]}"; do
+        TARGETS+=("-target=${bundle%%:*}")
+    done
+    # Review the plan: it should only show imports for these bundles
+    terraform apply "${TARGETS[@]}"
+else
+    for bundle in "${BUNDLES_TO_REIMPORT[@]}"; do
+        resource_name="${bundle%%:*}"
+        bundle_id="${bundle##*:}"
+        echo "   Importing: $resource_name (ID: $bundle_id)"
+        terraform import "$resource_name" "$bundle_id" 2>&1 | tail -1
+    done
+fi
 echo "✅ Import complete"
 echo ""
 
@@ -18,11 +18,12 @@ Usage:
 import os
 import sys
 import json
-import requests
 import argparse
 from typing import Dict, List
 from datetime import datetime
 
+from okta_client import OktaSession
+
 
 class LabelMappingSync:
     """Syncs label mappings from Okta to local config"""
@@ -31,13 +32,7 @@ class LabelMappingSync:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
     def get_all_labels(self) -> List[Dict]:
         """Query all labels from Okta"""
@@ -45,10 +40,7 @@ class LabelMappingSync:
         url = f"{self.governance_base}/labels"
 
         try:
-            response = self.session.get(url)
-            response.raise_for_status()
-            data = response.json()
-            labels = data.get("data", [])
+            labels = list(self.session.paginate(url))
             print(f"  ✅ Found {len(labels)} labels")
             return labels
         except Exception as e:
@@ -62,10 +54,7 @@ class LabelMappingSync:
         params = {"limit": 200}
 
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            assignments = data.get("data", [])
+            assignments = list(self.session.paginate(url, params))
             print(f"  ✅ Found {len(assignments)} assignments")
             return assignments
         except Exception as e:
@@ -9,16 +9,69 @@ Usage:
     python3 scripts/sync_owner_mappings.py
     python3 scripts/sync_owner_mappings.py --output config/owner_mappings.json
     python3 scripts/sync_owner_mappings.py --resource-orns <orn1> <orn2> <orn3>
+    python3 scripts/sync_owner_mappings.py --incremental
+    python3 scripts/sync_owner_mappings.py --incremental --full-sync-after 1
+
+--incremental skips resources whose lastUpdated is unchanged. Editing a
+resource's owners does not change its lastUpdated, so an incremental sync
+falls back to a full sync once the last full one is older than
+--full-sync-after days (default: 7).
+
+An interrupted sync leaves <output>.checkpoint behind; rerunning the same
+command resumes from it (use --restart to start over).
 """
 
 import os
 import sys
 import json
-import time
 import requests
 import argparse
-from typing import Dict, List
-from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from okta_client import OktaSession, fan_out
+
+
+# Incremental syncs cannot see owner-only edits; force a full sync this often
+DEFAULT_FULL_SYNC_MAX_AGE_DAYS = 7
+
+
+class SyncCheckpoint:
+    """
+    Append-only record of resources whose owners have been synced.
+
+    One JSON object per line: {"resource_orn", "resource_type", "entry"}. A
+    rerun after a crash loads it and only queries the remaining resources.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, Tuple[Optional[str], Optional[Dict]]]:
+        """Map ORN -> (resource_type, entry) for every completed resource"""
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partially written last line from a crash
+                completed[record["resource_orn"]] = (record.get("resource_type"), record.get("entry"))
+        return completed
+
+    def record(self, resource_orn: str, resource_type: Optional[str], entry: Optional[Dict]):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({
+                "resource_orn": resource_orn,
+                "resource_type": resource_type,
+                "entry": entry
+            }) + "\n")
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class OwnerMappingSync:
@@ -29,20 +82,17 @@ class OwnerMappingSync:
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
         self.api_base = f"{self.base_url}/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
+        self.resource_versions: Dict[str, str] = {}
+        self.failed_resources: List[str] = []
 
     def get_resource_owners(self, resource_orn: str) -> List[Dict]:
         """
-        Query owners for a specific resource with retry logic and rate limiting.
+        Query owners for a specific resource.
 
-        Implements exponential backoff for 429 (rate limit) errors and
-        adds a small delay between requests to prevent hitting rate limits.
+        Pacing, retries and 429 backoff are handled by the shared OktaSession,
+        whose rate limiter spreads these calls across the resource-owners
+        rate-limit window. Errors other than 400/404 are raised.
         """
         url = f"{self.governance_base}/resource-owners"
         filter_expr = f'parentResourceOrn eq "{resource_orn}"'
@@ -51,121 +101,69 @@ class OwnerMappingSync:
             "limit": 200
         }
 
-        max_retries = 3
-        base_delay = 1  # Start with 1 second delay
-
-        for attempt in range(max_retries):
-            try:
-                # Add small delay before each request to avoid rate limits
-                if attempt > 0:
-                    # Exponential backoff: 1s, 2s, 4s
-                    delay = base_delay * (2 ** attempt)
-                    print(f"  ⏳ Retry {attempt}/{max_retries} after {delay}s delay...")
-                    time.sleep(delay)
-                else:
-                    # Small delay even on first attempt to space out requests
-                    time.sleep(0.1)
-
-                response = self.session.get(url, params=params, timeout=30)
-                response.raise_for_status()
-                data = response.json()
-                return data.get("data", [])
-
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 404:
-                    # Resource owners not available or resource not found
-                    return []
-                elif e.response.status_code == 429:
-                    # Rate limit hit - retry with backoff
-                    if attempt < max_retries - 1:
-                        retry_after = e.response.headers.get('Retry-After', base_delay * (2 ** attempt))
-                        try:
-                            retry_after = int(retry_after)
-                        except ValueError:
-                            retry_after = base_delay * (2 ** attempt)
-                        print(f"  ⚠️  Rate limit hit for {resource_orn}, retrying after {retry_after}s...")
-                        time.sleep(retry_after)
-                        continue
-                    else:
-                        print(f"  ❌ Rate limit persists for {resource_orn} after {max_retries} retries")
-                        return []
-                elif e.response.status_code == 400:
-                    # Bad request - likely invalid filter or resource doesn't support owners
-                    return []
-                else:
-                    print(f"  ⚠️  Error querying owners for {resource_orn}: {e}")
-                    return []
-
-            except requests.exceptions.Timeout:
-                print(f"  ⚠️  Timeout querying owners for {resource_orn}")
-                if attempt < max_retries - 1:
-                    continue
-                return []
+        try:
+            return list(self.session.paginate(url, params))
 
-            except Exception as e:
-                print(f"  ⚠️  Error: {e}")
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code in [400, 404]:
+                # Resource owners not available, resource not found, or
+                # resource doesn't support owners
                 return []
+            # Anything else (429 after retries, 5xx) is left to the caller so
+            # the resource is retried on the next run instead of saved as ownerless
+            raise
 
-        return []
+    def get_all_apps(self) -> Iterator[Dict]:
+        """
+        Stream all applications from Okta, following pagination.
 
-    def get_all_apps(self) -> List[Dict]:
-        """Query all applications from Okta"""
+        Errors are raised, even mid-listing: a truncated listing must not be
+        saved as if the missing resources were gone.
+        """
         print("Querying applications...")
         url = f"{self.api_base}/apps"
         params = {"limit": 200}
 
-        all_apps = []
-        try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            apps = response.json()
-            all_apps.extend(apps)
-            print(f"  ✅ Found {len(apps)} apps")
-            return all_apps
-        except Exception as e:
-            print(f"  ⚠️  Error querying apps: {e}")
-            return []
+        count = 0
+        for app in self.session.paginate(url, params):
+            count += 1
+            yield app
+        print(f"  ✅ Found {count} apps")
 
-    def get_all_groups(self) -> List[Dict]:
-        """Query all groups from Okta"""
+    def get_all_groups(self) -> Iterator[Dict]:
+        """Stream all groups from Okta, following pagination (errors are raised)"""
         print("Querying groups...")
         url = f"{self.api_base}/groups"
         params = {"limit": 200}
 
-        all_groups = []
-        try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            groups = response.json()
-            all_groups.extend(groups)
-            print(f"  ✅ Found {len(groups)} groups")
-            return all_groups
-        except Exception as e:
-            print(f"  ⚠️  Error querying groups: {e}")
-            return []
+        count = 0
+        for group in self.session.paginate(url, params):
+            count += 1
+            yield group
+        print(f"  ✅ Found {count} groups")
 
-    def get_all_entitlement_bundles(self) -> List[Dict]:
-        """Query all entitlement bundles from Okta"""
+    def get_all_entitlement_bundles(self) -> Iterator[Dict]:
+        """
+        Stream all entitlement bundles from Okta, following pagination.
+
+        A 404 on the first page means OIG is not enabled and yields nothing;
+        any other error is raised.
+        """
         print("Querying entitlement bundles...")
         url = f"{self.governance_base}/entitlement-bundles"
         params = {"limit": 200}
 
+        count = 0
         try:
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            bundles = data.get("data", [])
-            print(f"  ✅ Found {len(bundles)} entitlement bundles")
-            return bundles
+            for bundle in self.session.paginate(url, params):
+                count += 1
+                yield bundle
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
+            if count == 0 and e.response is not None and e.response.status_code == 404:
                 print(f"  ℹ️  Entitlement bundles not available (OIG may not be enabled)")
-                return []
-            print(f"  ⚠️  Error querying entitlement bundles: {e}")
-            return []
-        except Exception as e:
-            print(f"  ⚠️  Error: {e}")
-            return []
+                return
+            raise
+        print(f"  ✅ Found {count} entitlement bundles")
 
     def build_orn(self, resource_id: str, resource_type: str, app_type: str = None) -> str:
         """Build Okta Resource Name (ORN)"""
@@ -182,8 +180,20 @@ class OwnerMappingSync:
         else:
             return resource_id
 
-    def sync_resource_owners(self, resource_orns: List[str] = None) -> Dict:
-        """Sync resource owners from Okta"""
+    def sync_resource_owners(self, resource_orns: List[str] = None,
+                             checkpoint: Optional["SyncCheckpoint"] = None,
+                             previous: Optional[Dict] = None) -> Dict:
+        """
+        Sync resource owners from Okta.
+
+        Args:
+            resource_orns: Only sync these resources (default: all apps, groups and bundles)
+            checkpoint: Resume from / record completed resources in this checkpoint
+            previous: Last owner_mappings.json; resources whose lastUpdated is
+                      unchanged since then reuse its owners (incremental mode).
+                      Owner changes alone do not bump lastUpdated, so these
+                      owners may be stale until the next full sync.
+        """
         print("="*80)
         print("SYNC RESOURCE OWNER MAPPINGS FROM OKTA")
         print("="*80)
@@ -194,59 +204,147 @@ class OwnerMappingSync:
             "groups": [],
             "entitlement_bundles": []
         }
+        self.resource_versions = {}
+        self.failed_resources = []
 
         if resource_orns:
             # Sync specific resources provided by user
             print(f"Syncing owners for {len(resource_orns)} specified resources...")
-            for orn in resource_orns:
-                self._sync_single_resource(orn, assignments)
+            resources = ({"resource_orn": orn} for orn in resource_orns)
         else:
             # Sync all resources
             print("Syncing owners for all resources (apps, groups, entitlement bundles)...")
-
-            # Sync apps
-            apps = self.get_all_apps()
-            for app in apps:
-                app_id = app.get("id")
-                app_name = app.get("label", app.get("name", "Unknown"))
-                app_sign_on_mode = app.get("signOnMode", "oauth2")
-
-                # Map signOnMode to app type for ORN
-                app_type_map = {
-                    "SAML_2_0": "saml2",
-                    "OPENID_CONNECT": "oauth2",
-                    "AUTO_LOGIN": "swa",
-                    "BROWSER_PLUGIN": "swa"
-                }
-                app_type = app_type_map.get(app_sign_on_mode, "oauth2")
-
-                orn = self.build_orn(app_id, "app", app_type)
-                self._sync_single_resource(orn, assignments, resource_name=app_name, resource_type_override="apps", app_type=app_type)
-
-            # Sync groups
-            groups = self.get_all_groups()
-            for group in groups:
-                group_id = group.get("id")
-                group_name = group.get("profile", {}).get("name", "Unknown")
-                orn = self.build_orn(group_id, "group")
-                self._sync_single_resource(orn, assignments, resource_name=group_name, resource_type_override="groups")
-
-            # Sync entitlement bundles
-            bundles = self.get_all_entitlement_bundles()
-            for bundle in bundles:
-                bundle_id = bundle.get("bundleId")
-                bundle_name = bundle.get("name", "Unknown")
-                orn = self.build_orn(bundle_id, "entitlement_bundle")
-                self._sync_single_resource(orn, assignments, resource_name=bundle_name, resource_type_override="entitlement_bundles")
+            resources = self._iter_all_resources()
+
+        completed = checkpoint.load() if checkpoint else {}
+        if completed:
+            print(f"Resuming from checkpoint: {len(completed)} resources already synced")
+        unchanged = self._unchanged_resources(previous) if previous else {}
+        reused = {"checkpoint": 0, "incremental": 0}
+
+        def fetch(resource: Dict) -> Optional[List[Dict]]:
+            orn = resource["resource_orn"]
+            if orn in completed:
+                return None
+            if orn in unchanged and unchanged[orn][0] == resource.get("last_updated"):
+                return None
+            return self.get_resource_owners(orn)
+
+        # Owner lookups run concurrently; results are recorded in discovery order
+        owners_url = f"{self.governance_base}/resource-owners"
+        for result in fan_out(fetch, resources, session=self.session, url=owners_url):
+            resource = dict(result.item)
+            orn = resource["resource_orn"]
+            last_updated = resource.pop("last_updated", None)
+
+            if result.error:
+                # No version is recorded, so the next incremental run fetches it again
+                print(f"  ⚠️  Error querying owners for {orn}: {result.error}")
+                self.failed_resources.append(orn)
+                continue
+
+            if last_updated:
+                self.resource_versions[orn] = last_updated
+
+            if result.result is None:
+                # Reused from the checkpoint or the previous mappings file
+                source = "checkpoint" if orn in completed else "incremental"
+                resource_type, entry = completed[orn] if orn in completed else unchanged[orn][1:]
+                reused[source] += 1
+            else:
+                resource_type, entry = self._build_owner_entry(owners_data=result.result, **resource)
+
+            if entry and resource_type:
+                assignments[resource_type].append(entry)
+            if checkpoint and orn not in completed:
+                checkpoint.record(orn, resource_type, entry)
+
+        if reused["checkpoint"]:
+            print(f"  ↩️  Reused {reused['checkpoint']} resources from checkpoint")
+        if reused["incremental"]:
+            print(f"  ↩️  Skipped {reused['incremental']} resources unchanged since last sync")
+        if self.failed_resources:
+            print(f"  ⚠️  {len(self.failed_resources)} resources failed and will be retried on the next run")
 
         return assignments
 
-    def _sync_single_resource(self, resource_orn: str, assignments: Dict, resource_name: str = None, resource_type_override: str = None, app_type: str = None):
-        """Sync owners for a single resource"""
-        owners_data = self.get_resource_owners(resource_orn)
+    @staticmethod
+    def _full_sync_due(last_full_sync: Optional[str], max_age_days: float) -> bool:
+        """True if there was no full sync yet or it is older than max_age_days"""
+        if not last_full_sync:
+            return True
+        try:
+            synced_at = datetime.fromisoformat(last_full_sync.rstrip("Z"))
+        except ValueError:
+            return True
+        return datetime.utcnow() - synced_at > timedelta(days=max_age_days)
+
+    def _unchanged_resources(self, previous: Dict) -> Dict[str, tuple]:
+        """Map ORN -> (lastUpdated, resource_type, entry) from a previous owner_mappings.json"""
+        versions = previous.get("resource_versions", {})
+        entries = {}
+        for resource_type, resource_entries in previous.get("assignments", {}).items():
+            for entry in resource_entries:
+                entries[entry.get("resource_orn")] = (resource_type, entry)
+
+        # Resources without owners only appear in resource_versions
+        return {
+            orn: (last_updated,) + entries.get(orn, (None, None))
+            for orn, last_updated in versions.items()
+        }
+
+    def _iter_all_resources(self) -> Iterator[Dict]:
+        """Yield _build_owner_entry arguments (plus last_updated) for every app, group and entitlement bundle"""
+        # Map signOnMode to app type for ORN
+        app_type_map = {
+            "SAML_2_0": "saml2",
+            "OPENID_CONNECT": "oauth2",
+            "AUTO_LOGIN": "swa",
+            "BROWSER_PLUGIN": "swa"
+        }
+
+        # Sync apps
+        for app in self.get_all_apps():
+            app_id = app.get("id")
+            app_name = app.get("label", app.get("name", "Unknown"))
+            app_sign_on_mode = app.get("signOnMode", "oauth2")
+            app_type = app_type_map.get(app_sign_on_mode, "oauth2")
+
+            yield {
+                "resource_orn": self.build_orn(app_id, "app", app_type),
+                "resource_name": app_name,
+                "resource_type_override": "apps",
+                "app_type": app_type,
+                "last_updated": app.get("lastUpdated")
+            }
 
+        # Sync groups
+        for group in self.get_all_groups():
+            group_id = group.get("id")
+            group_name = group.get("profile", {}).get("name", "Unknown")
+            yield {
+                "resource_orn": self.build_orn(group_id, "group"),
+                "resource_name": group_name,
+                "resource_type_override": "groups",
+                "last_updated": group.get("lastUpdated")
+            }
+
+        # Sync entitlement bundles
+        for bundle in self.get_all_entitlement_bundles():
+            bundle_id = bundle.get("bundleId")
+            bundle_name = bundle.get("name", "Unknown")
+            yield {
+                "resource_orn": self.build_orn(bundle_id, "entitlement_bundle"),
+                "resource_name": bundle_name,
+                "resource_type_override": "entitlement_bundles",
+                "last_updated": bundle.get("lastUpdated")
+            }
+
+    def _build_owner_entry(self, resource_orn: str, owners_data: List[Dict], resource_name: str = None,
+                           resource_type_override: str = None, app_type: str = None) -> Tuple[Optional[str], Optional[Dict]]:
+        """Build the owner_mappings entry for one resource: (resource type, entry or None if no owners)"""
         if not owners_data:
-            return
+            return None, None
 
         # Determine resource type from ORN
         if resource_type_override:
@@ -258,7 +356,7 @@ class OwnerMappingSync:
         elif ":entitlement-bundles:" in resource_orn:
             resource_type = "entitlement_bundles"
         else:
-            return
+            return None, None
 
         # Extract owner information
         owners = []
@@ -293,18 +391,24 @@ class OwnerMappingSync:
             if resource_type == "apps":
                 resource_entry["resource_type"] = app_type or "oauth2"
 
-            assignments[resource_type].append(resource_entry)
             print(f"  ✅ {resource_name or resource_orn}: {len(owners)} owner(s)")
+            return resource_type, resource_entry
+
+        return resource_type, None
 
-    def save_mappings(self, assignments: Dict, output_file: str):
+    def save_mappings(self, assignments: Dict, output_file: str, last_full_sync: Optional[str] = None):
         """Save owner mappings to file"""
         print(f"\nSaving owner mappings to {output_file}...")
 
         mappings = {
             "description": "Resource Owner mappings synced from Okta OIG",
             "last_synced": datetime.utcnow().isoformat() + "Z",
+            # When every resource's owners were last queried, used by --incremental
+            "last_full_sync": last_full_sync,
             "version": "1.0",
             "assignments": assignments,
+            # lastUpdated of every synced resource, used by --incremental
+            "resource_versions": dict(sorted(self.resource_versions.items())),
             "notes": [
                 "This file is the source of truth for resource owner assignments",
                 "To add a new owner assignment, submit a PR adding the owner to the appropriate resource",
@@ -326,13 +430,54 @@ class OwnerMappingSync:
 
         return mappings
 
-    def sync(self, output_file: str, resource_orns: List[str] = None) -> bool:
-        """Run the complete sync process"""
+    def sync(self, output_file: str, resource_orns: List[str] = None,
+             checkpoint_file: Optional[str] = None, incremental: bool = False,
+             full_sync_max_age_days: float = DEFAULT_FULL_SYNC_MAX_AGE_DAYS) -> bool:
+        """
+        Run the complete sync process
+
+        With incremental, a full sync still runs when the last one is older
+        than full_sync_max_age_days, so owner-only edits are eventually picked up.
+        """
+        checkpoint = SyncCheckpoint(checkpoint_file) if checkpoint_file else None
+
+        previous = None
+        if incremental:
+            if os.path.exists(output_file):
+                with open(output_file, 'r') as f:
+                    previous = json.load(f)
+                if not previous.get("resource_versions"):
+                    print("ℹ️  Previous mappings have no resource versions; running a full sync")
+                    previous = None
+                elif self._full_sync_due(previous.get("last_full_sync"), full_sync_max_age_days):
+                    print(f"ℹ️  Last full sync is older than {full_sync_max_age_days:g} days; running a full sync")
+                    previous = None
+            else:
+                print(f"ℹ️  {output_file} not found; running a full sync")
+
+        if previous is not None:
+            last_full_sync = previous.get("last_full_sync")
+        elif not resource_orns:
+            last_full_sync = datetime.utcnow().isoformat() + "Z"
+        else:
+            last_full_sync = None
+
         # Sync owners
-        assignments = self.sync_resource_owners(resource_orns)
+        try:
+            assignments = self.sync_resource_owners(resource_orns, checkpoint=checkpoint, previous=previous)
+        except Exception as e:
+            # Listing apps, groups or bundles failed: saving now would drop every
+            # resource not yet discovered. Resources synced so far stay in the checkpoint.
+            print(f"\n❌ Error discovering resources: {e}")
+            print(f"   {output_file} was not updated; rerun to resume from the checkpoint")
+            return False
 
         # Save to file
-        mappings = self.save_mappings(assignments, output_file)
+        mappings = self.save_mappings(assignments, output_file, last_full_sync=last_full_sync)
+
+        # Keep the checkpoint while resources still need a retry
+        if checkpoint and not self.failed_resources:
+            checkpoint.clear()
 
         # Summary
         total_apps = len(assignments["apps"])
@@ -347,10 +492,12 @@ class OwnerMappingSync:
         print(f"  Groups with owners: {total_groups}")
         print(f"  Entitlement bundles with owners: {total_bundles}")
         print(f"  Total resources with owners: {total_resources}")
+        if self.failed_resources:
+            print(f"  Failed resources: {len(self.failed_resources)} (rerun to resume from checkpoint)")
         print(f"  Output file: {output_file}")
         print("="*80)
 
-        return True
+        return not self.failed_resources
 
 
 def main():
@@ -382,6 +529,31 @@ def main():
         nargs="+",
         help="Specific resource ORNs to sync (optional, syncs all if not provided)"
     )
+    parser.add_argument(
+        "--checkpoint",
+        help="Checkpoint file of completed resources (default: <output>.checkpoint); "
+             "an interrupted sync resumes from it"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore any existing checkpoint and sync every resource again"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only query owners of resources whose lastUpdated changed since the last sync of --output. "
+             "Owner-only edits do not change lastUpdated; they are picked up by the next full sync "
+             "(see --full-sync-after)"
+    )
+    parser.add_argument(
+        "--full-sync-after",
+        type=float,
+        default=DEFAULT_FULL_SYNC_MAX_AGE_DAYS,
+        metavar="DAYS",
+        help=f"With --incremental, run a full sync when the last one is older than DAYS "
+             f"(default: {DEFAULT_FULL_SYNC_MAX_AGE_DAYS})"
+    )
 
     args = parser.parse_args()
 
@@ -389,8 +561,14 @@ def main():
         print("Error: OKTA_ORG_NAME and OKTA_API_TOKEN must be set")
         sys.exit(1)
 
+    checkpoint_file = args.checkpoint or f"{args.output}.checkpoint"
+    if args.restart and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
     syncer = OwnerMappingSync(args.org_name, args.base_url, args.api_token)
-    success = syncer.sync(args.output, args.resource_orns)
+    success = syncer.sync(args.output, args.resource_orns,
+                          checkpoint_file=checkpoint_file, incremental=args.incremental,
+                          full_sync_max_age_days=args.full_sync_after)
 
     sys.exit(0 if success else 1)
 
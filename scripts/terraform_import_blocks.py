@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+terraform_import_blocks.py
+
+Renders Terraform 1.5+ import blocks as an alternative to per-resource
+`terraform import` shell commands.
+
+A `terraform import` command starts Terraform, initializes providers and
+locks state for a single resource. Import blocks are planned together, so
+one `terraform plan` / `terraform apply` imports every resource in a single
+process:
+
+    import {
+      to = okta_entitlement_bundle.example
+      id = "enb12pob86e9ExVBm1d7"
+    }
+
+Blocks can be sharded into N files, e.g. to split a large import across
+parallel workspaces.
+
+Usage:
+    from terraform_import_blocks import write_import_blocks
+
+    write_import_blocks([("okta_group.admins", "00g123")], "imported", shards=4)
+"""
+
+import os
+import re
+import json
+from typing import Iterable, List, Optional, Tuple
+
+
+IMPORT_FORMATS = ["script", "blocks"]
+
+_IMPORT_COMMAND = re.compile(r'^\s*terraform\s+import\s+(\S+)\s+(\S+)\s*$')
+
+
+def parse_import_command(line: str) -> Optional[Tuple[str, str]]:
+    """(address, id) from a `terraform import <address> <id>` line, or None for other lines"""
+    match = _IMPORT_COMMAND.match(line)
+    if not match:
+        return None
+    import_id = match.group(2)
+    if len(import_id) > 1 and import_id[0] == import_id[-1] and import_id[0] in "'\"":
+        import_id = import_id[1:-1]
+    return match.group(1), import_id
+
+
+def format_import_block(address: str, import_id: str) -> str:
+    """Render one import block"""
+    return f'import {{\n  to = {address}\n  id = {json.dumps(import_id)}\n}}\n'
+
+
+def shard(items: List, shards: int) -> List[List]:
+    """Split items into at most `shards` contiguous, evenly sized chunks (order preserved)"""
+    shards = max(1, min(shards, len(items)))
+    size, extra = divmod(len(items), shards)
+    chunks = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+def remove_import_blocks(output_dir: str, file_prefix: str = "imports") -> List[str]:
+    """Delete <file_prefix>.tf and <file_prefix>_NN.tf from output_dir; returns the paths removed"""
+    if not os.path.isdir(output_dir):
+        return []
+    name_pattern = re.compile(rf'^{re.escape(file_prefix)}(_\d+)?\.tf$')
+    removed = []
+    for name in sorted(os.listdir(output_dir)):
+        if name_pattern.match(name):
+            path = os.path.join(output_dir, name)
+            os.remove(path)
+            removed.append(path)
+    return removed
+
+
+def write_import_blocks(imports: Iterable[Tuple[str, str]], output_dir: str, shards: int = 1,
+                        file_prefix: str = "imports") -> List[str]:
+    """
+    Write import blocks to <file_prefix>.tf, or <file_prefix>_01.tf ... when sharded
+
+    Args:
+        imports: (resource address, import ID) pairs; duplicate addresses keep the first ID
+        output_dir: Directory to write the files to
+        shards: Number of files to split the blocks across
+        file_prefix: File name prefix
+
+    Returns: Paths of the files written (none, with stale files removed, if there are no imports)
+    """
+    unique = {}
+    for address, import_id in imports:
+        unique.setdefault(address, import_id)
+
+    # Files left over from a previous run (another shard count, or imports that
+    # are gone entirely) would otherwise still be planned
+    remove_import_blocks(output_dir, file_prefix)
+    if not unique:
+        return []
+
+    chunks = shard(list(unique.items()), shards)
+    os.makedirs(output_dir, exist_ok=True)
+
+    written = []
+    for number, chunk in enumerate(chunks, 1):
+        name = f"{file_prefix}.tf" if len(chunks) == 1 else f"{file_prefix}_{number:02d}.tf"
+        path = os.path.join(output_dir, name)
+        with open(path, 'w') as f:
+            f.write("# Terraform import blocks (requires Terraform >= 1.5)\n")
+            if len(chunks) > 1:
+                f.write(f"# Shard {number} of {len(chunks)}\n")
+            f.write("# Run 'terraform plan' to review, then 'terraform apply' to import.\n")
+            for address, import_id in chunk:
+                f.write("\n" + format_import_block(address, import_id))
+        written.append(path)
+    return written
@@ -0,0 +1,126 @@
+import json
+import threading
+
+import requests
+from requests.adapters import BaseAdapter
+
+from apply_resource_owners import OWNER_ASSIGNMENT_CHUNK_SIZE, ResourceOwnerApplier
+
+OWNERS_URL = "https://example.okta.com/governance/api/v1/resource-owners"
+
+
+class RecordingTransport(BaseAdapter):
+    """Answers PUTs with 200 (400 if the payload names a failing ORN) and records each payload"""
+
+    def __init__(self, failing_orns=()):
+        super().__init__()
+        self.failing_orns = set(failing_orns)
+        self.payloads = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        body = json.loads(request.body)
+        with self._lock:
+            self.payloads.append((request.method, request.url, body))
+        response = requests.Response()
+        failed = self.failing_orns.intersection(body["resourceOrns"])
+        response.status_code = 400 if failed else 200
+        response._content = b'{"errorSummary": "bad resource"}' if failed else b"{}"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _applier(transport=None, dry_run=False):
+    applier = ResourceOwnerApplier("example", "okta.com", "token", dry_run=dry_run)
+    if transport:
+        applier.session.mount("https://", transport)
+    return applier
+
+
+def _assignment(orn, *principal_orns, name=None):
+    return {
+        "resource_orn": orn,
+        "resource_name": name or orn,
+        "owners": [{"principal_orn": p, "principal_name": p, "principal_type": "user"} for p in principal_orns],
+    }
+
+
+def test_owner_sets_differing_only_in_order_share_a_group():
+    assignments = {
+        "apps": [_assignment("orn:app:1", "orn:user:b", "orn:user:a")],
+        "groups": [_assignment("orn:group:1", "orn:user:a", "orn:user:b", "orn:user:a")],
+        "entitlement_bundles": [_assignment("orn:bundle:1", "orn:user:a")],
+    }
+
+    chunks = _applier().group_by_owner_set(assignments)
+
+    assert chunks == [
+        (["orn:user:a", "orn:user:b"], [
+            {"resource_type": "apps", "resource_orn": "orn:app:1", "resource_name": "orn:app:1"},
+            {"resource_type": "groups", "resource_orn": "orn:group:1", "resource_name": "orn:group:1"},
+        ]),
+        (["orn:user:a"], [
+            {"resource_type": "entitlement_bundles", "resource_orn": "orn:bundle:1", "resource_name": "orn:bundle:1"},
+        ]),
+    ]
+
+
+def test_resources_without_owners_are_skipped():
+    assignments = {"apps": [_assignment("orn:app:1"), _assignment("orn:app:2", "orn:user:a")]}
+
+    chunks = _applier().group_by_owner_set(assignments)
+
+    assert [[r["resource_orn"] for r in resources] for _, resources in chunks] == [["orn:app:2"]]
+
+
+def test_more_than_chunk_size_resources_are_split():
+    orns = [f"orn:group:{i}" for i in range(OWNER_ASSIGNMENT_CHUNK_SIZE + 1)]
+    assignments = {"groups": [_assignment(orn, "orn:user:a") for orn in orns]}
+
+    chunks = _applier().group_by_owner_set(assignments)
+
+    assert [len(resources) for _, resources in chunks] == [OWNER_ASSIGNMENT_CHUNK_SIZE, 1]
+    assert [r["resource_orn"] for _, resources in chunks for r in resources] == orns
+
+
+def test_apply_reports_one_result_per_resource():
+    group_orns = [f"orn:group:{i}" for i in range(OWNER_ASSIGNMENT_CHUNK_SIZE + 1)]
+    assignments = {
+        "apps": [_assignment("orn:app:1", "orn:user:a", name="App One")],
+        "groups": [_assignment(orn, "orn:user:a") for orn in group_orns],
+        "entitlement_bundles": [_assignment("orn:bundle:1", "orn:user:b")],
+    }
+    transport = RecordingTransport(failing_orns=["orn:bundle:1"])
+
+    results = _applier(transport).apply_all_owners(assignments)
+
+    assert {(method, url) for method, url, _ in transport.payloads} == {("PUT", OWNERS_URL)}
+    assert sorted(len(body["resourceOrns"]) for _, _, body in transport.payloads) == [
+        1, 2, OWNER_ASSIGNMENT_CHUNK_SIZE
+    ]
+    assert results["apps"] == [
+        {"status": "success", "assigned": 1, "resource_name": "App One", "resource_orn": "orn:app:1"}
+    ]
+    assert [r["resource_orn"] for r in results["groups"]] == group_orns
+    assert all(r["status"] == "success" for r in results["groups"])
+    assert results["entitlement_bundles"] == [
+        {"status": "error", "error": "bad resource", "resource_name": "orn:bundle:1", "resource_orn": "orn:bundle:1"}
+    ]
+    assert results["summary"] == {
+        "total": len(group_orns) + 2, "success": len(group_orns) + 1, "errors": 1, "requests": 3, "dry_run": False
+    }
+
+
+def test_dry_run_sends_nothing():
+    transport = RecordingTransport()
+    assignments = {"apps": [_assignment("orn:app:1", "orn:user:a")]}
+
+    results = _applier(transport, dry_run=True).apply_all_owners(assignments)
+
+    assert transport.payloads == []
+    assert results["apps"][0]["status"] == "dry_run"
+    assert results["summary"]["success"] == 1
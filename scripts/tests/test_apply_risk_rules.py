@@ -0,0 +1,85 @@
+from apply_risk_rules import RiskRuleApplier, normalize_risk_rule, risk_rule_hash
+
+
+CONFIG_RULE = {
+    "name": "Change Management Conflict",
+    "description": "Approvers should not implement changes",
+    "notes": [],
+    "type": "SEPARATION_OF_DUTIES",
+    "resources": [
+        {"resourceOrn": "orn:okta:idp:00o1:apps:servicenow_ud:0oa2"},
+        {"resourceOrn": "orn:okta:idp:00o1:apps:servicenow_ud:0oa1"}
+    ],
+    "conflictCriteria": {
+        "and": [
+            {"name": "List 1", "attribute": "principal.effective_grants", "operation": "CONTAINS_ALL"},
+            {"name": "List 2", "attribute": "principal.effective_grants", "operation": "CONTAINS_ALL"}
+        ]
+    }
+}
+
+API_RULE = {
+    "id": "rsk1",
+    "status": "ACTIVE",
+    "created": "2025-01-01T00:00:00.000Z",
+    "_links": {"self": {"href": "https://example.okta.com/governance/api/v1/risk-rules/rsk1"}},
+    "name": "Change Management Conflict",
+    "description": "Approvers should not implement changes",
+    "type": "SEPARATION_OF_DUTIES",
+    "resources": [
+        {"resourceOrn": "orn:okta:idp:00o1:apps:servicenow_ud:0oa1"},
+        {"resourceOrn": "orn:okta:idp:00o1:apps:servicenow_ud:0oa2"}
+    ],
+    "conflictCriteria": {
+        "and": [
+            {"operation": "CONTAINS_ALL", "attribute": "principal.effective_grants", "name": "List 2"},
+            {"operation": "CONTAINS_ALL", "attribute": "principal.effective_grants", "name": "List 1"}
+        ]
+    }
+}
+
+
+def test_empty_values_are_dropped():
+    rule = {"name": "r", "description": "", "notes": None, "resources": [], "conflictCriteria": {}}
+    assert normalize_risk_rule(rule) == {"name": "r"}
+
+
+def test_api_and_config_forms_hash_equal():
+    assert risk_rule_hash(CONFIG_RULE) == risk_rule_hash(API_RULE)
+
+
+def test_empty_field_only_in_api_form_hashes_equal():
+    api_rule = dict(API_RULE, notes="", resources=[])
+    config_rule = {k: v for k, v in CONFIG_RULE.items() if k != "resources"}
+    assert risk_rule_hash(config_rule) == risk_rule_hash(api_rule)
+
+
+def test_content_change_changes_hash():
+    assert risk_rule_hash(dict(CONFIG_RULE, description="Edited")) != risk_rule_hash(API_RULE)
+
+
+def _plan(config_rules, existing_rules, delete_removed=True):
+    applier = RiskRuleApplier("example", "okta.com", "token", dry_run=True)
+    return applier.plan_changes(config_rules, {rule["id"]: rule for rule in existing_rules}, delete_removed)
+
+
+def test_plan_matches_by_name_and_skips_unchanged():
+    changes = _plan([CONFIG_RULE], [API_RULE])
+    assert changes["unchanged"] == 1
+    assert not changes["create"] and not changes["update"] and not changes["delete"]
+
+
+def test_duplicate_names_are_reported_not_collapsed():
+    duplicate = dict(API_RULE, id="rsk2", description="Shadowed copy")
+    changes = _plan([CONFIG_RULE], [API_RULE, duplicate])
+    assert changes["conflicts"] == [{"name": "Change Management Conflict", "ids": ["rsk1", "rsk2"]}]
+    assert not changes["create"] and not changes["update"] and not changes["delete"]
+
+
+def test_metadata_id_resolves_duplicate_names():
+    duplicate = dict(API_RULE, id="rsk2", description="Shadowed copy")
+    config_rule = dict(CONFIG_RULE, _metadata={"id": "rsk2"})
+    changes = _plan([config_rule], [API_RULE, duplicate])
+    assert not changes["conflicts"]
+    assert [item["existing_id"] for item in changes["update"]] == ["rsk2"]
+    assert [item["existing"]["id"] for item in changes["delete"]] == ["rsk1"]
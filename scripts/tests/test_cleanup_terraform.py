@@ -0,0 +1,123 @@
+import json
+
+from cleanup_terraform import TerraformCleaner
+
+
+def test_clean_file_renames_only_real_resource_labels(tmp_path):
+    tf_file = tmp_path / "okta_group" / "group.tf"
+    tf_file.parent.mkdir()
+    tf_file.write_text(
+        'resource "okta_group" "tfer--00g1" {\n'
+        '  description = <<EOT\n'
+        'resource "okta_group" "tfer--00g2" {\n'
+        'EOT\n'
+        '}\n'
+    )
+    content, mapping, _ = TerraformCleaner(str(tmp_path), str(tmp_path / "out")).clean_file_content(tf_file)
+    assert mapping == {"okta_group.tfer--00g1": "okta_group.00g1"}
+    assert 'resource "okta_group" "00g1" {' in content
+    assert 'resource "okta_group" "tfer--00g2" {' in content
+
+
+def test_clean_file_falls_back_when_parser_rejects_file(tmp_path, capsys):
+    tf_file = tmp_path / "okta_group" / "group.tf"
+    tf_file.parent.mkdir()
+    tf_file.write_text('resource "okta_group" "tfer--00g1" {\n  name = "unterminated\n}\n')
+    content, mapping, _ = TerraformCleaner(str(tmp_path), str(tmp_path / "out")).clean_file_content(tf_file)
+    assert mapping == {"okta_group.tfer--00g1": "okta_group.00g1"}
+    assert 'resource "okta_group" "00g1" {' in content
+    assert str(tf_file) in capsys.readouterr().out
+
+
+def _write_fixture(input_dir):
+    """A few resource directories whose files reference resources defined in other files"""
+    for i in range(4):
+        group_dir = input_dir / "okta_group"
+        group_dir.mkdir(parents=True, exist_ok=True)
+        (group_dir / f"group_{i}.tf").write_text(
+            f'resource "okta_group" "tfer--00g{i}" {{\n'
+            f'  name        = "Group {i}"\n'
+            f'  description = "owner{i}@example.com"\n'
+            f'  id          = "00g{i}"\n'
+            f'}}\n'
+        )
+        app_dir = input_dir / "okta_app_oauth"
+        app_dir.mkdir(parents=True, exist_ok=True)
+        (app_dir / f"app_{i}.tf").write_text(
+            f'resource "okta_app_oauth" "tfer--0oa{i}" {{\n'
+            f'  label    = "App {i}"\n'
+            f'  groups   = [okta_group.tfer--00g{(i + 1) % 4}.id]\n'
+            f'  logo_url = null\n'
+            f'}}\n'
+        )
+
+
+def test_parallel_clean_matches_serial(tmp_path):
+    input_dir = tmp_path / "generated"
+    _write_fixture(input_dir)
+
+    cleaned = {}
+    for jobs in (1, 3):
+        cleaner = TerraformCleaner(str(input_dir), str(tmp_path / f"out_{jobs}"), jobs=jobs)
+        files = cleaner.clean_all()
+        cleaned[jobs] = (list(files.items()), cleaner.resource_mapping, cleaner.variables)
+
+    assert cleaned[1] == cleaned[3]
+    serial_files = cleaned[1][0]
+    assert [path.name for path, _ in serial_files][:2] == ["app_0.tf", "app_1.tf"]
+    assert "okta_group.00g1.id" in serial_files[0][1]
+
+
+def test_parallel_run_writes_byte_identical_outputs(tmp_path):
+    input_dir = tmp_path / "generated"
+    _write_fixture(input_dir)
+
+    outputs = {}
+    for jobs in (1, 3):
+        output_dir = tmp_path / f"out_{jobs}"
+        TerraformCleaner(str(input_dir), str(output_dir), jobs=jobs).run()
+        # The summary names the output dir, the only intended difference
+        outputs[jobs] = {
+            str(path.relative_to(output_dir)): path.read_bytes().replace(bytes(output_dir), b"<output>")
+            for path in sorted(output_dir.rglob("*")) if path.is_file()
+        }
+
+    assert outputs[1] == outputs[3]
+
+
+def test_switching_import_format_removes_the_other_format(tmp_path):
+    input_dir = tmp_path / "generated"
+    _write_fixture(input_dir)
+    (input_dir / "okta_group" / "terraform.tfstate").write_text(json.dumps({"resources": [
+        {"type": "okta_group", "instances": [{"attributes": {"id": "00g0", "name": "tfer--00g0"}}]}
+    ]}))
+    output_dir = tmp_path / "out"
+
+    TerraformCleaner(str(input_dir), str(output_dir), import_format="script").run()
+    assert (output_dir / "import_commands.sh").exists()
+
+    TerraformCleaner(str(input_dir), str(output_dir), import_format="blocks", import_shards=2).run()
+    assert not (output_dir / "import_commands.sh").exists()
+    assert (output_dir / "imports.tf").exists()
+
+    TerraformCleaner(str(input_dir), str(output_dir), import_format="script").run()
+    assert (output_dir / "import_commands.sh").exists()
+    assert not list(output_dir.glob("imports*.tf"))
+
+
+def test_update_references_skips_data_and_module_prefixed_references(tmp_path):
+    cleaner = TerraformCleaner(str(tmp_path), str(tmp_path / "out"))
+    cleaner.resource_mapping = {"okta_group.tfer--00g1": "okta_group.00g1"}
+    content = (
+        'a = okta_group.tfer--00g1.id\n'
+        'b = data.okta_group.tfer--00g1.id\n'
+        'c = module.m.okta_group.tfer--00g1\n'
+        'd = [okta_group.tfer--00g1.name, okta_group.tfer--00g12.id]\n'
+    )
+
+    assert cleaner.update_references(content) == (
+        'a = okta_group.00g1.id\n'
+        'b = data.okta_group.tfer--00g1.id\n'
+        'c = module.m.okta_group.tfer--00g1\n'
+        'd = [okta_group.00g1.name, okta_group.tfer--00g12.id]\n'
+    )
@@ -0,0 +1,139 @@
+import json
+import random
+
+import pytest
+
+from evaluate_risk_rules import CONTAINS_ALL, CONTAINS_ONE, SodViolationEngine
+
+
+def _criterion(operation, *entitlements):
+    """entitlements: (entitlement id, [value ids]) pairs; no values matches any value"""
+    return {
+        "name": "criterion",
+        "attribute": "principal.effective_grants",
+        "operation": operation,
+        "value": {
+            "type": "ENTITLEMENTS",
+            "value": [
+                {"id": ent_id, "values": [{"id": value_id} for value_id in values]}
+                for ent_id, values in entitlements
+            ]
+        }
+    }
+
+
+def _principal(principal_id, grants):
+    """grants: entitlement id -> [value ids]"""
+    return {
+        "id": principal_id,
+        "name": f"{principal_id}@example.com",
+        "entitlements": [{"id": ent_id, "values": [{"id": v} for v in values]} for ent_id, values in grants.items()]
+    }
+
+
+def _reference_matches(node, principal):
+    """Straightforward per-principal evaluation the bitset engine must agree with"""
+    if "and" in node:
+        return all(_reference_matches(child, principal) for child in node["and"])
+    if "or" in node:
+        return any(_reference_matches(child, principal) for child in node["or"])
+
+    held_entitlements = {e["id"] for e in principal["entitlements"]}
+    held_values = {v["id"] for e in principal["entitlements"] for v in e["values"]}
+    checks = []
+    for entitlement in node["value"]["value"]:
+        if entitlement["values"]:
+            checks.extend(v["id"] in held_values for v in entitlement["values"])
+        else:
+            checks.append(entitlement["id"] in held_entitlements)
+    if not checks:
+        return False
+    return all(checks) if node["operation"] == CONTAINS_ALL else any(checks)
+
+
+def _evaluate(tmp_path, rules, principals):
+    rules_file = tmp_path / "risk_rules.json"
+    rules_file.write_text(json.dumps({"rules": rules}))
+    snapshot_file = tmp_path / "snapshot.ndjson"
+    snapshot_file.write_text("".join(json.dumps(p) + "\n" for p in principals))
+
+    engine = SodViolationEngine()
+    engine.load_rules(str(rules_file))
+    engine.load_snapshot(str(snapshot_file))
+    return {result["name"]: [p["id"] for p in result["violations"]] for result in engine.evaluate()}
+
+
+def _expected(rules, principals):
+    return {
+        rule["name"]: [p["id"] for p in principals if _reference_matches(rule["conflictCriteria"], p)]
+        for rule in rules
+    }
+
+
+PRINCIPALS = [
+    _principal("00u_none", {}),
+    _principal("00u_unrelated", {"esp_other": ["ent_other"]}),
+    _principal("00u_approver", {"esp_sn": ["ent_approve"]}),
+    _principal("00u_implementer", {"esp_sn": ["ent_implement"]}),
+    _principal("00u_both", {"esp_sn": ["ent_approve", "ent_implement"]}),
+    _principal("00u_admin", {"esp_admin": ["ent_root"], "esp_sn": ["ent_approve"]}),
+]
+
+RULES = [
+    {"name": "one", "conflictCriteria": _criterion(CONTAINS_ONE, ("esp_sn", ["ent_approve", "ent_implement"]))},
+    {"name": "all", "conflictCriteria": _criterion(CONTAINS_ALL, ("esp_sn", ["ent_approve", "ent_implement"]))},
+    {"name": "and", "conflictCriteria": {"and": [
+        _criterion(CONTAINS_ONE, ("esp_sn", ["ent_approve"])),
+        _criterion(CONTAINS_ONE, ("esp_sn", ["ent_implement"]))
+    ]}},
+    {"name": "or", "conflictCriteria": {"or": [
+        _criterion(CONTAINS_ALL, ("esp_sn", ["ent_approve", "ent_implement"])),
+        _criterion(CONTAINS_ONE, ("esp_admin", []))
+    ]}},
+    {"name": "nested", "conflictCriteria": {"and": [
+        _criterion(CONTAINS_ONE, ("esp_sn", ["ent_approve"])),
+        {"or": [_criterion(CONTAINS_ONE, ("esp_admin", ["ent_root"])),
+                _criterion(CONTAINS_ONE, ("esp_sn", ["ent_implement"]))]}
+    ]}},
+    {"name": "unknown grant", "conflictCriteria": _criterion(CONTAINS_ONE, ("esp_missing", ["ent_missing"]))},
+]
+
+
+def test_engine_matches_per_principal_evaluation(tmp_path):
+    violations = _evaluate(tmp_path, RULES, PRINCIPALS)
+    assert violations == _expected(RULES, PRINCIPALS)
+    assert violations["one"] == ["00u_approver", "00u_implementer", "00u_both", "00u_admin"]
+    assert violations["all"] == ["00u_both"]
+    assert violations["or"] == ["00u_both", "00u_admin"]
+    assert violations["unknown grant"] == []
+
+
+def test_principals_without_matching_entitlements_never_violate(tmp_path):
+    violations = _evaluate(tmp_path, RULES, PRINCIPALS[:2])
+    assert all(ids == [] for ids in violations.values())
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_engine_matches_reference_on_random_snapshot(tmp_path, seed):
+    rng = random.Random(seed)
+    grants = {f"esp{e}": [f"ent{e}_{v}" for v in range(3)] for e in range(4)}
+
+    def random_criterion():
+        picked = rng.sample(sorted(grants), rng.randint(1, 2))
+        return _criterion(rng.choice([CONTAINS_ONE, CONTAINS_ALL]),
+                          *[(ent, rng.sample(grants[ent], rng.randint(0, 2))) for ent in picked])
+
+    def random_tree(depth):
+        if depth == 0 or rng.random() < 0.3:
+            return random_criterion()
+        return {rng.choice(["and", "or"]): [random_tree(depth - 1) for _ in range(rng.randint(1, 3))]}
+
+    rules = [{"name": f"rule{i}", "conflictCriteria": random_tree(2)} for i in range(20)]
+    principals = [
+        _principal(f"00u{i}", {
+            ent: rng.sample(values, rng.randint(1, 3))
+            for ent, values in grants.items() if rng.random() < 0.5
+        })
+        for i in range(70)
+    ]
+    assert _evaluate(tmp_path, rules, principals) == _expected(rules, principals)
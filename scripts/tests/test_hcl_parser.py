@@ -0,0 +1,117 @@
+import pytest
+
+from hcl_parser import HclSyntaxError, parse, parse_file, tokenize, HEREDOC, STRING
+
+
+def _parse(text):
+    return parse(text.encode("utf-8"))
+
+
+def test_resource_labels_and_attributes():
+    hcl = _parse('resource "okta_user" "tfer--alice" {\n  login = "alice@example.com"\n  count = 2\n}\n')
+    (block,) = hcl.resources()
+    assert block.labels == ["okta_user", "tfer--alice"]
+    assert block.address == "okta_user.tfer--alice"
+    assert block.string("login") == "alice@example.com"
+    assert block.attributes["count"].value == 2
+    assert block.text.startswith('resource "okta_user"') and block.text.endswith("}")
+
+
+def test_single_line_blocks():
+    hcl = _parse('resource "okta_group" "a" {}\nresource "okta_group" "b" { name = "B" }\n')
+    assert [block.labels[1] for block in hcl.resources()] == ["a", "b"]
+    assert hcl.resources()[1].string("name") == "B"
+
+
+def test_nested_blocks():
+    hcl = _parse('resource "okta_app" "a" {\n  lifecycle {\n    prevent_destroy = true\n  }\n}\n')
+    (lifecycle,) = hcl.resources()[0].blocks_of_type("lifecycle")
+    assert lifecycle.attributes["prevent_destroy"].value is True
+
+
+def test_interpolation_with_nested_braces_and_quotes():
+    source = (
+        'resource "okta_group" "a" {\n'
+        '  name = "${lookup({ "k" = "}" }, "k", "{")}-group"\n'
+        '  note = "%{ if var.x }{yes}%{ endif }"\n'
+        '}\n'
+        'resource "okta_group" "b" {}\n'
+    )
+    hcl = _parse(source)
+    assert [block.labels[1] for block in hcl.resources()] == ["a", "b"]
+    name = hcl.resources()[0].attributes["name"]
+    assert name.raw == '"${lookup({ "k" = "}" }, "k", "{")}-group"'
+    assert not name.is_literal
+
+
+def test_escaped_interpolation_is_literal():
+    hcl = _parse('resource "okta_group" "a" {\n  name = "$${not_a_template} %%{ also_not }"\n}\n')
+    assert hcl.resources()[0].string("name") == "${not_a_template} %{ also_not }"
+
+
+def test_heredoc_containing_resource_header():
+    source = (
+        'resource "okta_policy" "a" {\n'
+        '  description = <<-EOT\n'
+        '    resource "okta_user" "fake" {\n'
+        '    }\n'
+        '  EOT\n'
+        '}\n'
+    )
+    hcl = _parse(source)
+    assert [block.address for block in hcl.resources()] == ["okta_policy.a"]
+    kinds = [token.kind for token in tokenize(source.encode("utf-8"))]
+    assert HEREDOC in kinds
+
+
+def test_comments_are_skipped():
+    source = (
+        '# resource "okta_user" "hash" {\n'
+        '// resource "okta_user" "slash" {\n'
+        '/* resource "okta_user" "block" {\n} */\n'
+        'resource "okta_user" "real" {} # trailing }\n'
+    )
+    assert [block.labels[1] for block in _parse(source).resources()] == ["real"]
+
+
+def test_label_spans_splice():
+    source = b'resource "okta_group" "tfer--00g1" {\n  name = "tfer--00g1"\n}\n'
+    (block,) = parse(source).resources()
+    start, end = block.label_spans[1]
+    assert source[start:end] == b'"tfer--00g1"'
+    spliced = source[:start] + b'"group_1"' + source[end:]
+    assert spliced == b'resource "okta_group" "group_1" {\n  name = "tfer--00g1"\n}\n'
+
+
+def test_string_tokens_span_quotes():
+    source = b'"a\\"b"'
+    (token,) = list(tokenize(source))
+    assert token.kind == STRING and token.text(source) == '"a\\"b"'
+
+
+@pytest.mark.parametrize("source", [
+    'resource "okta_user" "a" {\n',
+    'resource "okta_user" "a" {\n  name = "unterminated\n}\n',
+    'resource "okta_user" "a" {\n  description = <<EOT\n  no end\n}\n',
+    '}\n',
+])
+def test_syntax_errors(source):
+    with pytest.raises(HclSyntaxError):
+        _parse(source)
+
+
+def test_syntax_error_reports_path_and_line(tmp_path):
+    tf_file = tmp_path / "broken.tf"
+    tf_file.write_text('resource "okta_user" "a" {\n  name = "x\n}\n')
+    with pytest.raises(HclSyntaxError) as excinfo:
+        parse_file(tf_file)
+    assert str(excinfo.value).startswith(f"{tf_file}:2:")
+    assert excinfo.value.line == 2
+
+
+def test_parse_file_reuses_unchanged_parse(tmp_path):
+    tf_file = tmp_path / "groups.tf"
+    tf_file.write_text('resource "okta_group" "a" {}\n')
+    assert parse_file(tf_file) is parse_file(tf_file)
+    tf_file.write_text('resource "okta_group" "b" {}\nresource "okta_group" "c" {}\n')
+    assert [block.labels[1] for block in parse_file(tf_file).resources()] == ["b", "c"]
@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from import_oig_resources import DEFAULT_STATE_FILE, OIGImporter
+
+
+def _bundles(count):
+    return [{"id": f"enb{i}", "name": f"Bundle {i}", "lastUpdated": "2025-01-01"} for i in range(count)]
+
+
+@pytest.fixture
+def importer():
+    importer = OIGImporter("example", "okta.com", "token")
+    importer.bundles = _bundles(5)
+    importer.fetch_entitlements = lambda: importer.bundles
+    importer.prefetch_bundle_readability = lambda bundles: {b["id"]: True for b in bundles}
+    importer.fetch_request_sequences = lambda bundles: None if bundles is None else []
+    importer.fetch_request_settings = lambda: {}
+    return importer
+
+
+def _state(output_dir):
+    with open(os.path.join(output_dir, DEFAULT_STATE_FILE)) as f:
+        return json.load(f)["categories"]
+
+
+@pytest.mark.parametrize("resources_per_file", [0, 2])
+def test_failed_fetch_keeps_previous_output(importer, tmp_path, resources_per_file):
+    output_dir = str(tmp_path)
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=resources_per_file)
+    files = sorted(os.listdir(output_dir))
+    previous = _state(output_dir)["entitlement_bundles"]
+
+    importer.bundles = None
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=resources_per_file)
+
+    assert sorted(os.listdir(output_dir)) == files
+    assert _state(output_dir)["entitlement_bundles"] == previous
+    with open(os.path.join(output_dir, "import.sh")) as f:
+        assert f.read().count("terraform import okta_entitlement_bundle.") == 5
+
+
+def test_empty_fetch_removes_output(importer, tmp_path):
+    output_dir = str(tmp_path)
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+    importer.bundles = []
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+
+    assert not [f for f in os.listdir(output_dir) if f.startswith("entitlements") and f.endswith(".tf")]
+    assert _state(output_dir)["entitlement_bundles"]["resources"] == {}
+
+
+def test_incremental_run_regenerates_only_changed_shard(importer, tmp_path):
+    output_dir = str(tmp_path)
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+    for name in ("entitlements_001.tf", "entitlements_002.tf", "entitlements_003.tf"):
+        os.utime(tmp_path / name, (0, 0))
+
+    importer.bundles = _bundles(5)
+    importer.bundles[2]["lastUpdated"] = "2025-02-01"
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+
+    assert os.path.getmtime(tmp_path / "entitlements_001.tf") == 0
+    assert os.path.getmtime(tmp_path / "entitlements_003.tf") == 0
+    assert os.path.getmtime(tmp_path / "entitlements_002.tf") != 0
+
+
+def test_unreadable_bundle_is_rechecked_and_regenerated(importer, tmp_path):
+    output_dir = str(tmp_path)
+    importer.prefetch_bundle_readability = lambda bundles: {b["id"]: b["id"] != "enb1" for b in bundles}
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+    assert "Bundle 1" not in (tmp_path / "entitlements_001.tf").read_text()
+
+    checked = []
+
+    def prefetch(bundles):
+        checked.extend(b["id"] for b in bundles)
+        return {b["id"]: True for b in bundles}
+
+    importer.prefetch_bundle_readability = prefetch
+    importer.generate_import_files(output_dir, incremental=True, resources_per_file=2)
+
+    assert checked == ["enb1"]
+    assert "Bundle 1" in (tmp_path / "entitlements_001.tf").read_text()
@@ -0,0 +1,122 @@
+import json
+import threading
+
+import requests
+from requests.adapters import BaseAdapter
+
+from okta_api_manager import (
+    LABEL_ASSIGNMENT_CHUNK_SIZE, OktaAPIManager, chunk_label_assignments,
+    destroy_configuration, write_label_assignments,
+)
+from okta_client import OktaSession
+
+GOVERNANCE_BASE = "https://example.okta.com/governance/api/v1"
+
+
+class RecordingTransport(BaseAdapter):
+    """Answers every request with 204 (400 if a payload names a failing ORN) and records it"""
+
+    def __init__(self, failing_orns=()):
+        super().__init__()
+        self.failing_orns = set(failing_orns)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        body = json.loads(request.body) if request.body else None
+        with self._lock:
+            self.requests.append((request.method, request.url, body))
+        response = requests.Response()
+        failed = body and self.failing_orns.intersection(body.get("resourceOrns", []))
+        response.status_code = 400 if failed else 204
+        response._content = b'{"errorSummary": "bad resource"}' if failed else b""
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def _session(transport):
+    session = OktaSession("token")
+    session.mount("https://", transport)
+    return session
+
+
+def _orns(count, prefix="orn:okta:directory:example:groups:00g"):
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def test_resources_with_the_same_values_share_a_request():
+    # Value order per resource doesn't matter, only the set
+    pairs = [("v1", "orn:a"), ("v2", "orn:a"), ("v2", "orn:b"), ("v1", "orn:b"), ("v3", "orn:c")]
+
+    chunks = chunk_label_assignments(pairs)
+
+    assert sorted(chunks) == [(["v1", "v2"], ["orn:a", "orn:b"]), (["v3"], ["orn:c"])]
+
+
+def test_more_than_chunk_size_resources_are_split():
+    orns = _orns(LABEL_ASSIGNMENT_CHUNK_SIZE + 1)
+
+    chunks = chunk_label_assignments([("v1", orn) for orn in orns])
+
+    assert [len(resource_orns) for _, resource_orns in chunks] == [LABEL_ASSIGNMENT_CHUNK_SIZE, 1]
+    assert [orn for _, resource_orns in chunks for orn in resource_orns] == orns
+    assert all(values == ["v1"] for values, _ in chunks)
+
+
+def test_more_than_chunk_size_values_are_split():
+    values = [f"v{i:02d}" for i in range(LABEL_ASSIGNMENT_CHUNK_SIZE + 1)]
+
+    chunks = chunk_label_assignments([(value, "orn:a") for value in values])
+
+    assert [len(label_value_ids) for label_value_ids, _ in chunks] == [LABEL_ASSIGNMENT_CHUNK_SIZE, 1]
+    assert [value for label_value_ids, _ in chunks for value in label_value_ids] == values
+
+
+def test_write_posts_each_chunk_and_reports_failures():
+    orns = _orns(LABEL_ASSIGNMENT_CHUNK_SIZE + 1)
+    transport = RecordingTransport(failing_orns=[orns[-1]])
+
+    result = write_label_assignments(_session(transport), GOVERNANCE_BASE, [("v1", orn) for orn in orns])
+
+    assert result["requests"] == 2
+    assert result["applied"] == LABEL_ASSIGNMENT_CHUNK_SIZE
+    assert result["failed"] == 1
+    [error] = result["errors"]
+    assert (error["labelValueIds"], error["resourceOrns"]) == (["v1"], [orns[-1]])
+    assert "bad resource" in error["error"]
+    assert {(method, url) for method, url, _ in transport.requests} == {
+        ("POST", f"{GOVERNANCE_BASE}/resource-labels/assign")
+    }
+    sent = sorted(len(body["resourceOrns"]) for _, _, body in transport.requests)
+    assert sent == [1, LABEL_ASSIGNMENT_CHUNK_SIZE]
+
+
+def test_destroy_configuration_unassigns_every_label_value():
+    manager = OktaAPIManager("example", "okta.com", "token")
+    transport = RecordingTransport()
+    manager.session.mount("https://", transport)
+    manager.label_catalog.fetch = lambda: [{
+        "labelId": "lbl1",
+        "name": "Sensitivity",
+        "values": [{"labelValueId": "lv1", "name": "High"}, {"labelValueId": "lv2", "name": "Low"}],
+    }]
+    group_ids = [f"00g{i}" for i in range(LABEL_ASSIGNMENT_CHUNK_SIZE + 1)]
+    config = {"label_assignments": [
+        {"label_name": "Sensitivity", "resource_type": "group", "resource_ids": group_ids},
+        {"label_name": "Missing", "resource_type": "group", "resource_ids": ["00gX"]},
+    ]}
+
+    destroy_configuration(manager, config)
+
+    assert {(method, url) for method, url, _ in transport.requests} == {
+        ("POST", f"{GOVERNANCE_BASE}/resource-labels/unassign")
+    }
+    bodies = sorted((body for _, _, body in transport.requests), key=lambda body: -len(body["resourceOrns"]))
+    assert [body["labelValueIds"] for body in bodies] == [["lv1", "lv2"], ["lv1", "lv2"]]
+    assert [orn for body in bodies for orn in body["resourceOrns"]] == [
+        manager.build_group_orn(group_id) for group_id in group_ids
+    ]
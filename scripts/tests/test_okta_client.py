@@ -0,0 +1,225 @@
+import json
+import threading
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import okta_client
+from okta_client import OktaSession, RateLimiter, fan_out, rate_limit_bucket
+
+
+class FakeClock:
+    """Stands in for the time module: sleep() advances both clocks instantly"""
+
+    def __init__(self, start=1_000_000.0):
+        self.now = start
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeTransport(BaseAdapter):
+    """Adapter that answers from a script of responses (or exceptions) and records requests"""
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = list(script)
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request.url)
+        step = self.script.pop(0)
+        if isinstance(step, Exception):
+            raise step
+        status, body, headers = step
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(body).encode("utf-8")
+        response.headers.update(headers or {})
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(okta_client, "time", clock)
+    return clock
+
+
+def _session(script, **kwargs):
+    session = OktaSession("token", **kwargs)
+    transport = FakeTransport(script)
+    session.mount("https://", transport)
+    return session, transport
+
+
+def _rate_headers(limit, remaining, reset):
+    return {"X-Rate-Limit-Limit": str(limit), "X-Rate-Limit-Remaining": str(remaining),
+            "X-Rate-Limit-Reset": str(int(reset))}
+
+
+def _response(status, headers):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    return response
+
+
+URL = "https://example.okta.com/api/v1/apps"
+
+
+def test_rate_limit_bucket_collapses_ids():
+    assert rate_limit_bucket("https://example.okta.com/api/v1/apps/0oa1b2c3d4e5f6g7h8i9/users?limit=2") == \
+        "/api/v1/apps/{id}/users"
+
+
+def test_bucket_refills_from_headers(clock):
+    limiter = RateLimiter(reserve=0.05, burst=0.1)
+    limiter.update(URL, _response(200, _rate_headers(100, 50, clock.now + 10)))
+
+    # Burst capacity is 10% of the limit; then requests are paced at
+    # (50 remaining - 5 reserved) / 10 seconds = 4.5 per second
+    for _ in range(10):
+        limiter.acquire(URL)
+    assert clock.sleeps == []
+    limiter.acquire(URL)
+    assert clock.sleeps == [pytest.approx(1 / 4.5)]
+
+
+def test_spent_bucket_waits_until_reset(clock, capsys):
+    limiter = RateLimiter()
+    reset = clock.now + 30
+    limiter.update(URL, _response(200, _rate_headers(100, 0, reset)))
+
+    limiter.acquire(URL)
+    assert clock.sleeps == [pytest.approx(31)]  # Until the reset plus a one second buffer
+    assert "Waiting 31 seconds" in capsys.readouterr().out
+
+    # The window has rolled over; the budget is relearned from the next response
+    limiter.acquire(URL)
+    assert len(clock.sleeps) == 1
+
+
+def test_max_concurrency_follows_remaining_budget(clock):
+    limiter = RateLimiter(reserve=0.05, burst=0.1)
+    assert limiter.max_concurrency(URL, 8) == 8
+
+    limiter.update(URL, _response(200, _rate_headers(100, 50, clock.now + 10)))
+    assert limiter.max_concurrency(URL, 8) == 8
+
+    limiter.update(URL, _response(200, _rate_headers(100, 7, clock.now + 10)))
+    assert limiter.max_concurrency(URL, 8) == 2
+
+    limiter.update(URL, _response(200, _rate_headers(100, 3, clock.now + 10)))
+    assert limiter.max_concurrency(URL, 8) == 1
+
+
+def test_retries_5xx_with_exponential_backoff(clock):
+    session, transport = _session([(503, {}, None), (502, {}, None), (200, {"ok": True}, None)])
+    response = session.get(URL)
+    assert response.status_code == 200
+    assert len(transport.requests) == 3
+    assert clock.sleeps == [1, 2]
+
+
+def test_retries_429_after_reset(clock):
+    reset = clock.now + 20
+    session, transport = _session([
+        (429, {}, _rate_headers(100, 0, reset)),
+        (200, [], _rate_headers(100, 99, clock.now + 60))
+    ])
+    assert session.get(URL).status_code == 200
+    assert len(transport.requests) == 2
+    assert clock.sleeps == [pytest.approx(21)]
+
+
+def test_connection_errors_raise_after_max_retries(clock):
+    errors = [requests.exceptions.ConnectionError("reset by peer") for _ in range(3)]
+    session, transport = _session(errors, max_retries=3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(URL)
+    assert len(transport.requests) == 3
+    assert clock.sleeps == [1, 2]
+
+
+def test_last_retryable_response_is_returned(clock):
+    session, transport = _session([(500, {}, None)] * 3, max_retries=3)
+    assert session.get(URL).status_code == 500
+    assert len(transport.requests) == 3
+
+
+def test_paginate_follows_link_header(clock):
+    session, transport = _session([
+        (200, [{"id": 1}, {"id": 2}], {"Link": '<https://example.okta.com/api/v1/apps?after=2&limit=2>; rel="next"'}),
+        (200, [{"id": 3}], {"Link": '<https://example.okta.com/api/v1/apps?limit=2>; rel="self"'}),
+    ])
+    assert [app["id"] for app in session.paginate(URL, {"limit": 2})] == [1, 2, 3]
+    assert transport.requests == [f"{URL}?limit=2", f"{URL}?after=2&limit=2"]
+
+
+def test_paginate_follows_links_next_href(clock):
+    url = "https://example.okta.com/governance/api/v1/entitlement-bundles"
+    session, transport = _session([
+        (200, {"data": [{"id": "a"}], "_links": {"next": {"href": "/governance/api/v1/entitlement-bundles?after=a"}}}, None),
+        (200, {"data": [{"id": "b"}], "_links": {}}, None),
+    ])
+    assert [bundle["id"] for bundle in session.paginate(url)] == ["a", "b"]
+    assert transport.requests[1] == f"{url}?after=a"
+
+
+def test_paginate_raises_http_errors(clock):
+    session, _ = _session([(403, {"errorCode": "E0000006"}, None)])
+    with pytest.raises(requests.exceptions.HTTPError):
+        list(session.paginate(URL))
+
+
+def test_fan_out_keeps_input_order_and_collects_errors():
+    release = threading.Event()
+
+    def work(item):
+        if item == 0:
+            assert release.wait(5)  # Finishes after later items in the same window
+        if item % 3 == 2:
+            raise ValueError(f"bad item {item}")
+        if item == 3:
+            release.set()
+        return item * 10
+
+    results = list(fan_out(work, range(10), max_workers=4))
+    assert [result.index for result in results] == list(range(10))
+    assert [result.item for result in results] == list(range(10))
+    assert [result.ok for result in results] == [i % 3 != 2 for i in range(10)]
+    assert [result.result for result in results if result.ok] == [i * 10 for i in range(10) if i % 3 != 2]
+    assert str(results[2].error) == "bad item 2"
+
+
+def test_fan_out_unordered_yields_every_item():
+    results = list(fan_out(lambda item: item, range(20), max_workers=4, ordered=False))
+    assert sorted(result.index for result in results) == list(range(20))
+
+
+def test_fan_out_finishes_started_items_before_source_error():
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError("page 3 failed")
+
+    seen = []
+    with pytest.raises(RuntimeError, match="page 3 failed"):
+        for result in fan_out(lambda item: item, items(), max_workers=4):
+            seen.append(result.result)
+    assert seen == [1, 2]
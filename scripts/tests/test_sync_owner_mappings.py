@@ -0,0 +1,92 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from sync_owner_mappings import OwnerMappingSync
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(response=response)
+
+
+@pytest.fixture
+def syncer():
+    syncer = OwnerMappingSync("example", "okta.com", "token")
+    syncer.get_resource_owners = lambda orn: [
+        {"principals": [{"principalOrn": "orn:okta:directory:example:users:00u1", "principalType": "USER"}]}
+    ]
+    return syncer
+
+
+def _paginate(pages):
+    def paginate(url, params=None):
+        for item in pages.get(url.rsplit("/", 1)[-1], []):
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    return paginate
+
+
+def test_truncated_listing_does_not_save(syncer, tmp_path):
+    output = tmp_path / "owner_mappings.json"
+    checkpoint = tmp_path / "owner_mappings.json.checkpoint"
+    syncer.session.paginate = _paginate({
+        "apps": [{"id": "0oa1", "label": "App 1", "lastUpdated": "1"}, _http_error(500)]
+    })
+
+    assert syncer.sync(str(output), checkpoint_file=str(checkpoint)) is False
+    assert not output.exists()
+    assert checkpoint.exists()
+
+
+def test_missing_oig_is_not_an_error(syncer, tmp_path):
+    output = tmp_path / "owner_mappings.json"
+    syncer.session.paginate = _paginate({
+        "apps": [{"id": "0oa1", "label": "App 1", "lastUpdated": "1"}],
+        "entitlement-bundles": [_http_error(404)]
+    })
+
+    assert syncer.sync(str(output)) is True
+    mappings = json.loads(output.read_text())
+    assert [entry["resource_name"] for entry in mappings["assignments"]["apps"]] == ["App 1"]
+
+
+def _previous_mappings(output, last_full_sync):
+    output.write_text(json.dumps({
+        "last_full_sync": last_full_sync,
+        "assignments": {"apps": [], "groups": [], "entitlement_bundles": []},
+        "resource_versions": {"orn:okta:idp:example:apps:oauth2:0oa1": "1"}
+    }))
+
+
+def _count_owner_queries(syncer):
+    queried = []
+    fetch = syncer.get_resource_owners
+    syncer.get_resource_owners = lambda orn: queried.append(orn) or fetch(orn)
+    syncer.session.paginate = _paginate({"apps": [{"id": "0oa1", "label": "App 1", "lastUpdated": "1"}]})
+    return queried
+
+
+def test_incremental_skips_unchanged_resources(syncer, tmp_path):
+    output = tmp_path / "owner_mappings.json"
+    last_full_sync = datetime.utcnow().isoformat() + "Z"
+    _previous_mappings(output, last_full_sync)
+    queried = _count_owner_queries(syncer)
+
+    assert syncer.sync(str(output), incremental=True) is True
+    assert queried == []
+    assert json.loads(output.read_text())["last_full_sync"] == last_full_sync
+
+
+def test_incremental_runs_full_sync_when_last_one_is_too_old(syncer, tmp_path):
+    output = tmp_path / "owner_mappings.json"
+    _previous_mappings(output, (datetime.utcnow() - timedelta(days=8)).isoformat() + "Z")
+    queried = _count_owner_queries(syncer)
+
+    assert syncer.sync(str(output), incremental=True, full_sync_max_age_days=7) is True
+    assert queried == ["orn:okta:idp:example:apps:oauth2:0oa1"]
+    assert json.loads(output.read_text())["assignments"]["apps"][0]["resource_name"] == "App 1"
@@ -0,0 +1,24 @@
+from terraform_import_blocks import write_import_blocks
+
+IMPORTS = [("okta_group.a", "00g1"), ("okta_group.b", "00g2"), ("okta_group.c", "00g3")]
+
+
+def _tf_files(output_dir):
+    return sorted(path.name for path in output_dir.glob("*.tf"))
+
+
+def test_fewer_shards_remove_stale_files(tmp_path):
+    write_import_blocks(IMPORTS, str(tmp_path), shards=3)
+    assert _tf_files(tmp_path) == ["imports_01.tf", "imports_02.tf", "imports_03.tf"]
+
+    write_import_blocks(IMPORTS, str(tmp_path), shards=1)
+
+    assert _tf_files(tmp_path) == ["imports.tf"]
+
+
+def test_empty_import_set_removes_previous_files(tmp_path):
+    (tmp_path / "main.tf").write_text("")
+    write_import_blocks(IMPORTS, str(tmp_path), shards=2)
+
+    assert write_import_blocks([], str(tmp_path), shards=2) == []
+    assert _tf_files(tmp_path) == ["main.tf"]
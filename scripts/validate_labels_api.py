@@ -24,6 +24,8 @@ import requests
 import argparse
 from typing import Dict, List, Optional
 
+from okta_client import OktaSession
+
 
 class LabelsAPIValidator:
     """Validates Labels API endpoints and data structures"""
@@ -32,13 +34,7 @@ class LabelsAPIValidator:
         self.org_name = org_name
         self.base_url = f"https://{org_name}.{base_url}"
         self.governance_base = f"{self.base_url}/governance/api/v1"
-        self.headers = {
-            "Authorization": f"SSWS {api_token}",
-            "Content-Type": "application/json",
-            "Accept": "application/json"
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        self.session = OktaSession(api_token)
 
     def test_api_connection(self) -> bool:
         """Test basic API connectivity"""